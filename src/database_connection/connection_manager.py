@@ -0,0 +1,211 @@
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+from src.database_connection.db_utils import DB_PATH, get_db_connection, create_all_tables
+
+# Idle read-only connections kept open per database
+READ_POOL_SIZE = 8
+
+
+class ConnectionStats:
+    """Thread-safe counters of reads and writes and of the time writes spent waiting for the writer thread."""
+
+    def __init__(self):
+        self.reads = 0
+        self.connections_opened = 0
+        self.writes = 0
+        self.write_wait_seconds = 0.0
+        self.max_write_wait_seconds = 0.0
+        self.write_seconds = 0.0
+        self.lock_errors = 0
+        self._lock = threading.Lock()
+
+    def record_read(self, opened):
+        with self._lock:
+            self.reads += 1
+            self.connections_opened += opened
+
+    def record_write(self, wait_seconds, write_seconds, lock_error=False):
+        with self._lock:
+            self.writes += 1
+            self.write_wait_seconds += wait_seconds
+            self.max_write_wait_seconds = max(self.max_write_wait_seconds, wait_seconds)
+            self.write_seconds += write_seconds
+            if lock_error:
+                self.lock_errors += 1
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                'reads': self.reads,
+                'connections_opened': self.connections_opened,
+                'writes': self.writes,
+                'write_wait_seconds': self.write_wait_seconds,
+                'max_write_wait_seconds': self.max_write_wait_seconds,
+                'write_seconds': self.write_seconds,
+                'lock_errors': self.lock_errors
+            }
+
+
+def _is_lock_error(error):
+    return isinstance(error, sqlite3.OperationalError) and 'locked' in str(error)
+
+
+class DatabaseWriter:
+    """
+    Single thread that owns the only writing SQLite connection.
+
+    Writes are submitted as functions taking a connection and run one at a time in submission order, so
+    concurrent scraping streams never compete for the SQLite write lock. The time every write waited in the
+    queue is the lock wait it would otherwise have spent inside SQLite; it is recorded in stats, together with
+    the time spent writing, which includes waiting up to the busy timeout for writers of other processes.
+    """
+
+    _STOP = object()
+
+    def __init__(self, db_path=DB_PATH, stats=None):
+        self.db_path = db_path
+        self.stats = stats or ConnectionStats()
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, write_function, *args):
+        """Queues write_function(conn, *args) and returns a Future with its result."""
+        future = Future()
+        self._queue.put((future, time.monotonic(), write_function, args))
+        return future
+
+    def write(self, write_function, *args):
+        """Runs write_function(conn, *args) on the writer thread and returns its result once it is done."""
+        return self.submit(write_function, *args).result()
+
+    def close(self):
+        """Waits for all queued writes to finish and stops the writer thread."""
+        self._queue.put(self._STOP)
+        self._thread.join()
+
+    def _run(self):
+        conn = get_db_connection(self.db_path)
+        try:
+            while True:
+                item = self._queue.get()
+                if item is self._STOP:
+                    break
+                future, submitted_at, write_function, args = item
+                if not future.set_running_or_notify_cancel():
+                    continue
+                started_at = time.monotonic()
+                try:
+                    result = write_function(conn, *args)
+                except Exception as e:
+                    self.stats.record_write(started_at - submitted_at, time.monotonic() - started_at, _is_lock_error(e))
+                    future.set_exception(e)
+                else:
+                    self.stats.record_write(started_at - submitted_at, time.monotonic() - started_at)
+                    future.set_result(result)
+        finally:
+            conn.close()
+
+
+class PooledConnection(sqlite3.Connection):
+    """Read-only connection handed out by a ConnectionManager; close() returns it to the pool."""
+
+    manager = None
+
+    def close(self):
+        if self.manager is None:
+            super().close()
+        else:
+            self.manager._release(self)
+
+
+class ConnectionManager:
+    """
+    Process-wide access to one SQLite database for many concurrent sessions.
+
+    Reads use read-only connections from a pool; in WAL mode they never wait for writers and never block
+    them. All writes go through one DatabaseWriter thread, so sessions downloading at the same time queue
+    their writes instead of failing with "database is locked". The schema is migrated once, when the
+    manager is created. Connections handed out may be used from any thread, but by one thread at a time.
+    """
+
+    def __init__(self, db_path=DB_PATH, read_pool_size=READ_POOL_SIZE):
+        self.db_path = db_path
+        self.read_pool_size = read_pool_size
+        self.stats = ConnectionStats()
+        self.writer = DatabaseWriter(db_path, self.stats)
+        self.writer.write(create_all_tables)
+        self._idle = queue.LifoQueue()
+        self._closed = False
+
+    def connect(self):
+        """
+        Returns a read-only connection; close it to give it back to the pool.
+
+        A new connection is opened when all pooled ones are in use, so readers never wait for each other.
+        """
+        try:
+            conn = self._idle.get_nowait()
+            opened = False
+        except queue.Empty:
+            conn = get_db_connection(self.db_path, read_only=True, factory=PooledConnection, check_same_thread=False)
+            conn.manager = self
+            opened = True
+        self.stats.record_read(opened)
+        return conn
+
+    @contextmanager
+    def reader(self):
+        """Context manager yielding a read-only connection and returning it to the pool afterwards."""
+        conn = self.connect()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def write(self, write_function, *args):
+        """Runs write_function(conn, *args) on the writer thread and returns its result."""
+        return self.writer.write(write_function, *args)
+
+    def close(self):
+        """Finishes the queued writes and closes every connection of the manager."""
+        self._closed = True
+        self.writer.close()
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            sqlite3.Connection.close(conn)
+
+    def _release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        if self._closed or self._idle.qsize() >= self.read_pool_size:
+            sqlite3.Connection.close(conn)
+        else:
+            self._idle.put(conn)
+
+
+_managers = {}
+_managers_lock = threading.Lock()
+
+def get_connection_manager(db_path=DB_PATH):
+    """Returns the ConnectionManager of a database, creating it on first use in the process."""
+    with _managers_lock:
+        manager = _managers.get(db_path)
+        if manager is None:
+            manager = ConnectionManager(db_path)
+            _managers[db_path] = manager
+        return manager
+
+def run_write(conn, writer, write_function, *args):
+    """Runs write_function(conn, *args) on the writer thread when a writer is given, and directly on conn otherwise."""
+    if writer is None:
+        return write_function(conn, *args)
+    return writer.write(write_function, *args)
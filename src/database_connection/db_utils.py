@@ -1,99 +1,930 @@
+import calendar
+from collections import Counter
 import sqlite3
+import threading
 import pandas as pd
 import os
+from datetime import date, datetime, timedelta
+from pathlib import Path
 from dotenv import load_dotenv
 
 load_dotenv()
 
-def get_db_connection():
-    """Establishes a connection to the SQLite database."""
-    conn = sqlite3.connect('google_play_reviews.db')
+# Recorded intervals closer than this are treated as one continuous interval
+COVERAGE_MERGE_TOLERANCE = timedelta(seconds=1)
+
+DB_PATH = 'google_play_reviews.db'
+
+# Pragmas applied to every connection: WAL lets readers run while the scraper writes, NORMAL synchronous
+# is safe with WAL, and a larger page cache and memory-mapped reads speed up scans of big databases
+CONNECTION_PRAGMAS = (
+    ('journal_mode', 'WAL'),
+    ('synchronous', 'NORMAL'),
+    ('cache_size', -64000),  # 64 MB
+    ('mmap_size', 268435456),  # 256 MB
+    ('temp_store', 'MEMORY'),
+)
+
+# Seconds a connection waits for the write lock held by another connection before failing with "database is locked"
+BUSY_TIMEOUT = 30.0
+
+def get_db_connection(db_path=DB_PATH, read_only=False, **connect_args):
+    """
+    Establishes a connection to the SQLite database.
+
+    A read_only connection cannot write and leaves the journal mode to the writers. Other keyword arguments
+    are passed on to sqlite3.connect.
+    """
+    connect_args.setdefault('timeout', BUSY_TIMEOUT)
+    if read_only:
+        conn = sqlite3.connect(Path(db_path).resolve().as_uri() + '?mode=ro', uri=True, **connect_args)
+    else:
+        conn = sqlite3.connect(db_path, **connect_args)
+    for name, value in CONNECTION_PRAGMAS:
+        if not (read_only and name == 'journal_mode'):
+            conn.execute(f"PRAGMA {name} = {value}")
     return conn
 
+def create_all_tables(conn):
+    """Creates every table used by the application and brings the schema up to date."""
+    migrate(conn)
+
+def _create_initial_tables(conn):
+    create_reviews_table(conn)
+    create_checkpoints_table(conn)
+    create_coverage_table(conn)
+    create_apps_table(conn)
+
+def _create_review_indexes(conn):
+    # Every page load filters app_reviews by app and a range of at; the Score tab also filters by score
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_app_reviews_app_key_at ON app_reviews (app_key, at)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_app_reviews_app_key_score_at ON app_reviews (app_key, score, at)")
+
+SECONDS_PER_DAY = 86400
+
+def to_epoch_seconds(value):
+    """
+    Converts a datetime, date or ISO string into the integer seconds since 1970-01-01 stored in app_reviews.
+
+    Naive times are taken as UTC, like the times returned by the scraper. Returns None for missing values.
+    """
+    if value is None or pd.isna(value):
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if not isinstance(value, datetime):
+        value = datetime.combine(value, datetime.min.time())
+    return calendar.timegm(value.utctimetuple())
+
+def from_epoch_seconds(seconds):
+    """Converts stored epoch seconds back into a naive UTC datetime, or None."""
+    if seconds is None:
+        return None
+    return datetime(1970, 1, 1) + timedelta(seconds=seconds)
+
+def _to_epoch_day(value):
+    """Returns the number of days between 1970-01-01 and the day of a date, datetime or ISO string."""
+    return to_epoch_seconds(_to_date_string(value)) // SECONDS_PER_DAY
+
+# Scalar subquery resolving the store id readers are given into the key of the app. Apps are never looked up
+# by title, which several store apps may share.
+APP_KEY_BY_ID = "(SELECT id FROM apps WHERE app_id = ?)"
+
+SCORE_COLUMNS = ['score_1', 'score_2', 'score_3', 'score_4', 'score_5']
+
+def create_daily_stats_table(conn):
+    """
+    Creates the daily_app_stats table with per-day review counts of every app and fills it from stored reviews.
+
+    Triggers on app_reviews keep the table up to date in the same transaction as every insert or delete,
+    so reading a year of score history costs 365 rows instead of every review.
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS daily_app_stats (
+            app_key INTEGER NOT NULL REFERENCES apps (id),
+            country TEXT NOT NULL,
+            language TEXT NOT NULL,
+            day INTEGER NOT NULL,
+            review_count INTEGER NOT NULL DEFAULT 0,
+            score_sum INTEGER NOT NULL DEFAULT 0,
+            score_1 INTEGER NOT NULL DEFAULT 0,
+            score_2 INTEGER NOT NULL DEFAULT 0,
+            score_3 INTEGER NOT NULL DEFAULT 0,
+            score_4 INTEGER NOT NULL DEFAULT 0,
+            score_5 INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (app_key, country, language, day)
+        );
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS app_reviews_daily_stats_insert AFTER INSERT ON app_reviews
+        WHEN NEW.at IS NOT NULL
+        BEGIN
+            INSERT INTO daily_app_stats (
+                app_key, country, language, day, review_count, score_sum,
+                score_1, score_2, score_3, score_4, score_5
+            ) VALUES (
+                NEW.app_key, COALESCE(NEW.country, ''), COALESCE(NEW.language, ''), NEW.at / 86400,
+                1, COALESCE(NEW.score, 0),
+                NEW.score IS 1, NEW.score IS 2, NEW.score IS 3, NEW.score IS 4, NEW.score IS 5
+            )
+            ON CONFLICT (app_key, country, language, day) DO UPDATE SET
+                review_count = review_count + 1,
+                score_sum = score_sum + COALESCE(NEW.score, 0),
+                score_1 = score_1 + (NEW.score IS 1),
+                score_2 = score_2 + (NEW.score IS 2),
+                score_3 = score_3 + (NEW.score IS 3),
+                score_4 = score_4 + (NEW.score IS 4),
+                score_5 = score_5 + (NEW.score IS 5);
+        END;
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS app_reviews_daily_stats_delete AFTER DELETE ON app_reviews
+        WHEN OLD.at IS NOT NULL
+        BEGIN
+            UPDATE daily_app_stats SET
+                review_count = review_count - 1,
+                score_sum = score_sum - COALESCE(OLD.score, 0),
+                score_1 = score_1 - (OLD.score IS 1),
+                score_2 = score_2 - (OLD.score IS 2),
+                score_3 = score_3 - (OLD.score IS 3),
+                score_4 = score_4 - (OLD.score IS 4),
+                score_5 = score_5 - (OLD.score IS 5)
+            WHERE app_key = OLD.app_key AND country = COALESCE(OLD.country, '')
+                AND language = COALESCE(OLD.language, '') AND day = OLD.at / 86400;
+        END;
+    ''')
+    rebuild_daily_stats(conn)
+
+DAILY_STATS_FILL_QUERY = '''
+    INSERT INTO daily_app_stats (
+        app_key, country, language, day, review_count, score_sum,
+        score_1, score_2, score_3, score_4, score_5
+    )
+    SELECT
+        app_key, COALESCE(country, ''), COALESCE(language, ''), at / 86400,
+        COUNT(*), COALESCE(SUM(score), 0),
+        COALESCE(SUM(score = 1), 0), COALESCE(SUM(score = 2), 0), COALESCE(SUM(score = 3), 0),
+        COALESCE(SUM(score = 4), 0), COALESCE(SUM(score = 5), 0)
+    FROM app_reviews
+    WHERE at IS NOT NULL {condition}
+    GROUP BY 1, 2, 3, 4
+'''
+
+def rebuild_daily_stats(conn):
+    """Recomputes daily_app_stats from the stored reviews."""
+    with conn:
+        conn.execute("DELETE FROM daily_app_stats")
+        conn.execute(DAILY_STATS_FILL_QUERY.format(condition=''))
+
+def _rebuild_app_daily_stats(conn, app_key):
+    # Recomputes the rows of one app inside the caller's transaction
+    conn.execute("DELETE FROM daily_app_stats WHERE app_key = ?", (app_key,))
+    conn.execute(DAILY_STATS_FILL_QUERY.format(condition='AND app_key = ?'), (app_key,))
+
+def get_daily_app_stats(conn, app_id, start_date=None, end_date=None):
+    """
+    Returns the per-day review counts of an app, summed over countries and languages.
+
+    The DataFrame has a 'date' column of datetime.date, 'review_count', 'score_sum' and one count
+    column per star in SCORE_COLUMNS, sorted by date.
+    """
+    query = f"""
+    SELECT day, SUM(review_count) AS review_count, SUM(score_sum) AS score_sum,
+        {', '.join(f'SUM({column}) AS {column}' for column in SCORE_COLUMNS)}
+    FROM daily_app_stats
+    WHERE app_key = {APP_KEY_BY_ID}
+    """
+    params = [app_id]
+    if start_date:
+        query += " AND day >= ?"
+        params.append(_to_epoch_day(start_date))
+    if end_date:
+        query += " AND day <= ?"
+        params.append(_to_epoch_day(end_date))
+    query += " GROUP BY day ORDER BY day;"
+    daily_stats = pd.read_sql_query(query, conn, params=params)
+    daily_stats.insert(0, 'date', [date(1970, 1, 1) + timedelta(days=int(day)) for day in daily_stats.pop('day')])
+    return daily_stats
+
+def _to_date_string(value):
+    """Formats a date, datetime or ISO string as 'YYYY-MM-DD'."""
+    if isinstance(value, str):
+        return value[:10]
+    if isinstance(value, datetime):
+        value = value.date()
+    return value.isoformat()
+
+# Sentiment values stored per review; each model fills the ones it produces
+SENTIMENT_COLUMNS = ['sentiment_label', 'negative', 'neutral', 'positive', 'compound', 'polarity']
+# Maximum number of review ids bound to one query
+MAX_QUERY_PARAMETERS = 900
+
+def create_sentiment_table(conn):
+    """Creates the review_sentiment table storing model outputs so reviews are only analyzed once per model revision."""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS review_sentiment (
+            review_id TEXT NOT NULL,
+            model TEXT NOT NULL,
+            model_revision TEXT NOT NULL,
+            sentiment_label TEXT,
+            negative REAL,
+            neutral REAL,
+            positive REAL,
+            compound REAL,
+            polarity REAL,
+            analyzed_at TIMESTAMP,
+            PRIMARY KEY (review_id, model, model_revision)
+        );
+    ''')
+    conn.commit()
+
+def get_review_sentiments(conn, review_ids, model, model_revision, columns=SENTIMENT_COLUMNS):
+    """Returns {review_id: {column: value}} of the stored sentiment of the given reviews for one model revision."""
+    review_ids = list(dict.fromkeys(review_ids))
+    sentiments = {}
+    cursor = conn.cursor()
+    for offset in range(0, len(review_ids), MAX_QUERY_PARAMETERS):
+        chunk = review_ids[offset:offset + MAX_QUERY_PARAMETERS]
+        placeholders = ', '.join('?' * len(chunk))
+        cursor.execute(f'''
+            SELECT review_id, {', '.join(columns)} FROM review_sentiment
+            WHERE model = ? AND model_revision = ? AND review_id IN ({placeholders})
+        ''', [model, model_revision] + chunk)
+        for row in cursor.fetchall():
+            sentiments[row[0]] = dict(zip(columns, row[1:]))
+    cursor.close()
+    return sentiments
+
+def save_review_sentiments(conn, model, model_revision, sentiments):
+    """Stores (review_id, {column: value}) sentiment results of one model revision, replacing earlier ones."""
+    analyzed_at = datetime.now().isoformat()
+    rows = [
+        (review_id, model, model_revision) + tuple(values.get(column) for column in SENTIMENT_COLUMNS) + (analyzed_at,)
+        for review_id, values in sentiments
+    ]
+    with conn:
+        conn.executemany(f'''
+            INSERT OR REPLACE INTO review_sentiment (
+                review_id, model, model_revision, {', '.join(SENTIMENT_COLUMNS)}, analyzed_at
+            ) VALUES ({', '.join('?' * (len(SENTIMENT_COLUMNS) + 4))})
+        ''', rows)
+
+def create_reviews_fts(conn):
+    """
+    Creates app_reviews_fts, an FTS5 full-text index over app_reviews.content, and fills it from stored reviews.
+
+    The index stores no copy of the text (external content), refers to reviews by their id and is kept in sync
+    by triggers on app_reviews.
+    """
+    conn.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS app_reviews_fts USING fts5(
+            content, content='app_reviews', content_rowid='id'
+        );
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS app_reviews_fts_insert AFTER INSERT ON app_reviews
+        BEGIN
+            INSERT INTO app_reviews_fts (rowid, content) VALUES (NEW.id, NEW.content);
+        END;
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS app_reviews_fts_delete AFTER DELETE ON app_reviews
+        BEGIN
+            INSERT INTO app_reviews_fts (app_reviews_fts, rowid, content) VALUES ('delete', OLD.id, OLD.content);
+        END;
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS app_reviews_fts_update AFTER UPDATE OF content ON app_reviews
+        BEGIN
+            INSERT INTO app_reviews_fts (app_reviews_fts, rowid, content) VALUES ('delete', OLD.id, OLD.content);
+            INSERT INTO app_reviews_fts (rowid, content) VALUES (NEW.id, NEW.content);
+        END;
+    ''')
+    with conn:
+        conn.execute("INSERT INTO app_reviews_fts (app_reviews_fts) VALUES ('rebuild')")
+
+def _review_filters(app_id, start_date=None, end_date=None, scores=None, table='app_reviews'):
+    """Builds the WHERE conditions and parameters selecting an app's reviews by day range and score."""
+    conditions = [f"{table}.app_key = {APP_KEY_BY_ID}"]
+    params = [app_id]
+    if start_date:
+        conditions.append(f"{table}.at >= ?")
+        params.append(_to_epoch_day(start_date) * SECONDS_PER_DAY)
+    if end_date:
+        # Stored times may carry a time of day, so compare against the start of the next day
+        conditions.append(f"{table}.at < ?")
+        params.append((_to_epoch_day(end_date) + 1) * SECONDS_PER_DAY)
+    if scores is not None:
+        scores = list(scores)
+        conditions.append(f"{table}.score IN ({', '.join('?' * len(scores))})" if scores else "0")
+        params.extend(scores)
+    return ' AND '.join(conditions), params
+
+# Longest review content analyzed by the Problems tab; longer reviews are dropped by preprocess_data
+MAX_ANALYZED_CONTENT_LENGTH = 500
+
+# Reviews counted and searched by the Problems tab: those kept by preprocess_data, which the n-gram counts
+# are computed from, so every count on the tab is one of distinct stored contents of the same reviews
+ANALYZED_REVIEW_CONDITIONS = (
+    "app_reviews.at IS NOT NULL AND app_reviews.score BETWEEN 1 AND 5 "
+    f"AND length(app_reviews.content) <= {MAX_ANALYZED_CONTENT_LENGTH}"
+)
+
+def _decode_review_times(reviews_df):
+    """Converts the epoch seconds of the 'at' and 'replied_at' columns read from app_reviews into datetimes."""
+    for column in ('at', 'replied_at'):
+        if column in reviews_df.columns:
+            reviews_df[column] = pd.to_datetime(reviews_df[column], unit='s')
+    return reviews_df
+
+def search_reviews(conn, app_id, match_query, start_date=None, end_date=None, scores=None):
+    """
+    Returns an app's analyzed reviews (see ANALYZED_REVIEW_CONDITIONS) matching an FTS5 query, one per
+    distinct content, newest first.
+
+    match_query uses the FTS5 query syntax, so it supports phrases ("app crashes"), boolean operators
+    (crash OR freeze, login NOT password) and prefixes (crash*). Raises sqlite3.OperationalError for an
+    invalid query.
+    """
+    conditions, params = _review_filters(app_id, start_date, end_date, scores)
+    query = f"""
+    SELECT app_reviews.review_id, app_reviews.content, app_reviews.score, app_reviews.at, app_reviews.user_name
+    FROM app_reviews_fts
+    JOIN app_reviews ON app_reviews.id = app_reviews_fts.rowid
+    WHERE app_reviews_fts MATCH ? AND {conditions} AND {ANALYZED_REVIEW_CONDITIONS}
+    GROUP BY app_reviews.content
+    ORDER BY app_reviews.at DESC;
+    """
+    return _decode_review_times(pd.read_sql_query(query, conn, params=[match_query] + params))
+
+def count_reviews(conn, app_id, start_date=None, end_date=None, scores=None):
+    """Returns the number of distinct contents of an app's analyzed reviews within the given day range and scores."""
+    conditions, params = _review_filters(app_id, start_date, end_date, scores)
+    cursor = conn.cursor()
+    cursor.execute(
+        f"SELECT COUNT(DISTINCT app_reviews.content) FROM app_reviews WHERE {conditions} AND {ANALYZED_REVIEW_CONDITIONS}",
+        params
+    )
+    count = cursor.fetchone()[0]
+    cursor.close()
+    return count
+
+def to_fts_query(text):
+    """
+    Converts user input into an FTS5 query.
+
+    Input using the query syntax (double quotes, parentheses, AND/OR/NOT/NEAR or a trailing *) is kept as is;
+    any other text is searched as one exact phrase, so punctuation such as apostrophes cannot break the query.
+    """
+    text = text.strip()
+    uses_syntax = (
+        any(character in text for character in '"()')
+        or text.endswith('*')
+        or any(word in ('AND', 'OR', 'NOT') or word.startswith('NEAR') for word in text.split())
+    )
+    if uses_syntax:
+        return text
+    return '"' + text.replace('"', '""') + '"'
+
+def _convert_legacy_reviews_table(conn):
+    """
+    Rewrites an app_reviews table of the original layout, which repeated the app name on every row and stored
+    times as ISO text, into the current layout.
+
+    Every app name is mapped to the app stored under that title in the apps table, or to a new app whose id
+    is the name itself until the app is searched or scraped again under its store id (see _adopt_legacy_apps).
+    The indexes and triggers of the old table are dropped with it and recreated by the following migration.
+    """
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(app_reviews)")]
+    if 'app_name' not in columns:
+        return
+    create_apps_table(conn)
+    conn.execute('''
+        INSERT INTO apps (app_id, title)
+        SELECT DISTINCT COALESCE(app_name, ''), COALESCE(app_name, '') FROM app_reviews
+        WHERE COALESCE(app_name, '') NOT IN (SELECT title FROM apps WHERE title IS NOT NULL)
+        ON CONFLICT (app_id) DO NOTHING
+    ''')
+    conn.execute("DROP TABLE IF EXISTS app_reviews_converted")
+    conn.execute(f"CREATE TABLE app_reviews_converted ({REVIEWS_TABLE_DEFINITION})")
+    conn.execute('''
+        INSERT INTO app_reviews_converted (
+            review_id, app_key, user_name, user_image, content, score, thumbs_up_count,
+            review_created_version, at, reply_content, replied_at, app_version, country, language
+        )
+        SELECT
+            review_id,
+            (SELECT id FROM apps WHERE title = COALESCE(app_reviews.app_name, '') ORDER BY updated_at DESC, id DESC LIMIT 1),
+            user_name, user_image, content, score, thumbs_up_count, review_created_version,
+            CAST(strftime('%s', at) AS INTEGER), reply_content, CAST(strftime('%s', replied_at) AS INTEGER),
+            app_version, country, language
+        FROM app_reviews
+    ''')
+    conn.execute("DROP TABLE app_reviews")
+    conn.execute("ALTER TABLE app_reviews_converted RENAME TO app_reviews")
+    conn.commit()
+
+def _rebuild_review_derived_tables(conn):
+    # Indexes, triggers and aggregates built on the old app_reviews layout are recreated for the current one,
+    # and the full-text index is rebuilt because converted reviews got new rowids
+    conn.execute("DROP TABLE IF EXISTS daily_app_stats")
+    _create_review_indexes(conn)
+    create_daily_stats_table(conn)
+    create_reviews_fts(conn)
+
+def _add_ingest_generation(conn):
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(apps)")]
+    if 'ingest_generation' not in columns:
+        conn.execute("ALTER TABLE apps ADD COLUMN ingest_generation INTEGER NOT NULL DEFAULT 0")
+
+def _add_review_key(conn):
+    # The full-text index referred to reviews by the implicit rowid of a table keyed by review_id, which VACUUM
+    # may renumber; reviews get an explicit integer id keeping their rowid, and the index is rebuilt on it
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(app_reviews)")]
+    if 'id' not in columns:
+        conn.execute("DROP TABLE IF EXISTS app_reviews_keyed")
+        conn.execute(f"CREATE TABLE app_reviews_keyed ({REVIEWS_TABLE_DEFINITION})")
+        conn.execute(f'''
+            INSERT INTO app_reviews_keyed (id, {', '.join(columns)})
+            SELECT rowid, {', '.join(columns)} FROM app_reviews ORDER BY rowid
+        ''')
+        conn.execute("DROP TABLE app_reviews")
+        conn.execute("ALTER TABLE app_reviews_keyed RENAME TO app_reviews")
+    for trigger in ('app_reviews_fts_insert', 'app_reviews_fts_delete', 'app_reviews_fts_update'):
+        conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    conn.execute("DROP TABLE IF EXISTS app_reviews_fts")
+    _rebuild_review_derived_tables(conn)
+
+def create_review_change_triggers(conn):
+    """
+    Creates triggers counting, in apps.review_changes, the stored reviews of an app that were deleted or updated.
+
+    Reviews are otherwise only appended with ids larger than any before them, so a copy that remembers the
+    largest id and the review_changes it was made at is checked by reading a single apps row (see snapshots).
+    """
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS app_reviews_changes_delete AFTER DELETE ON app_reviews
+        BEGIN
+            UPDATE apps SET review_changes = review_changes + 1 WHERE id = OLD.app_key;
+        END;
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS app_reviews_changes_update AFTER UPDATE ON app_reviews
+        BEGIN
+            UPDATE apps SET review_changes = review_changes + 1 WHERE id IN (OLD.app_key, NEW.app_key);
+        END;
+    ''')
+
+def _add_review_changes(conn):
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(apps)")]
+    if 'review_changes' not in columns:
+        conn.execute("ALTER TABLE apps ADD COLUMN review_changes INTEGER NOT NULL DEFAULT 0")
+    create_review_change_triggers(conn)
+
+# Schema migrations in order; the database stores the number applied so far in PRAGMA user_version.
+# Migrations must be safe to run on a database that already has some of their changes.
+MIGRATIONS = [
+    _create_initial_tables,
+    _create_review_indexes,
+    create_daily_stats_table,
+    create_sentiment_table,
+    create_reviews_fts,
+    _rebuild_review_derived_tables,
+    _add_ingest_generation,
+    _add_review_key,
+    _add_review_changes,
+]
+
+def get_schema_version(conn):
+    """Returns the number of migrations applied to the database."""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def migrate(conn):
+    """Applies the migrations the database has not seen yet and returns the resulting schema version."""
+    version = get_schema_version(conn)
+    if version < len(MIGRATIONS):
+        # Migrations are written against the current layout of app_reviews, so older databases are converted first
+        _convert_legacy_reviews_table(conn)
+    for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+        migration(conn)
+        conn.execute(f"PRAGMA user_version = {number}")
+        conn.commit()
+    return get_schema_version(conn)
+
+def explain_query_plan(conn, query, params=()):
+    """Returns the detail lines of EXPLAIN QUERY PLAN for a query, e.g. to check that it uses an index."""
+    cursor = conn.cursor()
+    cursor.execute(f"EXPLAIN QUERY PLAN {query}", params)
+    plan = [row[-1] for row in cursor.fetchall()]
+    cursor.close()
+    return plan
+
+# Layout of app_reviews: reviews reference their app in the apps table, and times are integer seconds
+# since 1970-01-01 UTC, so rows are small and ranges of at compare as integers. id is the rowid the full-text
+# index refers to: VACUUM keeps an INTEGER PRIMARY KEY, and AUTOINCREMENT never reuses the ids of deleted reviews
+REVIEWS_TABLE_DEFINITION = '''
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    review_id TEXT NOT NULL UNIQUE,
+    app_key INTEGER NOT NULL REFERENCES apps (id),
+    user_name TEXT,
+    user_image TEXT,
+    content TEXT,
+    score INTEGER,
+    thumbs_up_count INTEGER,
+    review_created_version TEXT,
+    at INTEGER,
+    reply_content TEXT,
+    replied_at INTEGER,
+    app_version TEXT,
+    country TEXT,
+    language TEXT
+'''
+
 def create_reviews_table(conn):
-    """Creates the app_reviews table if it doesn't exist."""
+    """Creates the app_reviews table and the apps table it references if they don't exist."""
+    create_apps_table(conn)
+    cursor = conn.cursor()
+    cursor.execute(f"CREATE TABLE IF NOT EXISTS app_reviews ({REVIEWS_TABLE_DEFINITION});")
+    conn.commit()
+    cursor.close()
+
+def create_checkpoints_table(conn):
+    """Creates the scrape_checkpoints table used to resume interrupted downloads."""
     cursor = conn.cursor()
     cursor.execute('''
-        CREATE TABLE IF NOT EXISTS app_reviews (
-            review_id TEXT PRIMARY KEY,
-            user_name TEXT,
-            user_image TEXT,
-            content TEXT,
-            score INTEGER,
-            thumbs_up_count INTEGER,
-            review_created_version TEXT,
-            at TIMESTAMP,
-            reply_content TEXT,
-            replied_at TIMESTAMP,
-            app_version TEXT,
-            app_name TEXT,
-            country TEXT,
-            language TEXT
+        CREATE TABLE IF NOT EXISTS scrape_checkpoints (
+            app_id TEXT NOT NULL,
+            country TEXT NOT NULL,
+            language TEXT NOT NULL,
+            range_start TIMESTAMP NOT NULL,
+            range_end TIMESTAMP NOT NULL,
+            continuation_token TEXT NOT NULL,
+            oldest_fetched TIMESTAMP NOT NULL,
+            started_at TIMESTAMP,
+            updated_at TIMESTAMP NOT NULL,
+            PRIMARY KEY (app_id, country, language, range_start, range_end)
         );
     ''')
     conn.commit()
     cursor.close()
 
-def get_reviews_date_ranges(conn, app_name):
-    """Fetches distinct review dates for a specific app."""
+def get_scrape_checkpoint(conn, app_id, country, language, range_start, range_end):
+    """Returns (continuation_token, oldest_fetched, started_at) saved for a download target, or None."""
     cursor = conn.cursor()
     cursor.execute('''
-        SELECT DISTINCT date(at) as review_date FROM app_reviews WHERE app_name = ?
-    ''', (app_name,))
+        SELECT continuation_token, oldest_fetched, started_at FROM scrape_checkpoints
+        WHERE app_id = ? AND country = ? AND language = ? AND range_start = ? AND range_end = ?
+    ''', (app_id, country, language, range_start.isoformat(), range_end.isoformat()))
+    checkpoint = cursor.fetchone()
+    cursor.close()
+    if checkpoint is None:
+        return None
+    started_at = datetime.fromisoformat(checkpoint[2]) if checkpoint[2] else None
+    return checkpoint[0], datetime.fromisoformat(checkpoint[1]), started_at
+
+def save_scrape_checkpoint(conn, app_id, country, language, range_start, range_end, continuation_token, oldest_fetched, started_at=None):
+    """
+    Stores the paging position reached for a download target, replacing any previous one.
+
+    started_at is when the interrupted pass requested its first page; reviews posted after it were never seen.
+    """
+    with conn:
+        conn.execute('''
+            INSERT INTO scrape_checkpoints (
+                app_id, country, language, range_start, range_end,
+                continuation_token, oldest_fetched, started_at, updated_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(app_id, country, language, range_start, range_end) DO UPDATE SET
+                continuation_token = excluded.continuation_token,
+                oldest_fetched = excluded.oldest_fetched,
+                started_at = excluded.started_at,
+                updated_at = excluded.updated_at;
+        ''', (
+            app_id, country, language, range_start.isoformat(), range_end.isoformat(),
+            continuation_token, oldest_fetched.isoformat(),
+            started_at.isoformat() if started_at else None, datetime.now().isoformat()
+        ))
+
+def delete_scrape_checkpoint(conn, app_id, country, language, range_start, range_end):
+    """Removes the checkpoint of a download target once it has been fully fetched."""
+    with conn:
+        conn.execute('''
+            DELETE FROM scrape_checkpoints
+            WHERE app_id = ? AND country = ? AND language = ? AND range_start = ? AND range_end = ?
+        ''', (app_id, country, language, range_start.isoformat(), range_end.isoformat()))
+
+def create_coverage_table(conn):
+    """Creates the fetch_coverage table recording which time intervals have been scraped for an app."""
+    cursor = conn.cursor()
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS fetch_coverage (
+            app_id TEXT NOT NULL,
+            country TEXT NOT NULL,
+            language TEXT NOT NULL,
+            range_start TIMESTAMP NOT NULL,
+            range_end TIMESTAMP NOT NULL,
+            PRIMARY KEY (app_id, country, language, range_start)
+        );
+    ''')
+    conn.commit()
+    cursor.close()
+
+def get_fetched_ranges(conn, app_id, country, language):
+    """Returns the sorted, non-overlapping (start, end) intervals already scraped for an app."""
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT range_start, range_end FROM fetch_coverage
+        WHERE app_id = ? AND country = ? AND language = ?
+        ORDER BY range_start
+    ''', (app_id, country, language))
+    ranges = [(datetime.fromisoformat(start), datetime.fromisoformat(end)) for start, end in cursor.fetchall()]
+    cursor.close()
+    return ranges
+
+def record_fetched_range(conn, app_id, country, language, range_start, range_end):
+    """Marks an interval as scraped, merging it with any overlapping or adjacent recorded intervals."""
+    if range_end < range_start:
+        return
+    key = (app_id, country, language)
+    bounds = ((range_end + COVERAGE_MERGE_TOLERANCE).isoformat(), (range_start - COVERAGE_MERGE_TOLERANCE).isoformat())
+    with conn:
+        touching = conn.execute('''
+            SELECT range_start, range_end FROM fetch_coverage
+            WHERE app_id = ? AND country = ? AND language = ? AND range_start <= ? AND range_end >= ?
+        ''', key + bounds).fetchall()
+        merged_start = min([range_start] + [datetime.fromisoformat(start) for start, _ in touching])
+        merged_end = max([range_end] + [datetime.fromisoformat(end) for _, end in touching])
+        conn.execute('''
+            DELETE FROM fetch_coverage
+            WHERE app_id = ? AND country = ? AND language = ? AND range_start <= ? AND range_end >= ?
+        ''', key + bounds)
+        conn.execute('''
+            INSERT INTO fetch_coverage (app_id, country, language, range_start, range_end)
+            VALUES (?, ?, ?, ?, ?)
+        ''', key + (merged_start.isoformat(), merged_end.isoformat()))
+
+def create_apps_table(conn):
+    """Creates the apps table storing the metadata of apps found by searching the store."""
+    cursor = conn.cursor()
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS apps (
+            id INTEGER PRIMARY KEY,
+            app_id TEXT NOT NULL UNIQUE,
+            title TEXT,
+            icon TEXT,
+            updated_at TIMESTAMP,
+            ingest_generation INTEGER NOT NULL DEFAULT 0,
+            review_changes INTEGER NOT NULL DEFAULT 0
+        );
+    ''')
+    conn.commit()
+    cursor.close()
+
+def save_apps(conn, apps):
+    """
+    Inserts or updates the metadata of apps given as search results with 'appId', 'title' and 'icon' keys.
+
+    An app converted from the original app_reviews layout is merged into the search result of the same title
+    (see _adopt_legacy_apps), unless several results share that title.
+    """
+    updated_at = datetime.now().isoformat()
+    titles = Counter(app.get('title') for app in apps if app.get('appId'))
+    with conn:
+        _adopt_legacy_apps(conn, [
+            (app['appId'], app['title']) for app in apps if app.get('appId') and titles[app.get('title')] == 1
+        ])
+        conn.executemany('''
+            INSERT INTO apps (app_id, title, icon, updated_at) VALUES (?, ?, ?, ?)
+            ON CONFLICT (app_id) DO UPDATE SET
+                title = excluded.title,
+                icon = excluded.icon,
+                updated_at = excluded.updated_at
+        ''', [(app['appId'], app.get('title'), app.get('icon'), updated_at) for app in apps if app.get('appId')])
+
+def get_app(conn, app_id):
+    """Returns the stored metadata of an app as a dict with 'appId', 'title' and 'icon' keys, or None."""
+    cursor = conn.cursor()
+    cursor.execute("SELECT app_id, title, icon FROM apps WHERE app_id = ?", (app_id,))
+    row = cursor.fetchone()
+    cursor.close()
+    if row is None:
+        return None
+    return {'appId': row[0], 'title': row[1], 'icon': row[2]}
+
+def get_reviews_date_ranges(conn, app_id):
+    """Fetches distinct review dates for a specific app."""
+    cursor = conn.cursor()
+    cursor.execute(f'''
+        SELECT DISTINCT date(at, 'unixepoch') as review_date FROM app_reviews WHERE app_key = {APP_KEY_BY_ID}
+    ''', (app_id,))
     dates = cursor.fetchall()
     cursor.close()
     
     existing_dates = set(date[0] for date in dates if date[0])
     return existing_dates
 
-def get_reviews_for_app(conn, app_name, start_date=None, end_date=None):
-    """Fetches reviews for a specific application within the given date range."""
-    query = """
-    SELECT user_name, content, score, at 
-    FROM app_reviews 
-    WHERE app_name = ?
+def get_latest_review_time(conn, app_id, country, language):
+    """Returns the timestamp of the newest stored review for an app, or None if nothing is stored."""
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT MAX(at) FROM app_reviews
+        WHERE app_key = (SELECT id FROM apps WHERE app_id = ?) AND country = ? AND language = ?
+    ''', (app_id, country, language))
+    latest = cursor.fetchone()[0]
+    cursor.close()
+    return from_epoch_seconds(latest)
+
+def get_existing_review_ids(conn, review_ids):
+    """Returns the subset of the given review ids that are already stored."""
+    review_ids = list(review_ids)
+    if not review_ids:
+        return set()
+    placeholders = ', '.join('?' * len(review_ids))
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT review_id FROM app_reviews WHERE review_id IN ({placeholders})", review_ids)
+    existing_ids = set(row[0] for row in cursor.fetchall())
+    cursor.close()
+    return existing_ids
+
+def get_reviews_for_app(conn, app_id, start_date=None, end_date=None):
+    """Fetches reviews for a specific application, given by its store id, within the given date range."""
+    return get_app_data(conn, app_id, start_date, end_date, columns=['user_name', 'content', 'score', 'at'])
+
+APP_REVIEW_COLUMNS = [
+    'review_id', 'user_name', 'user_image', 'content', 'score', 'thumbs_up_count',
+    'review_created_version', 'at', 'reply_content', 'replied_at', 'app_version',
+    'app_name', 'country', 'language'
+]
+
+def _select_review_columns(columns):
+    """Returns the SELECT list and FROM clause reading the given APP_REVIEW_COLUMNS."""
+    unknown_columns = set(columns) - set(APP_REVIEW_COLUMNS)
+    if unknown_columns:
+        raise ValueError(f"Unknown app_reviews columns: {sorted(unknown_columns)}")
+    select_list = ', '.join('apps.title AS app_name' if column == 'app_name' else f'app_reviews.{column}' for column in columns)
+    # The app name is stored once in the apps table
+    from_clause = "app_reviews JOIN apps ON apps.id = app_reviews.app_key" if 'app_name' in columns else "app_reviews"
+    return select_list, from_clause
+
+def get_app_data(conn, app_id, start_date=None, end_date=None, scores=None, columns=None, limit=None):
     """
-    params = [app_name]
-    if start_date:
-        query += " AND at >= ?"
-        params.append(start_date)
-    if end_date:
-        query += " AND at <= ?"
-        params.append(end_date)
-    query += " ORDER BY at DESC;"
-    reviews_df = pd.read_sql_query(query, conn, params=params)
-    return reviews_df
+    Fetches data for a specific application, given by its store id, newest first, filtering and projecting in SQL.
+
+    Reviews of the same time are ordered by review_id, descending, like in iter_app_data.
 
-def get_app_data(conn, app_name, start_date=None, end_date=None):
-    """Fetches complete data for a specific application within the given date range."""
-    query = """
-    SELECT *
-    FROM app_reviews 
-    WHERE app_name = ?
+    start_date and end_date bound the days of the reviews (both inclusive), scores limits the star ratings,
+    columns selects a subset of APP_REVIEW_COLUMNS (all by default) and limit caps the number of rows.
     """
-    params = [app_name]
-    if start_date:
-        query += " AND at >= ?"
-        params.append(start_date)
-    if end_date:
-        query += " AND at <= ?"
-        params.append(end_date)
-    query += " ORDER BY at DESC;"
-    reviews_df = pd.read_sql_query(query, conn, params=params)
-    return reviews_df
+    columns = list(columns) if columns is not None else APP_REVIEW_COLUMNS
+    select_list, from_clause = _select_review_columns(columns)
 
-def insert_reviews(conn, reviews_df):
-    """Insert reviews into the database, ignoring duplicates based on review_id."""
+    conditions, params = _review_filters(app_id, start_date, end_date, scores)
+    query = f"""
+    SELECT {select_list}
+    FROM {from_clause}
+    WHERE {conditions}
+    ORDER BY app_reviews.at DESC, app_reviews.review_id DESC
+    """
+    if limit is not None:
+        query += " LIMIT ?"
+        params.append(limit)
+    reviews_df = pd.read_sql_query(query + ";", conn, params=params)
+    return _decode_review_times(reviews_df)
+
+# Rows per chunk yielded by iter_app_data
+CHUNK_SIZE = 10000
+# pandas dtypes of app_reviews columns that are not plain strings
+APP_REVIEW_DTYPES = {'score': 'Int64', 'thumbs_up_count': 'Int64'}
+
+def iter_app_data(conn, app_id, start_date=None, end_date=None, scores=None, columns=None, chunk_size=CHUNK_SIZE):
+    """
+    Yields the data of an application as DataFrames of at most chunk_size rows, newest first.
+
+    Takes the same filters as get_app_data. Each chunk is read with its own query that continues after the
+    (at, review_id) of the previous chunk, so memory stays bounded by chunk_size no matter how many reviews
+    the app has, and no cursor is held open between chunks. score and thumbs_up_count are nullable integers.
+    """
+    columns = list(columns) if columns is not None else APP_REVIEW_COLUMNS
+    # The keyset columns are always read and dropped again when they were not requested
+    selected_columns = columns + [column for column in ('at', 'review_id') if column not in columns]
+    select_list, from_clause = _select_review_columns(selected_columns)
+    dtypes = {column: dtype for column, dtype in APP_REVIEW_DTYPES.items() if column in selected_columns}
+
+    conditions, params = _review_filters(app_id, start_date, end_date, scores)
+    conditions += " AND app_reviews.at IS NOT NULL"
+    last_key = None
+    while True:
+        query = f"SELECT {select_list} FROM {from_clause} WHERE {conditions}"
+        chunk_params = list(params)
+        if last_key is not None:
+            query += " AND (app_reviews.at < ? OR (app_reviews.at = ? AND app_reviews.review_id < ?))"
+            chunk_params.extend([last_key[0], last_key[0], last_key[1]])
+        query += " ORDER BY app_reviews.at DESC, app_reviews.review_id DESC LIMIT ?;"
+        chunk_params.append(chunk_size)
+
+        chunk = pd.read_sql_query(query, conn, params=chunk_params, dtype=dtypes)
+        if chunk.empty:
+            return
+        last_key = (int(chunk['at'].iloc[-1]), chunk['review_id'].iloc[-1])
+        yield _decode_review_times(chunk[columns].copy())
+        if len(chunk) < chunk_size:
+            return
+
+def get_review_date_bounds(conn, app_id):
+    """Returns the (first, last) review day of an app as dates, or None if it has no reviews."""
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT MIN(at), MAX(at) FROM app_reviews WHERE app_key = {APP_KEY_BY_ID}", (app_id,))
+    first, last = cursor.fetchone()
+    cursor.close()
+    if first is None:
+        return None
+    return from_epoch_seconds(first).date(), from_epoch_seconds(last).date()
+
+# Memory the results kept by cached_app_query may take together, as measured by DataFrame.memory_usage; a
+# result larger than this is returned without being cached
+QUERY_CACHE_MB = int(os.getenv('QUERY_CACHE_MB', '256'))
+
+_query_cache = {}
+_query_cache_bytes = 0
+_query_cache_lock = threading.Lock()
+
+def get_ingest_generation(conn, app_id):
+    """Returns the ingest generation of an app, bumped by every insert of new reviews, or None."""
     cursor = conn.cursor()
-    insert_query = '''
-        INSERT OR IGNORE INTO app_reviews (
-            review_id, user_name, user_image, content, score, thumbs_up_count,
-            review_created_version, at, reply_content, replied_at, app_version,
-            app_name, country, language
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);
-    '''
-    for _, row in reviews_df.iterrows():
-        cursor.execute(insert_query, (
+    cursor.execute("SELECT ingest_generation FROM apps WHERE app_id = ?", (app_id,))
+    row = cursor.fetchone()
+    cursor.close()
+    return row[0] if row else None
+
+def cached_app_query(conn, app_id, key, read):
+    """
+    Returns read(), reusing the result of an earlier call for the same app and key while its reviews are unchanged.
+
+    Streamlit reruns the page on every widget interaction, so the same reviews are read and preprocessed again
+    and again. A cached result is only reused while the app's ingest generation is the one it was read at, which
+    costs a single indexed lookup; any insert of new reviews, from this process or another, invalidates it.
+    key must describe everything read() depends on besides the app, e.g. the filters and columns. Results of
+    in-memory databases are not cached, since they are private to one connection, and the cached results are
+    bounded by their memory, QUERY_CACHE_MB, rather than their number. Returns a copy of the cached DataFrame,
+    so callers may modify it.
+    """
+    global _query_cache_bytes
+    database_file = conn.execute("PRAGMA database_list").fetchone()[2]
+    if not database_file:
+        return read()
+    cache_key = (database_file, app_id, key)
+    # Read before the data, so an insert running meanwhile can only make the entry look stale, never fresh
+    generation = get_ingest_generation(conn, app_id)
+    with _query_cache_lock:
+        entry = _query_cache.pop(cache_key, None)
+        if entry is not None and entry[0] == generation:
+            # Put back at the end, as the most recently used
+            _query_cache[cache_key] = entry
+            return entry[1].copy()
+        if entry is not None:
+            _query_cache_bytes -= entry[2]
+
+    result = read()
+    size = int(result.memory_usage(index=True, deep=True).sum())
+    if size <= QUERY_CACHE_MB * 1024 * 1024:
+        _store_query_result(cache_key, (generation, result, size))
+    return result.copy()
+
+def _store_query_result(cache_key, entry):
+    # Adds an entry and forgets the least recently used ones until the cached results fit in QUERY_CACHE_MB
+    global _query_cache_bytes
+    with _query_cache_lock:
+        replaced = _query_cache.pop(cache_key, None)
+        if replaced is not None:
+            # Stored meanwhile by another thread
+            _query_cache_bytes -= replaced[2]
+        _query_cache[cache_key] = entry
+        _query_cache_bytes += entry[2]
+        while _query_cache_bytes > QUERY_CACHE_MB * 1024 * 1024:
+            _query_cache_bytes -= _query_cache.pop(next(iter(_query_cache)))[2]
+
+def clear_query_cache():
+    """Forgets all results cached by cached_app_query."""
+    global _query_cache_bytes
+    with _query_cache_lock:
+        _query_cache.clear()
+        _query_cache_bytes = 0
+
+# Review row tuples hold the columns below in order, with at and replied_at as epoch seconds and the app
+# given by its name and store id (?12 and ?13); the app is resolved to its key in the apps table
+REVIEW_INSERT_QUERY = '''
+    INSERT INTO app_reviews (
+        review_id, user_name, user_image, content, score, thumbs_up_count,
+        review_created_version, at, reply_content, replied_at, app_version,
+        app_key, country, language
+    ) VALUES (?1, ?2, ?3, ?4, ?5, ?6, ?7, ?8, ?9, ?10, ?11, (SELECT id FROM apps WHERE app_id = ?13), ?14, ?15)
+    ON CONFLICT (review_id) DO NOTHING;
+'''
+
+def insert_reviews(conn, reviews_df):
+    """Insert reviews given with app_reviews columns plus 'app_id' into the database, ignoring duplicates based on review_id."""
+    rows = [
+        (
             row['review_id'],
             row['user_name'],
             row['user_image'],
@@ -101,13 +932,76 @@ def insert_reviews(conn, reviews_df):
             row['score'],
             row['thumbs_up_count'],
             row['review_created_version'],
-            row['at'].isoformat(),
+            to_epoch_seconds(row['at']),
             row['reply_content'],
-            row['replied_at'].isoformat() if row['replied_at'] else None,
+            to_epoch_seconds(row['replied_at']),
             row['app_version'],
             row['app_name'],
+            row['app_id'],
             row['country'],
             row['language']
-        ))
-    conn.commit()
-    cursor.close()
\ No newline at end of file
+        )
+        for _, row in reviews_df.iterrows()
+    ]
+    insert_review_rows(conn, rows)
+
+def _adopt_legacy_apps(conn, apps):
+    """
+    Moves apps converted from the original app_reviews layout to the store ids of the given (app_id, title) pairs.
+
+    A converted app is stored with its name as id. The first time an app of that title is stored under its
+    store id, the converted row takes over the store id; if the store id already has a row, e.g. because the
+    app was searched before it was scraped again, the converted reviews are moved to that row, its daily stats
+    are recomputed and the converted row is deleted, so old and new reviews stay together. Runs inside the
+    caller's transaction.
+    """
+    for app_id, title in apps:
+        if app_id == title:
+            continue
+        legacy = conn.execute("SELECT id FROM apps WHERE app_id = ? AND title = ?", (title, title)).fetchone()
+        if legacy is None:
+            continue
+        current = conn.execute("SELECT id FROM apps WHERE app_id = ?", (app_id,)).fetchone()
+        if current is None:
+            conn.execute("UPDATE apps SET app_id = ? WHERE id = ?", (app_id, legacy[0]))
+            continue
+        conn.execute("UPDATE app_reviews SET app_key = ? WHERE app_key = ?", (current[0], legacy[0]))
+        conn.execute("DELETE FROM daily_app_stats WHERE app_key = ?", (legacy[0],))
+        _rebuild_app_daily_stats(conn, current[0])
+        # Invalidates results of cached_app_query read before the merge
+        conn.execute("UPDATE apps SET ingest_generation = ingest_generation + 1 WHERE id = ?", (current[0],))
+        conn.execute("DELETE FROM apps WHERE id = ?", (legacy[0],))
+
+def register_apps(conn, apps):
+    """Makes sure every (app_id, app_name) pair has a row in the apps table titled app_name."""
+    updated_at = datetime.now().isoformat()
+    _adopt_legacy_apps(conn, apps)
+    for app_id, app_name in apps:
+        conn.execute('''
+            INSERT INTO apps (app_id, title, updated_at) VALUES (?, ?, ?)
+            ON CONFLICT (app_id) DO UPDATE SET title = excluded.title, updated_at = excluded.updated_at
+        ''', (app_id, app_name, updated_at))
+
+def insert_review_rows(conn, rows):
+    """
+    Bulk-inserts review row tuples in a single transaction, ignoring duplicates based on review_id.
+
+    Rows must follow the parameter order of REVIEW_INSERT_QUERY; their apps are registered in the same
+    transaction, and their ingest generation is bumped when anything new was stored. Returns the number of
+    rows actually inserted.
+    """
+    if not rows:
+        return 0
+    apps = dict.fromkeys((row[12], row[11]) for row in rows)
+    with conn:
+        register_apps(conn, apps)
+        cursor = conn.executemany(REVIEW_INSERT_QUERY, rows)
+        inserted = cursor.rowcount
+        cursor.close()
+        if inserted:
+            # Invalidates results of cached_app_query read before this insert
+            conn.executemany(
+                "UPDATE apps SET ingest_generation = ingest_generation + 1 WHERE app_id = ?",
+                [(app_id,) for app_id, _ in apps]
+            )
+    return inserted
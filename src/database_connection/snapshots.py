@@ -0,0 +1,273 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime
+
+import pandas as pd
+
+from src.database_connection.db_utils import (
+    DB_PATH,
+    APP_REVIEW_COLUMNS,
+    SECONDS_PER_DAY,
+    get_db_connection,
+    get_app_data,
+    _review_filters,
+    _decode_review_times,
+    _to_epoch_day
+)
+
+# Columns stored in the snapshots; app_name is the same for every review of an app and is not stored
+SNAPSHOT_COLUMNS = [column for column in APP_REVIEW_COLUMNS if column != 'app_name']
+# pandas dtypes of the integer columns, which may be null
+SNAPSHOT_DTYPES = {'score': 'Int64', 'thumbs_up_count': 'Int64', 'at': 'Int64', 'replied_at': 'Int64'}
+# Partition of the reviews without a time
+UNKNOWN_MONTH = 'none'
+MANIFEST_FILE = '_manifest.json'
+
+
+def get_snapshot_dir(conn):
+    """Returns the snapshot directory of a database, next to its file, or None for an in-memory database."""
+    database_file = conn.execute("PRAGMA database_list").fetchone()[2]
+    if not database_file:
+        return None
+    return os.path.splitext(database_file)[0] + '_snapshots'
+
+def _app_dir(snapshot_dir, app_key):
+    return os.path.join(snapshot_dir, f'app_key={app_key}')
+
+def _month_path(snapshot_dir, app_key, month):
+    return os.path.join(_app_dir(snapshot_dir, app_key), f'month={month}', 'part.parquet')
+
+def _month_bounds(month):
+    """Returns the epoch seconds of the start of a 'YYYY-MM' month and of the next month."""
+    year, month_number = map(int, month.split('-'))
+    next_year, next_month = (year + 1, 1) if month_number == 12 else (year, month_number + 1)
+    start = datetime(year, month_number, 1) - datetime(1970, 1, 1)
+    end = datetime(next_year, next_month, 1) - datetime(1970, 1, 1)
+    return int(start.total_seconds()), int(end.total_seconds())
+
+def load_manifest(snapshot_dir, app_key):
+    """
+    Returns the manifest of an app's snapshot, or None if it has none.
+
+    The manifest holds the largest review id included ('max_rowid'), the app's review_changes when it was
+    written ('review_changes'), the number and sum of the ids of the app's reviews up to max_rowid
+    ('row_count', 'id_sum'), a checksum of their ids and review ids ('checksum') and the months written
+    ('months').
+    """
+    try:
+        with open(os.path.join(_app_dir(snapshot_dir, app_key), MANIFEST_FILE), encoding='utf-8') as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return None
+
+def _replace_file(path, write):
+    # Readers never see a partially written file
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary_path = path + '.tmp'
+    write(temporary_path)
+    os.replace(temporary_path, path)
+
+def _snapshot_signature(conn, app_key, max_rowid):
+    """Returns (row count, sum of ids) of an app's reviews with an id up to max_rowid."""
+    return tuple(conn.execute(
+        "SELECT COUNT(*), COALESCE(SUM(id), 0) FROM app_reviews WHERE app_key = ? AND id <= ?", (app_key, max_rowid)
+    ).fetchone())
+
+def _snapshot_checksum(conn, app_key, max_rowid):
+    """Returns a SHA-1 of the (id, review_id) pairs of an app's reviews with an id up to max_rowid."""
+    digest = hashlib.sha1()
+    cursor = conn.execute(
+        "SELECT id, review_id FROM app_reviews WHERE app_key = ? AND id <= ? ORDER BY id", (app_key, max_rowid)
+    )
+    for review_key, review_id in cursor:
+        digest.update(f'{review_key}\t{review_id}\n'.encode('utf-8'))
+    cursor.close()
+    return digest.hexdigest()
+
+def _review_changes(conn, app_key):
+    return conn.execute("SELECT review_changes FROM apps WHERE id = ?", (app_key,)).fetchone()[0]
+
+def _is_current(conn, app_key, manifest, review_changes, verify=False):
+    """
+    Returns whether the reviews a snapshot was written from are still stored unchanged.
+
+    Deleting, moving or renumbering reviews bumps the app's review_changes (see create_review_change_triggers),
+    so a snapshot written at the current value is current; this is what every read checks. verify also
+    compares the count, sum and checksum of the ids and review ids up to max_rowid, which catches changes
+    that bypassed the triggers, e.g. a rebuild of the table, at the cost of reading all of the app's ids.
+    """
+    if not {'max_rowid', 'review_changes', 'row_count', 'id_sum', 'checksum', 'months'} <= manifest.keys():
+        return False
+    if manifest['review_changes'] != review_changes:
+        return False
+    if not verify:
+        return True
+    if _snapshot_signature(conn, app_key, manifest['max_rowid']) != (manifest['row_count'], manifest['id_sum']):
+        return False
+    return _snapshot_checksum(conn, app_key, manifest['max_rowid']) == manifest['checksum']
+
+def refresh_app_snapshot(conn, app_key, snapshot_dir=None):
+    """
+    Brings the Parquet snapshot of an app up to date with the reviews stored in SQLite.
+
+    Reviews are partitioned by app and month of at. Only the months of reviews stored since the last refresh
+    are rewritten; the manifest records the largest review id included, and since ids are never reused, every
+    review stored later is in the SQLite tail read by read_app_data. A snapshot whose reviews were deleted,
+    moved or renumbered since (see _is_current) is rebuilt from scratch.
+
+    Parameters:
+    conn: Database connection object.
+    app_key (int): Key of the app in the apps table.
+    snapshot_dir (str, optional): Directory of the snapshots, next to the database file by default.
+
+    Returns:
+    int: Number of month partitions written.
+    """
+    snapshot_dir = snapshot_dir or get_snapshot_dir(conn)
+    manifest = load_manifest(snapshot_dir, app_key)
+    # Read before the reviews, so that a change made while they are exported is seen by the next read
+    review_changes = _review_changes(conn, app_key)
+    stale = manifest is not None and not _is_current(conn, app_key, manifest, review_changes, verify=True)
+    if manifest is None or stale:
+        manifest = {'max_rowid': 0, 'months': []}
+    max_rowid = conn.execute("SELECT COALESCE(MAX(id), 0) FROM app_reviews WHERE app_key = ?", (app_key,)).fetchone()[0]
+    if max_rowid <= manifest['max_rowid'] and not stale:
+        return 0
+
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT DISTINCT strftime('%Y-%m', at, 'unixepoch') FROM app_reviews
+        WHERE app_key = ? AND id > ? AND id <= ?
+    ''', (app_key, manifest['max_rowid'], max_rowid))
+    months = [row[0] or UNKNOWN_MONTH for row in cursor.fetchall()]
+    cursor.close()
+
+    for month in months:
+        query = f"SELECT {', '.join(SNAPSHOT_COLUMNS)} FROM app_reviews WHERE app_key = ? AND id <= ?"
+        params = [app_key, max_rowid]
+        if month == UNKNOWN_MONTH:
+            query += " AND at IS NULL"
+        else:
+            query += " AND at >= ? AND at < ?"
+            params.extend(_month_bounds(month))
+        reviews = pd.read_sql_query(query, conn, params=params, dtype=SNAPSHOT_DTYPES)
+        _replace_file(_month_path(snapshot_dir, app_key, month), lambda path: reviews.to_parquet(path, index=False))
+
+    row_count, id_sum = _snapshot_signature(conn, app_key, max_rowid)
+    manifest = {
+        'max_rowid': max_rowid,
+        'review_changes': review_changes,
+        'row_count': row_count,
+        'id_sum': id_sum,
+        'checksum': _snapshot_checksum(conn, app_key, max_rowid),
+        'months': sorted(set(manifest['months']) | set(months))
+    }
+    _replace_file(os.path.join(_app_dir(snapshot_dir, app_key), MANIFEST_FILE), lambda path: _write_json(manifest, path))
+    if stale:
+        # Partitions of months that no longer have reviews are removed once the new manifest is in place
+        for entry in os.listdir(_app_dir(snapshot_dir, app_key)):
+            if entry.startswith('month=') and entry[len('month='):] not in manifest['months']:
+                shutil.rmtree(os.path.join(_app_dir(snapshot_dir, app_key), entry))
+    return len(months)
+
+def _write_json(data, path):
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(data, file)
+
+def refresh_snapshots(conn, snapshot_dir=None):
+    """Refreshes the snapshot of every app and returns {app_key: month partitions written}."""
+    app_keys = [row[0] for row in conn.execute("SELECT id FROM apps ORDER BY id").fetchall()]
+    return {app_key: refresh_app_snapshot(conn, app_key, snapshot_dir) for app_key in app_keys}
+
+def _month_in_range(month, start_seconds, end_seconds):
+    if month == UNKNOWN_MONTH:
+        return start_seconds is None and end_seconds is None
+    month_start, month_end = _month_bounds(month)
+    return (start_seconds is None or month_end > start_seconds) and (end_seconds is None or month_start < end_seconds)
+
+def read_app_data(conn, app_id, start_date=None, end_date=None, scores=None, columns=None, snapshot_dir=None):
+    """
+    Fetches the same reviews as get_app_data, reading snapshotted ones from Parquet.
+
+    Only the month partitions overlapping the day range are opened and only the requested columns are read
+    from them; reviews stored after the last refresh are read from SQLite by id. Whether the snapshot is
+    current is checked against a single apps row (see _is_current). Without a snapshot of the app, or when
+    reviews it holds were deleted, moved or renumbered since, this is get_app_data. iter_app_data and
+    get_daily_app_stats always read SQLite.
+    """
+    columns = list(columns) if columns is not None else APP_REVIEW_COLUMNS
+    unknown_columns = set(columns) - set(APP_REVIEW_COLUMNS)
+    if unknown_columns:
+        raise ValueError(f"Unknown app_reviews columns: {sorted(unknown_columns)}")
+
+    snapshot_dir = snapshot_dir or get_snapshot_dir(conn)
+    app = conn.execute("SELECT id, title, review_changes FROM apps WHERE app_id = ?", (app_id,)).fetchone()
+    manifest = load_manifest(snapshot_dir, app[0]) if snapshot_dir and app is not None else None
+    if manifest is None or not _is_current(conn, app[0], manifest, app[2]):
+        return get_app_data(conn, app_id, start_date, end_date, scores, columns)
+    app_key, app_name, _ = app
+
+    # at and review_id are always read to sort the reviews like get_app_data
+    stored_columns = [column for column in columns if column != 'app_name']
+    read_columns = stored_columns + [column for column in ('at', 'review_id') if column not in stored_columns]
+    start_seconds = _to_epoch_day(start_date) * SECONDS_PER_DAY if start_date else None
+    end_seconds = (_to_epoch_day(end_date) + 1) * SECONDS_PER_DAY if end_date else None
+    filters = []
+    if start_seconds is not None:
+        filters.append(('at', '>=', start_seconds))
+    if end_seconds is not None:
+        filters.append(('at', '<', end_seconds))
+    if scores is not None:
+        filters.append(('score', 'in', list(scores)))
+
+    frames = []
+    if scores is None or list(scores):
+        for month in manifest['months']:
+            if _month_in_range(month, start_seconds, end_seconds):
+                frames.append(pd.read_parquet(
+                    _month_path(snapshot_dir, app_key, month), columns=read_columns, filters=filters or None
+                ))
+
+    conditions, params = _review_filters(app_id, start_date, end_date, scores)
+    tail_query = f"""
+    SELECT {', '.join(f'app_reviews.{column}' for column in read_columns)}
+    FROM app_reviews
+    WHERE {conditions} AND app_reviews.id > ?
+    """
+    frames.append(pd.read_sql_query(tail_query, conn, params=params + [manifest['max_rowid']], dtype={
+        column: dtype for column, dtype in SNAPSHOT_DTYPES.items() if column in read_columns
+    }))
+
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return get_app_data(conn, app_id, start_date, end_date, scores, columns, limit=0)
+    reviews_df = pd.concat(frames, ignore_index=True)
+    reviews_df = reviews_df.sort_values(['at', 'review_id'], ascending=False, na_position='last', ignore_index=True)
+    # Same dtypes as read from SQLite: int64, or float64 when there are nulls
+    for column in SNAPSHOT_DTYPES.keys() & set(read_columns):
+        reviews_df[column] = reviews_df[column].astype('float64' if reviews_df[column].hasnans else 'int64')
+    if 'app_name' in columns:
+        reviews_df['app_name'] = app_name
+    return _decode_review_times(reviews_df[columns])
+
+def main(argv=None):
+    """Command line entry point: python -m src.database_connection.snapshots"""
+    parser = argparse.ArgumentParser(description="Refresh the Parquet snapshots of the stored reviews.")
+    parser.add_argument('--db-path', default=DB_PATH, help="SQLite database to export.")
+    parser.add_argument('--snapshot-dir', help="Directory of the snapshots, next to the database by default.")
+    args = parser.parse_args(argv)
+
+    conn = get_db_connection(args.db_path)
+    try:
+        written = refresh_snapshots(conn, args.snapshot_dir)
+    finally:
+        conn.close()
+    print(f"Refreshed {sum(1 for months in written.values() if months)} app(s), {sum(written.values())} month partition(s) written.")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -1,13 +1,23 @@
+import hashlib
+import threading
+import time
 import streamlit as st
 import pandas as pd
 import plotly.express as px
 from datetime import datetime, timedelta
 from transformers import AutoTokenizer
 from src.database_connection.db_utils import (
-    get_reviews_date_ranges,
-    get_reviews_for_app
+    get_fetched_ranges,
+    get_reviews_for_app,
+    save_apps,
+    get_review_sentiments,
+    save_review_sentiments,
+    cached_app_query,
+    MAX_ANALYZED_CONTENT_LENGTH
 )
-from src.functions.scraper import scrape_and_store_reviews
+from src.database_connection.connection_manager import run_write
+from src.database_connection.snapshots import read_app_data
+from src.functions.scraper import scrape_missing_ranges
 from collections import Counter
 import nltk
 from nltk.corpus import stopwords
@@ -71,6 +81,104 @@ def generate_ngrams(text, n):
     ngrams = [' '.join(words[i:i+n]) for i in range(len(words) - n + 1)]
     return ngrams
 
+def _content_digest(content):
+    # Seen contents are remembered by a SHA-1 digest of 20 bytes rather than the text, which keeps memory
+    # small without the collisions and per-process salting of hash()
+    return hashlib.sha1(content.encode('utf-8')).digest()
+
+def _preprocess_unseen(chunk, seen_contents):
+    # Preprocesses the reviews of a chunk whose stored content is not in seen_contents, and adds their digests;
+    # preprocess_data lowercases the content, so the stored content is kept aside to deduplicate on
+    chunk = preprocess_data(chunk.assign(stored_content=chunk['content']), min_records=0)
+    chunk = chunk.drop_duplicates(subset=['stored_content'])
+    content_digests = chunk['stored_content'].map(_content_digest)
+    chunk = chunk[~content_digests.isin(seen_contents)].drop(columns=['stored_content'])
+    seen_contents.update(content_digests)
+    return chunk
+
+def iter_cleaned_chunks(chunks):
+    """
+    Preprocess chunks of reviews one at a time and add a 'cleaned_content' column.
+
+    Reviews whose stored content already appeared, in this or an earlier chunk, are skipped, so the chunks
+    together hold each distinct content once while only one chunk is in memory. The reviews kept are the ones
+    counted by count_reviews and searched by search_reviews.
+    
+    Parameters:
+    chunks (iterable of pd.DataFrame): Chunks of reviews, e.g. from iter_app_data.
+    
+    Returns:
+    generator of pd.DataFrame: The preprocessed, non-empty chunks.
+    """
+    seen_contents = set()
+    for chunk in chunks:
+        if chunk.empty:
+            continue
+        chunk = _preprocess_unseen(chunk, seen_contents)
+        if chunk.empty:
+            continue
+        chunk['cleaned_content'] = chunk['content'].apply(preprocess_text_simple)
+        yield chunk
+
+def count_ngrams(chunks, n):
+    """
+    Count n-grams and single words of cleaned reviews chunk by chunk.
+    
+    Parameters:
+    chunks (iterable of pd.DataFrame): Chunks with a 'cleaned_content' column, e.g. from iter_cleaned_chunks.
+    n (int): Number of words per n-gram.
+    
+    Returns:
+    tuple: (Counter of n-grams, Counter of words, number of reviews).
+    """
+    ngram_counts = Counter()
+    word_counts = Counter()
+    review_count = 0
+    for chunk in chunks:
+        review_count += len(chunk)
+        for text in chunk['cleaned_content'].dropna():
+            ngram_counts.update(generate_ngrams(text, n))
+            if n != 1:
+                word_counts.update(text.split())
+    if n == 1:
+        word_counts = ngram_counts
+    return ngram_counts, word_counts, review_count
+
+def find_reviews_with_ngram(chunks, phrase, columns=('content', 'score', 'at', 'user_name')):
+    """
+    Collect the reviews whose cleaned content contains an n-gram, reading the reviews chunk by chunk.
+
+    Only reviews containing every word of the phrase are tokenized, so a second pass over the data is cheap.
+    
+    Parameters:
+    chunks (iterable of pd.DataFrame): Chunks of reviews, e.g. from iter_app_data.
+    phrase (str): The n-gram to look for.
+    columns (tuple of str): Columns of the returned reviews.
+    
+    Returns:
+    pd.DataFrame: The matching reviews.
+    """
+    words = phrase.split()
+    matches = []
+    seen_contents = set()
+    for chunk in chunks:
+        if chunk.empty:
+            continue
+        candidates = chunk['content'].fillna('').str.lower()
+        mask = pd.Series(True, index=chunk.index)
+        for word in words:
+            mask &= candidates.str.contains(word, regex=False)
+        chunk = chunk[mask]
+        if chunk.empty:
+            continue
+        # Deduplicated on the stored content like iter_cleaned_chunks, so both passes see the same reviews
+        chunk = _preprocess_unseen(chunk, seen_contents)
+        contains_phrase = chunk['content'].apply(lambda text: phrase in generate_ngrams(preprocess_text_simple(text), len(words)))
+        matches.append(chunk.loc[contains_phrase, list(columns)])
+    if not matches:
+        return pd.DataFrame(columns=list(columns))
+    return pd.concat(matches, ignore_index=True)
+
 
 def plot_content_length_distribution(df):
     """
@@ -94,7 +202,28 @@ def plot_score_distribution(df):
     score_counts = df['score'].value_counts(normalize=True).sort_index()
     score_distribution_df = score_counts.reset_index()
     score_distribution_df.columns = ['Score', 'Percentage']
+    return _score_distribution_figure(score_distribution_df)
+
+def plot_score_distribution_from_stats(daily_stats, scores=(1, 2, 3, 4, 5)):
+    """
+    Plot the distribution of scores as percentages from per-day review counts.
     
+    Parameters:
+    daily_stats (pd.DataFrame): Per-day counts returned by get_daily_app_stats.
+    scores (list of int): Scores to include.
+    """
+    score_counts = pd.Series(
+        {score: daily_stats[f'score_{score}'].sum() for score in sorted(scores)},
+        dtype=float
+    )
+    total = score_counts.sum()
+    score_distribution_df = pd.DataFrame({
+        'Score': score_counts.index,
+        'Percentage': (score_counts / total).values if total else 0.0
+    })
+    return _score_distribution_figure(score_distribution_df)
+
+def _score_distribution_figure(score_distribution_df):
     fig = px.bar(
         score_distribution_df,
         x='Score',
@@ -117,6 +246,98 @@ def plot_score_distribution(df):
 
 
 
+def daily_average_scores(daily_stats, scores=(1, 2, 3, 4, 5)):
+    """
+    Compute the average score of every day from per-day review counts.
+    
+    Parameters:
+    daily_stats (pd.DataFrame): Per-day counts returned by get_daily_app_stats.
+    scores (list of int): Only reviews with these scores are averaged.
+    
+    Returns:
+    pd.DataFrame: Columns 'at' and 'score', one row per day with at least one matching review.
+    """
+    counts = sum(daily_stats[f'score_{score}'] for score in scores) if scores else pd.Series(0, index=daily_stats.index)
+    score_sums = sum(daily_stats[f'score_{score}'] * score for score in scores) if scores else counts
+    metrics_over_time = pd.DataFrame({'at': daily_stats['date'], 'score': score_sums / counts.where(counts > 0)})
+    return metrics_over_time.dropna(subset=['score']).reset_index(drop=True)
+
+# Columns of app_reviews read by the analysis tabs
+ANALYSIS_COLUMNS = ['review_id', 'user_name', 'content', 'score', 'thumbs_up_count', 'at', 'app_version']
+
+# Values each sentiment model returns besides its label, named without the model prefix
+SENTIMENT_MODEL_COLUMNS = {
+    'textblob': ['polarity'],
+    'vader': ['positive', 'neutral', 'negative', 'compound'],
+    'distilbert': ['negative', 'positive'],
+    'roberta': ['negative', 'neutral', 'positive'],
+}
+# Results analyzed between two writes to the review_sentiment table
+SENTIMENT_SAVE_INTERVAL = 200
+
+def analyze_sentiment_with_store(conn, reviews, model_name, model_function, model_revision, progress_callback=None, writer=None, batch_function=None):
+    """
+    Analyze the sentiment of reviews, reusing results stored in the review_sentiment table.
+
+    Only reviews without a stored result for this model revision are passed to model_function, and their
+    results are stored as they are computed. Results labelled 'Error' are not stored, so they are retried.
+    
+    Parameters:
+    conn: Database connection object.
+    reviews (pd.DataFrame): Reviews with 'review_id' and 'content' columns.
+    model_name (str): Name of the model, e.g. 'RoBERTa'.
+    model_function (callable): Function returning the sentiment dict of one text.
+    model_revision (str): Revision of the model; results of other revisions are not reused.
+    progress_callback (callable, optional): Called with (analyzed, total) after every analyzed review.
+    writer (DatabaseWriter, optional): Writer thread storing the results; conn only reads when it is given.
+    batch_function (callable, optional): Function returning the sentiment columns of a list of texts as a
+        DataFrame; when given, it is used instead of model_function, one call per SENTIMENT_SAVE_INTERVAL reviews.
+    
+    Returns:
+    pd.DataFrame: The sentiment columns of every review, in the order of reviews.
+    """
+    prefix = model_name.lower()
+    columns = ['sentiment_label'] + SENTIMENT_MODEL_COLUMNS[prefix]
+    review_ids = reviews['review_id'].tolist()
+
+    stored = get_review_sentiments(conn, review_ids, prefix, model_revision, columns)
+    results = {
+        review_id: {f'{prefix}_{column}': value for column, value in values.items()}
+        for review_id, values in stored.items()
+    }
+
+    missing = {}
+    for review_id, text in zip(review_ids, reviews['content']):
+        if review_id not in results:
+            missing.setdefault(review_id, text)
+
+    def analyzed_results():
+        # Yields (review_id, result) as results are computed, a whole batch at a time with batch_function
+        if batch_function is None:
+            for review_id, text in missing.items():
+                yield review_id, model_function(text)
+            return
+        missing_items = list(missing.items())
+        for start in range(0, len(missing_items), SENTIMENT_SAVE_INTERVAL):
+            batch = missing_items[start:start + SENTIMENT_SAVE_INTERVAL]
+            batch_results = batch_function([text for _, text in batch]).to_dict('records')
+            yield from zip([review_id for review_id, _ in batch], batch_results)
+
+    pending = []
+    for analyzed, (review_id, result) in enumerate(analyzed_results(), start=1):
+        results[review_id] = result
+        if result.get(f'{prefix}_sentiment_label') != 'Error':
+            pending.append((review_id, {column: result.get(f'{prefix}_{column}') for column in columns}))
+        if len(pending) >= SENTIMENT_SAVE_INTERVAL:
+            run_write(conn, writer, save_review_sentiments, prefix, model_revision, pending)
+            pending = []
+        if progress_callback is not None:
+            progress_callback(analyzed, len(missing))
+    if pending:
+        run_write(conn, writer, save_review_sentiments, prefix, model_revision, pending)
+
+    return pd.DataFrame([results[review_id] for review_id in review_ids])
+
 def preprocess_data(df, model=None, min_records=100, apply_lemmatization=True):
     """
     Preprocess the given DataFrame for sentiment analysis and visualization.
@@ -135,12 +356,13 @@ def preprocess_data(df, model=None, min_records=100, apply_lemmatization=True):
     if df.empty:
         raise ValueError("The input DataFrame is empty. Please provide a valid DataFrame.")
 
-    columns_to_drop = ['c_name', 'user_image', 'reply_content', 'replied_at', 'review_created_version', 'review_id']
+    columns_to_drop = ['c_name', 'user_image', 'reply_content', 'replied_at', 'review_created_version']
     df = df.drop(columns=[col for col in columns_to_drop if col in df.columns], errors='ignore')
 
-    df = df.drop_duplicates()
+    # review_id is kept so sentiment results can be stored per review, but it makes every row unique
+    df = df.drop_duplicates(subset=[col for col in df.columns if col != 'review_id'])
     df = df[(df['score'] >= 1) & (df['score'] <= 5)]
-    df = df[df['content'].str.len() <= 500]
+    df = df[df['content'].str.len() <= MAX_ANALYZED_CONTENT_LENGTH]
     for col in ['content', 'app_version']:
         df[col] = df[col].fillna('')
 
@@ -168,21 +390,83 @@ def preprocess_data(df, model=None, min_records=100, apply_lemmatization=True):
     
     return df
 
-def search_and_select_app(search_query):
+def load_app_reviews(conn, app_id, start_date=None, end_date=None, scores=None, columns=None):
+    """
+    Read an app's reviews with read_app_data and preprocess them, with 'at' as dates.
+
+    The result is cached by cached_app_query until new reviews of the app are stored, so reruns of the page
+    with unchanged data run no query over the reviews and no preprocessing.
+    
+    Parameters:
+    conn: Database connection object.
+    app_id (str): The store ID of the application.
+    start_date (date, optional): First day of the reviews.
+    end_date (date, optional): Last day of the reviews.
+    scores (list of int, optional): Only reviews with these scores are read.
+    columns (list of str, optional): Columns read from app_reviews, all by default.
+    
+    Returns:
+    pd.DataFrame: The preprocessed reviews, empty if there are none.
+    """
+    scores = tuple(scores) if scores is not None else None
+    columns = tuple(columns) if columns is not None else None
+
+    def read():
+        app_data = read_app_data(conn, app_id, start_date, end_date, scores, columns)
+        if app_data.empty:
+            return app_data
+        app_data = preprocess_data(app_data)
+        app_data['at'] = pd.to_datetime(app_data['at']).dt.date
+        return app_data
+
+    return cached_app_query(conn, app_id, ('load_app_reviews', start_date, end_date, scores, columns), read)
+
+# Metadata of the apps last stored for a search, as {(database file, query): (stored at, {app_id: (title, icon)})};
+# a search is stored again once its entry is as old as a cached search, so an apps table changed meanwhile is
+# repaired by the idempotent upsert of save_apps
+_stored_searches = {}
+_stored_searches_lock = threading.Lock()
+
+def search_and_select_app(search_query, conn=None, writer=None):
     """
     Search for applications based on the search query.
+
+    Results are cached for a while, so reruns of the page do not search the store again. The metadata of the
+    found apps is only written when it differs from what was last stored for the same search, so cached results
+    cause no writes; once the search is as old as a cached one it is written again.
     
     Parameters:
     search_query (str): The search term entered by the user.
+    conn: Optional database connection; when given, the metadata of the found apps is stored in the apps table.
+    writer (DatabaseWriter, optional): Writer thread storing the metadata instead of conn.
     
     Returns:
     list: A list of search results.
     """
-    from src.functions.scraper import select_app
+    from src.functions.scraper import select_app, SEARCH_CACHE_TTL, SEARCH_CACHE_SIZE
     search_results = select_app(search_query)
+    if (conn is not None or writer is not None) and search_results:
+        database_file = writer.db_path if writer is not None else conn.execute("PRAGMA database_list").fetchone()[2]
+        metadata = {app['appId']: (app.get('title'), app.get('icon')) for app in search_results if app.get('appId')}
+        key = (database_file, search_query)
+        now = time.monotonic()
+        with _stored_searches_lock:
+            # In-memory databases are private to their connection, so their writes are never skipped
+            entry = _stored_searches.get(key) if database_file else None
+            if entry is None or now - entry[0] >= SEARCH_CACHE_TTL:
+                entry = (now, {})
+            changed_apps = [app for app in search_results if app.get('appId') and entry[1].get(app['appId']) != metadata[app['appId']]]
+        if changed_apps:
+            run_write(conn, writer, save_apps, changed_apps)
+            if database_file:
+                with _stored_searches_lock:
+                    _stored_searches[key] = (entry[0], metadata)
+                    if len(_stored_searches) > SEARCH_CACHE_SIZE:
+                        oldest_key = min(_stored_searches, key=lambda stored_key: _stored_searches[stored_key][0])
+                        del _stored_searches[oldest_key]
     return search_results
 
-def check_and_fetch_reviews(conn, selected_app, selected_app_id, start_date, end_date, status_placeholder, missing_placeholder):
+def check_and_fetch_reviews(conn, selected_app, selected_app_id, start_date, end_date, status_placeholder, missing_placeholder, writer=None):
     """
     Check for missing reviews and fetch them if necessary.
     
@@ -194,12 +478,12 @@ def check_and_fetch_reviews(conn, selected_app, selected_app_id, start_date, end
     end_date (datetime): The end date for fetching reviews.
     status_placeholder: Streamlit placeholder for status messages.
     missing_placeholder: Streamlit placeholder for missing date ranges.
+    writer (DatabaseWriter, optional): Writer thread storing the fetched reviews; conn only reads when it is given.
     """
     
-    existing_dates = get_reviews_date_ranges(conn, selected_app)
+    fetched_ranges = get_fetched_ranges(conn, selected_app_id, "us", "en")
 
-   
-    missing_ranges = get_missing_and_available_ranges(existing_dates, start_date, end_date)
+    missing_ranges = get_missing_and_available_ranges(fetched_ranges, start_date, end_date)
 
     if not missing_ranges['missing']:
         status_placeholder.success(f"Reviews for **{selected_app}** from {start_date} to {end_date} are up-to-date.")
@@ -209,7 +493,7 @@ def check_and_fetch_reviews(conn, selected_app, selected_app_id, start_date, end
             missing_placeholder.info(f"- Missing: {missing_range[0]} to {missing_range[1]}")
 
         # Fetch missing reviews
-        fetch_missing_reviews(conn, selected_app, selected_app_id, missing_ranges['missing'], status_placeholder, missing_placeholder)
+        fetch_missing_reviews(conn, selected_app, selected_app_id, missing_ranges['missing'], status_placeholder, missing_placeholder, writer)
 
         # Clear placeholders after fetching
         status_placeholder.empty()
@@ -218,9 +502,12 @@ def check_and_fetch_reviews(conn, selected_app, selected_app_id, start_date, end
         if not st.session_state.get('stop_download'):
             status_placeholder.success("All missing reviews have been fetched.")
 
-def fetch_missing_reviews(conn, selected_app, selected_app_id, missing_ranges, status_placeholder, missing_placeholder):
+def fetch_missing_reviews(conn, selected_app, selected_app_id, missing_ranges, status_placeholder, missing_placeholder, writer=None):
     """
     Fetch and store missing reviews for the specified date ranges.
+
+    All ranges are fetched in a single pass over the review feed, so the newest reviews
+    are paged through only once no matter how many gaps there are.
     
     Parameters:
     conn: Database connection object.
@@ -229,66 +516,103 @@ def fetch_missing_reviews(conn, selected_app, selected_app_id, missing_ranges, s
     missing_ranges (list of tuples): List of missing date ranges.
     status_placeholder: Streamlit placeholder for status messages.
     missing_placeholder: Streamlit placeholder for missing date ranges.
+    writer (DatabaseWriter, optional): Writer thread storing the fetched reviews; conn only reads when it is given.
     """
-    for index, date_range in enumerate(missing_ranges):
-        start_date = date_range[0]
-        end_date = date_range[1]
-        if st.session_state.get('stop_download'):
-            status_placeholder.warning("Download process stopped by user.")
-            break
-
-        fetch_placeholder = st.empty()
-        fetch_placeholder.info(f"Fetching reviews from {start_date} to {end_date}...")
-
-        progress_bar = st.progress(0)
-        progress_text = st.empty()
-
-        scrape_and_store_reviews(
-            app_name=selected_app,
-            app_id=selected_app_id,
-            conn=conn,
-            progress_bar=progress_bar,
-            progress_text=progress_text,
-            start_date=start_date,
-            end_date=end_date,
-            country="us",
-            language="en",
-        )
+    if st.session_state.get('stop_download'):
+        status_placeholder.warning("Download process stopped by user.")
+        return
+
+    fetch_placeholder = st.empty()
+    fetch_placeholder.info(f"Fetching reviews for {len(missing_ranges)} missing date range(s)...")
+
+    progress_bar = st.progress(0)
+    progress_text = st.empty()
+
+    scrape_missing_ranges(
+        app_name=selected_app,
+        app_id=selected_app_id,
+        conn=conn,
+        date_ranges=missing_ranges,
+        progress_bar=progress_bar,
+        progress_text=progress_text,
+        country="us",
+        language="en",
+        writer=writer,
+    )
 
-        progress_bar.empty()
-        progress_text.empty()
-        fetch_placeholder.empty()
+    progress_bar.empty()
+    progress_text.empty()
+    fetch_placeholder.empty()
 
     if not st.session_state.get('stop_download'):
         status_placeholder.success("Finished fetching missing reviews.")
 
-def get_missing_and_available_ranges(existing_dates, start_date, end_date):
+def get_missing_and_available_ranges(fetched_ranges, start_date, end_date):
     """
-    Calculate missing and available date ranges based on existing data.
+    Calculate missing and available date ranges based on the intervals already scraped.
     
     Parameters:
-    existing_dates (set): Set of existing dates with reviews.
+    fetched_ranges (list of tuples): Sorted (start, end) intervals that have already been scraped.
     start_date (datetime): The start date for fetching reviews.
     end_date (datetime): The end date for fetching reviews.
     
     Returns:
     dict: Dictionary containing 'missing' and 'available' date ranges.
     """
-    total_date_set = set(start_date + timedelta(days=x) for x in range((end_date - start_date).days + 1))
-    missing_date_set = total_date_set - existing_dates
-    available_date_set = existing_dates & total_date_set
-
-    missing_dates = sorted(missing_date_set)
-    available_dates = sorted(available_date_set)
-
-    missing_ranges = dates_to_ranges(missing_dates)
-    available_ranges = dates_to_ranges(available_dates)
-
     return {
-        'missing': missing_ranges,
-        'available': available_ranges
+        'missing': subtract_ranges(start_date, end_date, fetched_ranges),
+        'available': intersect_ranges(start_date, end_date, fetched_ranges)
     }
 
+def subtract_ranges(start_date, end_date, covered_ranges):
+    """
+    Compute the parts of [start_date, end_date] that are not covered by any of the given intervals.
+    
+    Parameters:
+    start_date (datetime): Start of the requested interval.
+    end_date (datetime): End of the requested interval.
+    covered_ranges (list of tuples): (start, end) intervals that are already covered.
+    
+    Returns:
+    list of tuples: Uncovered (start, end) intervals, oldest first. Slivers shorter than a second are ignored.
+    """
+    step = timedelta(microseconds=1)
+    missing = []
+    cursor = start_date
+    for covered_start, covered_end in sorted(covered_ranges):
+        if covered_end < cursor:
+            continue
+        if covered_start > end_date:
+            break
+        if covered_start > cursor:
+            missing.append((cursor, min(covered_start - step, end_date)))
+        cursor = max(cursor, covered_end + step)
+        if cursor > end_date:
+            break
+    if cursor <= end_date:
+        missing.append((cursor, end_date))
+    return [(gap_start, gap_end) for gap_start, gap_end in missing if gap_end - gap_start >= timedelta(seconds=1)]
+
+def intersect_ranges(start_date, end_date, covered_ranges):
+    """
+    Compute the parts of [start_date, end_date] that are covered by the given intervals.
+    
+    Parameters:
+    start_date (datetime): Start of the requested interval.
+    end_date (datetime): End of the requested interval.
+    covered_ranges (list of tuples): (start, end) intervals that are already covered.
+    
+    Returns:
+    list of tuples: Covered (start, end) intervals clipped to the requested interval, oldest first.
+    """
+    available = []
+    for covered_start, covered_end in sorted(covered_ranges):
+        overlap_start = max(covered_start, start_date)
+        overlap_end = min(covered_end, end_date)
+        if overlap_start <= overlap_end:
+            available.append((overlap_start, overlap_end))
+    return available
+
 def dates_to_ranges(dates_list):
     """
     Convert a sorted list of dates into continuous date ranges.
@@ -317,13 +641,13 @@ def dates_to_ranges(dates_list):
     ranges.append((start_date, end_date))
     return ranges
 
-def display_reviews(conn, selected_app, start_date, end_date):
+def display_reviews(conn, selected_app_id, start_date, end_date):
     """
     Fetch and return reviews for the selected application within the specified date range.
     
     Parameters:
     conn: Database connection object.
-    selected_app (str): The name of the selected application.
+    selected_app_id (str): The ID of the selected application.
     start_date (datetime): The start date for fetching reviews.
     end_date (datetime): The end date for fetching reviews.
     
@@ -331,18 +655,30 @@ def display_reviews(conn, selected_app, start_date, end_date):
     pd.DataFrame: DataFrame containing the fetched reviews.
     """
 
-    reviews_df = get_reviews_for_app(conn, selected_app, start_date, end_date)
+    reviews_df = get_reviews_for_app(conn, selected_app_id, start_date, end_date)
     return reviews_df
 
 def get_db_connection():
     """
-    Establish and return a database connection.
+    Return a read-only connection from the process-wide connection pool.
+
+    Closing the connection returns it to the pool. Writes go through the writer returned by get_db_writer.
     
     Returns:
     Connection object: The database connection.
     """
-    from src.database_connection.db_utils import get_db_connection as db_get_db_connection
-    return db_get_db_connection()
+    from src.database_connection.connection_manager import get_connection_manager
+    return get_connection_manager().connect()
+
+def get_db_writer():
+    """
+    Return the process-wide writer thread shared by all sessions.
+    
+    Returns:
+    DatabaseWriter: The writer running every database write.
+    """
+    from src.database_connection.connection_manager import get_connection_manager
+    return get_connection_manager().writer
 
 def create_tables(conn):
     """
@@ -351,5 +687,5 @@ def create_tables(conn):
     Parameters:
     conn: Database connection object.
     """
-    from src.database_connection.db_utils import create_reviews_table
-    create_reviews_table(conn)
\ No newline at end of file
+    from src.database_connection.db_utils import create_all_tables
+    create_all_tables(conn)
\ No newline at end of file
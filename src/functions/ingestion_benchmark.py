@@ -0,0 +1,111 @@
+import argparse
+import time
+from collections import namedtuple
+from datetime import date
+
+from src.database_connection.db_utils import get_db_connection, create_all_tables, insert_review_rows
+from src.functions.review_sources import ReplaySource
+from src.functions.scraper import iter_range_batches, PAGES_PER_TRANSACTION
+from src.functions.throttling import FetchStats
+
+BenchmarkResult = namedtuple(
+    'BenchmarkResult',
+    ['pages', 'rows', 'requests', 'total_seconds', 'fetch_wait_seconds', 'write_seconds', 'pages_per_second', 'rows_per_second']
+)
+
+
+def run_ingestion_benchmark(source, db_path=':memory:', app_name='Benchmark', app_id='benchmark.app',
+                            start_date=date(1970, 1, 1), end_date=None, pages_per_transaction=PAGES_PER_TRANSACTION):
+    """
+    Ingests every review a source serves for a date range and times each stage.
+
+    fetch_wait_seconds is the time the writer spent waiting for the next page (fetching and converting
+    reviews to rows, minus what overlapped with writing), and write_seconds the time spent in SQLite
+    transactions. Use a ReplaySource so runs are reproducible.
+
+    Parameters:
+    source (ReviewSource): Where pages are read from.
+    db_path (str): Path of the SQLite database, in memory by default.
+    app_name (str): App name the rows are stored under.
+    app_id (str): App id requested from the source.
+    start_date (date): First day of the range.
+    end_date (date, optional): Last day of the range, today by default.
+    pages_per_transaction (int): Pages written to SQLite per transaction.
+
+    Returns:
+    BenchmarkResult: Counters and timings of the run.
+    """
+    end_date = end_date or date.today()
+    conn = get_db_connection(db_path)
+    create_all_tables(conn)
+    stats = FetchStats()
+
+    pages = 0
+    rows = 0
+    fetch_wait_seconds = 0.0
+    write_seconds = 0.0
+    pending_rows = []
+
+    def flush():
+        nonlocal write_seconds
+        write_start = time.perf_counter()
+        insert_review_rows(conn, pending_rows)
+        write_seconds += time.perf_counter() - write_start
+
+    start = time.perf_counter()
+    batches = iter_range_batches(app_name, app_id, [(start_date, end_date)], stats=stats, source=source)
+    try:
+        while True:
+            wait_start = time.perf_counter()
+            try:
+                batch = next(batches)
+            except StopIteration:
+                break
+            finally:
+                fetch_wait_seconds += time.perf_counter() - wait_start
+            pages += 1
+            rows += len(batch.rows)
+            pending_rows.extend(batch.rows)
+            if pages % pages_per_transaction == 0:
+                flush()
+                pending_rows = []
+        if pending_rows:
+            flush()
+    finally:
+        batches.close()
+        conn.close()
+    total_seconds = time.perf_counter() - start
+
+    return BenchmarkResult(
+        pages=pages,
+        rows=rows,
+        requests=stats.as_dict()['requests'],
+        total_seconds=total_seconds,
+        fetch_wait_seconds=fetch_wait_seconds,
+        write_seconds=write_seconds,
+        pages_per_second=pages / total_seconds if total_seconds else 0.0,
+        rows_per_second=rows / total_seconds if total_seconds else 0.0
+    )
+
+
+def main(argv=None):
+    """Command line entry point: python -m src.functions.ingestion_benchmark models_comparison/reviews.parquet"""
+    parser = argparse.ArgumentParser(description="Measure review ingestion throughput on recorded reviews.")
+    parser.add_argument('fixture', help="JSONL or Parquet file with recorded reviews.")
+    parser.add_argument('--app-name', help="Only replay reviews of this app.")
+    parser.add_argument('--latency', type=float, default=0.0, help="Simulated seconds per page request.")
+    parser.add_argument('--db-path', default=':memory:', help="SQLite database written to, in memory by default.")
+    parser.add_argument('--pages-per-transaction', type=int, default=PAGES_PER_TRANSACTION)
+    args = parser.parse_args(argv)
+
+    source = ReplaySource.from_file(args.fixture, app_name=args.app_name, latency=args.latency)
+    result = run_ingestion_benchmark(source, db_path=args.db_path, pages_per_transaction=args.pages_per_transaction)
+
+    print(f"Pages: {result.pages} ({result.requests} requests), rows: {result.rows}")
+    print(f"Total: {result.total_seconds:.3f}s, {result.pages_per_second:.1f} pages/s, {result.rows_per_second:.0f} rows/s")
+    print(f"Waiting for pages: {result.fetch_wait_seconds:.3f}s, writing to SQLite: {result.write_seconds:.3f}s")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,132 @@
+import abc
+import json
+import time
+from datetime import datetime
+
+import pandas as pd
+from google_play_scraper import Sort
+from google_play_scraper.features.reviews import _ContinuationToken
+
+from src.functions.scraper import PAGE_SIZE, STREAM_REQUESTS_PER_SECOND, fetch_review_page
+
+# app_reviews columns and the scraper review keys they are stored from
+COLUMN_TO_REVIEW_KEY = {
+    'review_id': 'reviewId',
+    'user_name': 'userName',
+    'user_image': 'userImage',
+    'content': 'content',
+    'score': 'score',
+    'thumbs_up_count': 'thumbsUpCount',
+    'review_created_version': 'reviewCreatedVersion',
+    'at': 'at',
+    'reply_content': 'replyContent',
+    'replied_at': 'repliedAt',
+    'app_version': 'appVersion'
+}
+
+
+class ReviewSource(abc.ABC):
+    """
+    Where the scraper reads pages of the newest-first review feed from.
+
+    fetch_page has the signature of scraper.fetch_review_page and returns (reviews, continuation_token),
+    the token's value being None after the last page. requests_per_second is the default request rate of a
+    stream reading from the source, or None for no limit.
+    """
+
+    requests_per_second = None
+
+    @abc.abstractmethod
+    def fetch_page(self, app_id, lang='en', country='us', count=PAGE_SIZE, continuation_token=None):
+        pass
+
+
+class GooglePlaySource(ReviewSource):
+    """Reads reviews from Google Play."""
+
+    requests_per_second = STREAM_REQUESTS_PER_SECOND
+
+    def fetch_page(self, app_id, lang='en', country='us', count=PAGE_SIZE, continuation_token=None):
+        return fetch_review_page(app_id, lang=lang, country=country, count=count, continuation_token=continuation_token)
+
+
+def _to_datetime(value):
+    """Converts a stored timestamp (datetime, pandas Timestamp or ISO string) into a datetime."""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.to_pydatetime()
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value)
+
+
+def normalize_review(record):
+    """Converts a record with either scraper keys or app_reviews column names into a scraper review dict."""
+    review = {key: None for key in COLUMN_TO_REVIEW_KEY.values()}
+    for key, value in record.items():
+        key = COLUMN_TO_REVIEW_KEY.get(key, key)
+        if key in review:
+            review[key] = value
+    review['at'] = _to_datetime(review['at'])
+    review['repliedAt'] = _to_datetime(review['repliedAt'])
+    return review
+
+
+class ReplaySource(ReviewSource):
+    """
+    Serves recorded reviews page by page, newest first, as if they came from Google Play.
+
+    Every page request sleeps for latency seconds to simulate the network, so ingestion can be measured
+    reproducibly and without hitting Google Play. The same reviews are served for every app id.
+    """
+
+    def __init__(self, reviews, latency=0.0):
+        self.reviews = sorted((normalize_review(review) for review in reviews), key=lambda review: review['at'], reverse=True)
+        self.latency = latency
+        self.requests = 0
+
+    @classmethod
+    def from_file(cls, path, app_name=None, latency=0.0):
+        """
+        Loads recorded reviews from a JSONL or Parquet file, e.g. models_comparison/reviews.parquet.
+
+        Parameters:
+        path (str): Path of a .jsonl or .parquet file.
+        app_name (str, optional): Only replay records whose app_name matches.
+        latency (float): Seconds every page request takes.
+
+        Returns:
+        ReplaySource: Source serving the loaded reviews.
+        """
+        if str(path).endswith('.parquet'):
+            records = pd.read_parquet(path).to_dict('records')
+        else:
+            with open(path, encoding='utf-8') as file:
+                records = [json.loads(line) for line in file if line.strip()]
+        if app_name is not None:
+            records = [record for record in records if record.get('app_name') == app_name]
+        return cls(records, latency=latency)
+
+    def fetch_page(self, app_id, lang='en', country='us', count=PAGE_SIZE, continuation_token=None):
+        offset = 0
+        if continuation_token is not None:
+            if continuation_token.token is None:
+                return [], continuation_token
+            offset = int(continuation_token.token)
+
+        self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+        page = self.reviews[offset:offset + count]
+        next_offset = offset + len(page)
+        token = str(next_offset) if next_offset < len(self.reviews) else None
+        return [dict(review) for review in page], _ContinuationToken(token, lang, country, Sort.NEWEST.value, count, None, None)
+
+
+def write_jsonl_fixture(reviews, path):
+    """Writes reviews (scraper dicts or app_reviews rows as dicts) to a JSONL file readable by ReplaySource."""
+    with open(path, 'w', encoding='utf-8') as file:
+        for review in reviews:
+            file.write(json.dumps(review, default=lambda value: value.isoformat()) + '\n')
@@ -0,0 +1,216 @@
+import argparse
+import logging
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+
+from src.database_connection.db_utils import (
+    DB_PATH,
+    get_db_connection,
+    create_all_tables,
+    insert_review_rows,
+    record_fetched_range,
+    get_scrape_checkpoint,
+    save_scrape_checkpoint,
+    delete_scrape_checkpoint
+)
+from src.database_connection.connection_manager import DatabaseWriter
+from src.functions.scraper import iter_sync_pages, iter_range_batches, _to_datetime_bounds, PAGES_PER_TRANSACTION
+from src.functions.throttling import RateLimiter, FetchStats, REQUESTS_PER_SECOND
+
+logger = logging.getLogger(__name__)
+
+# Default number of (app, country, language) streams scraped at the same time
+MAX_WORKERS = 4
+
+# Jobs without a start and end date incrementally sync new reviews; jobs with both scrape that date range
+ScrapeJob = namedtuple(
+    'ScrapeJob',
+    ['app_name', 'app_id', 'country', 'language', 'start_date', 'end_date'],
+    defaults=['us', 'en', None, None]
+)
+ScrapeJobResult = namedtuple('ScrapeJobResult', ['job', 'new_reviews', 'completed', 'error', 'stats'])
+
+
+def _run_sync_job(job, db_path, writer, rate_limiter, stop_event):
+    """Incrementally syncs one (app, country, language) stream, sending all writes to the shared writer."""
+    # Reads go through a connection owned by this worker thread
+    conn = get_db_connection(db_path)
+    stats = FetchStats()
+    row_futures = []
+    last_page = None
+    completed = False
+    try:
+        pages = iter_sync_pages(conn, job.app_name, job.app_id, country=job.country, language=job.language, rate_limiter=rate_limiter, stats=stats)
+        try:
+            for last_page in pages:
+                row_futures.append(writer.submit(insert_review_rows, last_page.rows))
+                if stop_event.is_set():
+                    break
+            else:
+                completed = True
+        finally:
+            pages.close()
+
+        if completed and last_page is not None:
+            # Queued after the rows, so coverage is only recorded once they are written
+            writer.submit(
+                record_fetched_range, job.app_id, job.country, job.language, last_page.covered_from, last_page.covered_to
+            ).result()
+
+        new_reviews = sum(future.result() for future in row_futures)
+        return ScrapeJobResult(job, new_reviews, completed, None, stats.as_dict())
+    except Exception as e:
+        logger.error(f"Error syncing reviews for {job.app_name} ({job.country}/{job.language}): {e}")
+        return ScrapeJobResult(job, 0, False, e, stats.as_dict())
+    finally:
+        conn.close()
+
+
+def _save_range_checkpoint(conn, job, range_start, range_end, batch):
+    save_scrape_checkpoint(
+        conn, job.app_id, job.country, job.language, range_start, range_end,
+        batch.continuation_token, batch.oldest_fetched, batch.started_at
+    )
+
+
+def _run_range_job(job, db_path, writer, rate_limiter, stop_event):
+    """Scrapes the date range of one job, checkpointing through the shared writer so it can be resumed."""
+    conn = get_db_connection(db_path)
+    stats = FetchStats()
+    row_futures = []
+    pending_rows = []
+    pending_pages = 0
+    batch = None
+    completed = False
+
+    def flush():
+        # Queued in order, so a checkpoint is only saved after the rows it covers are written
+        row_futures.append(writer.submit(insert_review_rows, list(pending_rows)))
+        if batch.continuation_token is not None:
+            writer.submit(_save_range_checkpoint, job, range_start, range_end, batch)
+
+    try:
+        range_start, range_end = _to_datetime_bounds(job.start_date, job.end_date)
+        checkpoint = get_scrape_checkpoint(conn, job.app_id, job.country, job.language, range_start, range_end)
+        batches = iter_range_batches(
+            job.app_name, job.app_id, [(range_start, range_end)], country=job.country, language=job.language,
+            resume_from=checkpoint, rate_limiter=rate_limiter, stats=stats
+        )
+        try:
+            for batch in batches:
+                pending_rows.extend(batch.rows)
+                pending_pages += 1
+                if pending_pages >= PAGES_PER_TRANSACTION:
+                    flush()
+                    pending_rows = []
+                    pending_pages = 0
+                if stop_event.is_set():
+                    break
+            else:
+                completed = True
+        finally:
+            batches.close()
+            if pending_pages:
+                flush()
+
+        if completed:
+            started_at = batch.started_at if batch is not None else datetime.now()
+            writer.submit(delete_scrape_checkpoint, job.app_id, job.country, job.language, range_start, range_end)
+            writer.submit(
+                record_fetched_range, job.app_id, job.country, job.language, range_start, min(range_end, started_at)
+            ).result()
+
+        new_reviews = sum(future.result() for future in row_futures)
+        return ScrapeJobResult(job, new_reviews, completed, None, stats.as_dict())
+    except Exception as e:
+        logger.error(f"Error scraping reviews for {job.app_name} ({job.country}/{job.language}): {e}")
+        return ScrapeJobResult(job, 0, False, e, stats.as_dict())
+    finally:
+        conn.close()
+
+
+def _run_job(job, db_path, writer, rate_limiter, stop_event):
+    if job.start_date is not None and job.end_date is not None:
+        return _run_range_job(job, db_path, writer, rate_limiter, stop_event)
+    return _run_sync_job(job, db_path, writer, rate_limiter, stop_event)
+
+
+def run_scrape_jobs(jobs, db_path=DB_PATH, max_workers=MAX_WORKERS, requests_per_second=REQUESTS_PER_SECOND, stop_event=None):
+    """
+    Syncs or scrapes the date ranges of many (app, country, language) streams concurrently.
+
+    Streams run on a bounded thread pool and share one rate limiter, so total request volume stays at
+    requests_per_second no matter how many streams there are; the limiter slows down when Google Play
+    throttles any of them. All database writes go through a single DatabaseWriter thread. Each result
+    carries the request, retry and backoff counters of its stream.
+
+    Parameters:
+    jobs (list of ScrapeJob): Streams to sync.
+    db_path (str): Path of the SQLite database.
+    max_workers (int): Maximum number of streams scraped at the same time.
+    requests_per_second (float): Request rate shared by all streams.
+    stop_event (threading.Event, optional): Set it to stop all streams after their current page.
+
+    Returns:
+    list of ScrapeJobResult: One result per job, in the order of the jobs.
+    """
+    stop_event = stop_event or threading.Event()
+    rate_limiter = RateLimiter(requests_per_second)
+    writer = DatabaseWriter(db_path)
+    try:
+        writer.submit(create_all_tables).result()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(_run_job, job, db_path, writer, rate_limiter, stop_event)
+                for job in jobs
+            ]
+            return [future.result() for future in futures]
+    finally:
+        writer.close()
+
+
+def _parse_job(value, args):
+    """Parses an APP_NAME=APP_ID argument into a ScrapeJob using the shared command line options."""
+    app_name, separator, app_id = value.partition('=')
+    if not separator or not app_name or not app_id:
+        raise argparse.ArgumentTypeError(f"Expected APP_NAME=APP_ID, got '{value}'.")
+    return ScrapeJob(app_name, app_id, args.country, args.language, args.start_date, args.end_date)
+
+
+def main(argv=None):
+    """Command line entry point, e.g. for a cron job: python -m src.functions.scheduler "Spotify=com.spotify.music" """
+    parser = argparse.ArgumentParser(description="Download Google Play reviews into the SQLite database.")
+    parser.add_argument('apps', nargs='+', metavar='APP_NAME=APP_ID', help="Apps to download reviews for.")
+    parser.add_argument('--country', default='us', help="Country code used for scraping.")
+    parser.add_argument('--language', default='en', help="Language code used for scraping.")
+    parser.add_argument('--start-date', type=date.fromisoformat, help="Scrape this range instead of syncing new reviews.")
+    parser.add_argument('--end-date', type=date.fromisoformat, help="Last day of the range, defaults to today.")
+    parser.add_argument('--db-path', default=DB_PATH, help="Path of the SQLite database.")
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS, help="Streams scraped at the same time.")
+    parser.add_argument('--requests-per-second', type=float, default=REQUESTS_PER_SECOND, help="Shared request rate.")
+    args = parser.parse_args(argv)
+    if args.start_date is not None and args.end_date is None:
+        args.end_date = date.today()
+
+    try:
+        jobs = [_parse_job(value, args) for value in args.apps]
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    results = run_scrape_jobs(
+        jobs, db_path=args.db_path, max_workers=args.workers, requests_per_second=args.requests_per_second
+    )
+    for result in results:
+        if result.error is not None:
+            status = f"failed ({result.error})"
+        else:
+            status = "done" if result.completed else "stopped"
+        logger.info(f"{result.job.app_name} ({result.job.country}/{result.job.language}): {result.new_reviews} new reviews, {status}")
+    return 0 if all(result.error is None for result in results) else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -1,13 +1,86 @@
-import sqlite3
-import pandas as pd
-from google_play_scraper import Sort, reviews, search
+import logging
+import queue
+import threading
+import time
+from collections import namedtuple
+from google_play_scraper import Sort, search
+# fetch_review_page uses internals of google_play_scraper.reviews, which change between releases; the
+# version is pinned exactly in requirements.txt and pyproject.toml
+from google_play_scraper.constants.element import ElementSpecs
+from google_play_scraper.constants.request import Formats
+from google_play_scraper.features.reviews import _ContinuationToken, _fetch_review_items
 from datetime import datetime, timedelta
 import streamlit as st
 
+from src.functions.throttling import RateLimiter, FetchStats, RequestCancelled, call_with_retry
+from src.database_connection.connection_manager import run_write
+from src.database_connection.db_utils import (
+    insert_review_rows,
+    get_scrape_checkpoint,
+    save_scrape_checkpoint,
+    delete_scrape_checkpoint,
+    record_fetched_range,
+    get_fetched_ranges,
+    get_latest_review_time,
+    get_existing_review_ids,
+    to_epoch_seconds
+)
+
+logger = logging.getLogger(__name__)
+
+# Reviews requested from Google Play per page
+PAGE_SIZE = 200
+# Request rate of a single stream when no shared rate limiter is given
+STREAM_REQUESTS_PER_SECOND = 5.0
+# Pages the fetcher thread may get ahead of the database writer
+FETCH_QUEUE_SIZE = 4
+# Pages written to SQLite per transaction
+PAGES_PER_TRANSACTION = 5
+# How far back an incremental sync looks for an app with no stored reviews
+DEFAULT_SYNC_DAYS = 7
+# Seconds a search result is reused before the store is searched again
+SEARCH_CACHE_TTL = 3600
+# Maximum number of cached search results
+SEARCH_CACHE_SIZE = 128
+
+_search_cache = {}
+_search_cache_lock = threading.Lock()
+
+def search_apps(query, lang='en', country='us'):
+    """
+    Searches the store for apps, reusing results of the same (query, lang, country) for SEARCH_CACHE_TTL seconds.
+
+    Streamlit reruns the page on every widget interaction, so without the cache each click would search the
+    store again. Errors are not cached. Returns a new list of result dicts on every call.
+    """
+    key = (query.strip().casefold(), lang, country)
+    now = time.monotonic()
+    with _search_cache_lock:
+        entry = _search_cache.get(key)
+        if entry is not None and now - entry[0] < SEARCH_CACHE_TTL:
+            return [dict(app) for app in entry[1]]
+
+    search_results = search(query.strip(), n_hits=5, lang=lang, country=country)
+    if not isinstance(search_results, list):
+        return search_results
+    search_results = [app for app in search_results if app is not None]
+
+    with _search_cache_lock:
+        _search_cache[key] = (now, search_results)
+        if len(_search_cache) > SEARCH_CACHE_SIZE:
+            oldest_key = min(_search_cache, key=lambda cached_key: _search_cache[cached_key][0])
+            del _search_cache[oldest_key]
+    return [dict(app) for app in search_results]
+
+def clear_search_cache():
+    """Forgets all cached search results."""
+    with _search_cache_lock:
+        _search_cache.clear()
+
 def select_app(app_name):
     """Searches for apps matching the input name and returns a list of options."""
     try:
-        search_results = search(app_name, n_hits=5, lang='en', country='us')
+        search_results = search_apps(app_name, lang='en', country='us')
         
         if not isinstance(search_results, list):
             st.error(f"Unexpected response format when searching for '{app_name}'.")
@@ -28,128 +101,533 @@ def select_app(app_name):
         st.error(f"Error searching for app '{app_name}': {e}")
         return []
 
-def scrape_and_store_reviews(app_name, app_id, conn, progress_bar=None, progress_text=None, start_date=None, end_date=None, country='us', language='en'):
-    """Scrapes reviews and stores them in the SQLite database with a progress bar based on date range."""
-    cursor = conn.cursor()
-
+def _to_datetime_bounds(start_date, end_date):
+    """Converts a (start, end) pair of dates or datetimes into datetimes covering whole days for plain dates."""
     if not isinstance(start_date, datetime):
         start_date = datetime.combine(start_date, datetime.min.time())
     if not isinstance(end_date, datetime):
         end_date = datetime.combine(end_date, datetime.max.time())
+    return start_date, end_date
 
-    if not start_date:
-        start_date = datetime.now() - timedelta(days=7)
-    if not end_date:
-        end_date = datetime.now()
+def review_to_row(review, app_name, app_id, country, language):
+    """Converts a raw scraper review into a row tuple matching the app_reviews insert order."""
+    return (
+        review['reviewId'],
+        review.get('userName'),
+        review.get('userImage'),
+        review.get('content'),
+        review.get('score'),
+        review.get('thumbsUpCount'),
+        review.get('reviewCreatedVersion'),
+        to_epoch_seconds(review['at'].date()),
+        review.get('replyContent'),
+        to_epoch_seconds(review.get('repliedAt')),
+        review.get('appVersion'),
+        app_name,
+        app_id,
+        country,
+        language
+    )
+
+def fetch_review_page(app_id, lang='en', country='us', count=PAGE_SIZE, continuation_token=None):
+    """
+    Fetches one page of the newest-first review feed.
+
+    Works like google_play_scraper.reviews for a single page, but request errors propagate instead of
+    producing a silently truncated page, so a failed or throttled request can be told apart from the end
+    of the feed. Returns (reviews, continuation_token); the token's value is None after the last page.
+    """
+    token = None
+    if continuation_token is not None:
+        token = continuation_token.token
+        if token is None:
+            return [], continuation_token
+
+    url = Formats.Reviews.build(lang=lang, country=country)
+    review_items, token = _fetch_review_items(url, app_id, Sort.NEWEST.value, count, None, None, token)
+    if isinstance(token, list):
+        token = None
+
+    page = [
+        {key: spec.extract_content(item) for key, spec in ElementSpecs.Review.items()}
+        for item in review_items
+    ]
+    return page, _ContinuationToken(token, lang, country, Sort.NEWEST.value, count, None, None)
+
+class _FetchError:
+    """Wraps an exception raised in the fetcher thread so it can be re-raised by the consumer."""
+
+    def __init__(self, error):
+        self.error = error
+
+_END_OF_FEED = object()
+
+def _fetch_pages(app_id, country, language, page_queue, stop_event, continuation_token, rate_limiter, retry_policy, stats, source):
+    """Fetcher thread body: pages through the newest-first feed and puts raw pages on the queue."""
+
+    def put(item):
+        # Retry with a timeout so the thread notices when the consumer has gone away
+        while not stop_event.is_set():
+            try:
+                page_queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def request():
+        fetch_page = source.fetch_page if source is not None else fetch_review_page
+        return fetch_page(
+            app_id,
+            lang=language,
+            country=country,
+            count=PAGE_SIZE,
+            continuation_token=continuation_token
+        )
+
+    try:
+        while not stop_event.is_set():
+            new_reviews, continuation_token = call_with_retry(
+                request, policy=retry_policy, stats=stats, rate_limiter=rate_limiter, stop_event=stop_event
+            )
+            if not new_reviews:
+                break
+            if not put((new_reviews, continuation_token)):
+                return
+            if getattr(continuation_token, 'token', None) is None:
+                break
+    except Exception as e:
+        put(_FetchError(e))
+        return
+    put(_END_OF_FEED)
+
+def iter_review_pages(app_id, country='us', language='en', continuation_token=None, queue_size=FETCH_QUEUE_SIZE,
+                      rate_limiter=None, retry_policy=None, stats=None, source=None):
+    """
+    Yields (reviews, continuation_token) pages of the newest-first review feed.
+
+    Pages are fetched by a background thread into a bounded queue, so the network requests for the next
+    pages overlap with whatever the consumer does with the current one. Closing the generator (e.g. by
+    breaking out of the loop) stops the fetcher thread. Exceptions raised while fetching are re-raised
+    in the consumer once retries are exhausted.
+
+    Failed requests are retried with exponential backoff and jitter according to retry_policy, and throttling
+    responses slow rate_limiter down. Pass a limiter shared between streams to bound their total request rate,
+    and a FetchStats to collect retry and backoff counters.
+
+    Pages are read from source (see src.functions.review_sources) when given, otherwise from Google Play.
+    Without a shared limiter, a stream is limited to the request rate of its source.
+    """
+    if rate_limiter is None:
+        requests_per_second = source.requests_per_second if source is not None else STREAM_REQUESTS_PER_SECOND
+        if requests_per_second:
+            rate_limiter = RateLimiter(requests_per_second)
+    page_queue = queue.Queue(maxsize=queue_size)
+    stop_event = threading.Event()
+    fetcher = threading.Thread(
+        target=_fetch_pages,
+        args=(app_id, country, language, page_queue, stop_event, continuation_token, rate_limiter, retry_policy, stats, source),
+        daemon=True
+    )
+    fetcher.start()
+    try:
+        while True:
+            item = page_queue.get()
+            if item is _END_OF_FEED:
+                break
+            if isinstance(item, _FetchError):
+                raise item.error
+            yield item
+    finally:
+        stop_event.set()
+
+def _retry_summary(stats):
+    """Formats retry counters for progress messages, or an empty string when nothing was retried."""
+    counters = stats.as_dict()
+    if not counters['retries']:
+        return ""
+    return f" (retries: {counters['retries']}, throttled: {counters['throttled']}, backoff: {counters['backoff_seconds']:.0f}s)"
+
+def split_reviews_by_range(new_reviews, date_ranges):
+    """
+    Assigns each review of a page to every date range it falls into.
+
+    Parameters:
+    new_reviews (list of dict): Reviews returned by the scraper, each with an 'at' datetime.
+    date_ranges (list of tuples): List of (start_datetime, end_datetime) ranges.
+
+    Returns:
+    list of lists: For every range, the reviews from the page that fall inside it.
+    """
+    reviews_per_range = [[] for _ in date_ranges]
+    for review in new_reviews:
+        for index, (range_start, range_end) in enumerate(date_ranges):
+            if range_start <= review['at'] <= range_end:
+                reviews_per_range[index].append(review)
+    return reviews_per_range
+
+ScrapeBatch = namedtuple(
+    'ScrapeBatch',
+    ['rows', 'counts_per_range', 'continuation_token', 'oldest_fetched', 'started_at', 'reviews_fetched', 'progress']
+)
+
+def iter_range_batches(app_name, app_id, date_ranges, country='us', language='en', resume_from=None,
+                       rate_limiter=None, retry_policy=None, stats=None, source=None):
+    """
+    Yields a ScrapeBatch for every page of the feed read while scraping several date ranges in one pass.
+
+    Each page is fetched once and its reviews are kept for every range they overlap, stored once as row
+    tuples matching the app_reviews insert order. Paging stops as soon as the feed is older than the oldest
+    range, so the cost is proportional to the number of pages up to the oldest gap rather than to the number
+    of gaps.
+
+    The generator neither touches the database nor Streamlit: the caller decides how rows are written, when
+    the continuation_token and oldest_fetched of a batch are checkpointed and when to stop. It ends normally
+    once every range has been paged through; fetch errors are raised to the caller, except on the first page
+    read from resume_from, where a token that is no longer accepted starts a fresh pass instead.
+
+    Parameters:
+    app_name (str): The name of the application.
+    app_id (str): The Google Play ID of the application.
+    date_ranges (list of tuples): List of (start_date, end_date) ranges to fetch.
+    country (str): Country code used for scraping.
+    language (str): Language code used for scraping.
+    resume_from (tuple, optional): (continuation_token, oldest_fetched, started_at) of an interrupted pass.
+    rate_limiter (RateLimiter, optional): Limiter shared with other streams.
+    retry_policy (RetryPolicy, optional): Retry limits and delays.
+    stats (FetchStats, optional): Collects request, retry and backoff counters.
+    source (ReviewSource, optional): Where pages are read from, Google Play by default.
+
+    Yields:
+    ScrapeBatch: The new rows of a page, the number of reviews per range, the checkpoint data and the progress.
+    """
+    date_ranges = [_to_datetime_bounds(start, end) for start, end in date_ranges]
+    if not date_ranges:
+        return
+
+    oldest_start = min(range_start for range_start, _ in date_ranges)
+    newest_end = max(range_end for _, range_end in date_ranges)
+    total_seconds = sum((range_end - range_start).total_seconds() for range_start, range_end in date_ranges) or 1
+
+    resume_token = None
+    oldest_review_date_fetched = newest_end
+    started_at = datetime.now()
+    if resume_from is not None:
+        token_value, oldest_review_date_fetched, checkpoint_started_at = resume_from
+        resume_token = _ContinuationToken(token_value, language, country, Sort.NEWEST.value, PAGE_SIZE, None, None)
+        started_at = checkpoint_started_at or oldest_review_date_fetched
+
+    def open_pages(continuation_token):
+        return iter_review_pages(
+            app_id, country=country, language=language, continuation_token=continuation_token,
+            rate_limiter=rate_limiter, retry_policy=retry_policy, stats=stats, source=source
+        )
 
     total_reviews_fetched = 0
-    continuation_token = None
+    pages_read = 0
+    pages = open_pages(resume_token)
+    try:
+        while True:
+            resuming = resume_token is not None and pages_read == 0
+            try:
+                new_reviews, last_token = next(pages)
+            except StopIteration:
+                if not resuming:
+                    return
+                new_reviews = None
+            except RequestCancelled:
+                raise
+            except Exception as e:
+                if not resuming:
+                    raise
+                logger.warning(f"Resuming {app_id} from its checkpoint failed ({e}); starting from the newest review.")
+                new_reviews = None
+            if new_reviews is None:
+                # The saved token is no longer accepted; start again from the newest review
+                pages.close()
+                resume_token = None
+                oldest_review_date_fetched = newest_end
+                started_at = datetime.now()
+                pages = open_pages(None)
+                continue
+            pages_read += 1
 
-    total_seconds = (end_date - start_date).total_seconds() or 1
+            oldest_review_date_fetched = min(oldest_review_date_fetched, new_reviews[-1]['at'])
 
-    oldest_review_date_fetched = end_date
+            reviews_per_range = split_reviews_by_range(new_reviews, date_ranges)
 
-    while True:
-        if st.session_state.get('stop_download'):
-            st.warning("Download stopped by user.")
-            break
-
-        try:
-            new_reviews, continuation_token = reviews(
-                app_id,
-                lang=language,
-                country=country,
-                sort=Sort.NEWEST,
-                count=200,
-                continuation_token=continuation_token
+            # A review can overlap several ranges but is stored only once
+            rows = []
+            seen_ids = set()
+            for range_reviews in reviews_per_range:
+                for review in range_reviews:
+                    if review['reviewId'] not in seen_ids:
+                        seen_ids.add(review['reviewId'])
+                        rows.append(review_to_row(review, app_name, app_id, country, language))
+            total_reviews_fetched += len(rows)
+
+            covered_seconds = sum(
+                max((range_end - max(oldest_review_date_fetched, range_start)).total_seconds(), 0)
+                for range_start, range_end in date_ranges
             )
-        except Exception as e:
-            st.error(f"Error fetching reviews for {app_name}: {e}")
-            break
+            yield ScrapeBatch(
+                rows=rows,
+                counts_per_range=[len(range_reviews) for range_reviews in reviews_per_range],
+                continuation_token=getattr(last_token, 'token', None),
+                oldest_fetched=oldest_review_date_fetched,
+                started_at=started_at,
+                reviews_fetched=total_reviews_fetched,
+                progress=min(max(covered_seconds / total_seconds, 0), 1)
+            )
+
+            # The feed is sorted newest first, so nothing older than the oldest range is needed
+            if oldest_review_date_fetched <= oldest_start:
+                return
+    finally:
+        pages.close()
+
+def scrape_missing_ranges(app_name, app_id, conn, date_ranges, progress_bar=None, progress_text=None, country='us', language='en', stats=None, source=None, writer=None):
+    """
+    Scrapes reviews for several date ranges in a single newest-to-oldest pass and stores them in SQLite.
+
+    This is the Streamlit consumer of iter_range_batches: rows are written several pages per transaction,
+    the continuation token is checkpointed after every committed batch, and progress is shown on the
+    optional progress bar. A download that is stopped or interrupted resumes from the last stored page the
+    next time the same ranges are requested. Once the pass completes, the ranges are recorded in the
+    coverage ledger so they are not scraped again.
+
+    Parameters:
+    app_name (str): The name of the application.
+    app_id (str): The Google Play ID of the application.
+    conn: Database connection object.
+    date_ranges (list of tuples): List of (start_date, end_date) ranges to fetch.
+    progress_bar: Optional Streamlit progress bar.
+    progress_text: Optional Streamlit placeholder for progress messages.
+    country (str): Country code used for scraping.
+    language (str): Language code used for scraping.
+    stats (FetchStats, optional): Collects request, retry and backoff counters.
+    source (ReviewSource, optional): Where pages are read from, Google Play by default.
+    writer (DatabaseWriter, optional): Writer thread running the writes; conn only reads when it is given.
+
+    Returns:
+    list of int: Number of reviews fetched for each range.
+    """
+    date_ranges = [_to_datetime_bounds(start, end) for start, end in date_ranges]
+    fetched_per_range = [0] * len(date_ranges)
+    if not date_ranges:
+        return fetched_per_range
+    stats = stats or FetchStats()
+
+    oldest_start = min(range_start for range_start, _ in date_ranges)
+    newest_end = max(range_end for _, range_end in date_ranges)
 
-        if not new_reviews:
-            break
+    total_reviews_fetched = 0
+    pending_rows = []
+    pending_pages = 0
+    batch = None
+    finished = False
 
-        new_reviews_in_range = [review for review in new_reviews if start_date <= review['at'] <= end_date]
+    def flush():
+        # The checkpoint is saved only after the rows it covers have been committed
+        run_write(conn, writer, insert_review_rows, pending_rows)
+        if batch.continuation_token is not None:
+            run_write(
+                conn, writer, save_scrape_checkpoint, app_id, country, language, oldest_start, newest_end,
+                batch.continuation_token, batch.oldest_fetched, batch.started_at
+            )
 
-        if not new_reviews_in_range:
-            if new_reviews and new_reviews[-1]['at'] < start_date:
+    # Resume from where an interrupted download of the same target stopped
+    checkpoint = get_scrape_checkpoint(conn, app_id, country, language, oldest_start, newest_end)
+    batches = iter_range_batches(
+        app_name, app_id, date_ranges, country=country, language=language, resume_from=checkpoint, stats=stats,
+        source=source
+    )
+    try:
+        while True:
+            if st.session_state.get('stop_download'):
+                st.warning("Download stopped by user.")
                 break
-            elif not new_reviews:
+
+            try:
+                batch = next(batches)
+            except StopIteration:
+                finished = True
+                break
+            except Exception as e:
+                st.error(f"Error fetching reviews for {app_name}: {e}")
                 break
-            else:
-                continue
 
-        total_reviews_fetched += len(new_reviews_in_range)
-
-        oldest_review_date_in_batch = new_reviews_in_range[-1]['at']
-        if oldest_review_date_in_batch < oldest_review_date_fetched:
-            oldest_review_date_fetched = oldest_review_date_in_batch
-
-        elapsed_seconds = (end_date - oldest_review_date_fetched).total_seconds()
-        progress = min(max(elapsed_seconds / total_seconds, 0), 1)
-
-        if progress_bar is not None and progress_text is not None:
-            progress_bar.progress(progress)
-            progress_text.write(f"**{app_name}: Fetched {total_reviews_fetched} reviews so far...** Progress: {progress*100:.2f}%")
-
-        reviews_df = pd.DataFrame(new_reviews_in_range)
-        reviews_df['app_name'] = app_name
-        reviews_df['country'] = country
-        reviews_df['language'] = language
-
-        reviews_df = reviews_df.replace({pd.NaT: None})
-        reviews_df = reviews_df.where(pd.notnull(reviews_df), None)
-
-        reviews_df['at'] = pd.to_datetime(reviews_df['at']).dt.date
-
-        datetime_fields = ['at', 'repliedAt']
-        for field in datetime_fields:
-            if field in reviews_df.columns:
-                reviews_df[field] = reviews_df[field].apply(lambda x: x.isoformat() if x is not None else None)
-
-        # Prepare the SQL statement
-        insert_query = '''
-            INSERT INTO app_reviews (
-                review_id, user_name, user_image, content, score, thumbs_up_count,
-                review_created_version, at, reply_content, replied_at, app_version,
-                app_name, country, language
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ON CONFLICT(review_id) DO NOTHING;
-        '''
-
-        # Insert reviews into the database
-        for _, row in reviews_df.iterrows():
-            cursor.execute(insert_query, (
-                row['reviewId'],
-                row['userName'],
-                row['userImage'],
-                row['content'],
-                row['score'],
-                row['thumbsUpCount'],
-                row.get('reviewCreatedVersion', None),
-                row['at'],
-                row.get('replyContent', None),
-                row.get('repliedAt', None),
-                row.get('appVersion', None),
-                app_name,
-                country,
-                language
-            ))
-        conn.commit()
-
-        # Check if the oldest review fetched is older than the start_date
-        if oldest_review_date_fetched <= start_date:
-            break
-
-        if continuation_token is None:
-            break
-
-    cursor.close()
-    
+            for index, count in enumerate(batch.counts_per_range):
+                fetched_per_range[index] += count
+            total_reviews_fetched = batch.reviews_fetched
+            pending_rows.extend(batch.rows)
+            pending_pages += 1
+
+            if pending_pages >= PAGES_PER_TRANSACTION:
+                flush()
+                pending_rows = []
+                pending_pages = 0
+
+            if progress_bar is not None and progress_text is not None:
+                progress_bar.progress(batch.progress)
+                progress_text.write(f"**{app_name}: Fetched {total_reviews_fetched} reviews so far...** Progress: {batch.progress*100:.2f}%{_retry_summary(stats)}")
+    finally:
+        batches.close()
+        if pending_pages:
+            flush()
+
+    if finished:
+        run_write(conn, writer, delete_scrape_checkpoint, app_id, country, language, oldest_start, newest_end)
+        # Reviews posted after the first page was requested have not been seen yet
+        started_at = batch.started_at if batch is not None else datetime.now()
+        for range_start, range_end in date_ranges:
+            run_write(conn, writer, record_fetched_range, app_id, country, language, range_start, min(range_end, started_at))
+
     if progress_bar is not None and progress_text is not None:
         progress_bar.progress(1.0)
         if st.session_state.get('stop_download'):
             progress_text.write(f"**Download stopped. Total reviews fetched: {total_reviews_fetched}.**")
         else:
-            progress_text.write(f"**Finished downloading reviews for {app_name}. Total reviews fetched: {total_reviews_fetched}.**")
\ No newline at end of file
+            progress_text.write(f"**Finished downloading reviews for {app_name}. Total reviews fetched: {total_reviews_fetched}.**")
+
+    return fetched_per_range
+
+def scrape_and_store_reviews(app_name, app_id, conn, progress_bar=None, progress_text=None, start_date=None, end_date=None, country='us', language='en', source=None):
+    """Scrapes reviews and stores them in the SQLite database with a progress bar based on date range."""
+    if not start_date:
+        start_date = datetime.now() - timedelta(days=7)
+    if not end_date:
+        end_date = datetime.now()
+
+    fetched_per_range = scrape_missing_ranges(
+        app_name,
+        app_id,
+        conn,
+        [(start_date, end_date)],
+        progress_bar=progress_bar,
+        progress_text=progress_text,
+        country=country,
+        language=language,
+        source=source
+    )
+    return fetched_per_range[0]
+
+def get_sync_high_water_mark(conn, app_id, country='us', language='en'):
+    """
+    Returns the time up to which an app's reviews are known to be stored.
+
+    This is the end of the newest fetched interval in the coverage ledger, or the start of the day of the
+    newest stored review when the ledger knows nothing newer. Returns None if nothing is stored.
+    """
+    candidates = []
+    fetched_ranges = get_fetched_ranges(conn, app_id, country, language)
+    if fetched_ranges:
+        candidates.append(fetched_ranges[-1][1])
+    latest_review_time = get_latest_review_time(conn, app_id, country, language)
+    if latest_review_time is not None:
+        # Stored review times are truncated to the day
+        candidates.append(datetime.combine(latest_review_time.date(), datetime.min.time()))
+    return max(candidates) if candidates else None
+
+SyncPage = namedtuple('SyncPage', ['rows', 'covered_from', 'covered_to', 'progress'])
+
+def iter_sync_pages(conn, app_name, app_id, country='us', language='en', rate_limiter=None, stats=None, source=None):
+    """
+    Yields a SyncPage for every page of the feed that still contains reviews newer than the high-water mark.
+
+    Each SyncPage holds the row tuples of reviews that are not stored yet, plus the interval of the feed that
+    has been paged through so far (covered_from, covered_to) and the sync progress between 0 and 1. The
+    generator only reads from the database; the caller decides how rows are written. It ends normally once it
+    has caught up with the stored reviews, at which point the last covered interval is complete. Fetch errors
+    are raised to the caller.
+    """
+    high_water_mark = get_sync_high_water_mark(conn, app_id, country, language)
+    if high_water_mark is None:
+        high_water_mark = datetime.now() - timedelta(days=DEFAULT_SYNC_DAYS)
+
+    started_at = datetime.now()
+    oldest_review_date_fetched = started_at
+    total_seconds = (started_at - high_water_mark).total_seconds() or 1
+
+    pages = iter_review_pages(app_id, country=country, language=language, rate_limiter=rate_limiter, stats=stats, source=source)
+    try:
+        for new_reviews, _ in pages:
+            oldest_review_date_fetched = min(oldest_review_date_fetched, new_reviews[-1]['at'])
+
+            candidates = [review for review in new_reviews if review['at'] >= high_water_mark]
+            existing_ids = get_existing_review_ids(conn, [review['reviewId'] for review in candidates])
+            unseen_reviews = [review for review in candidates if review['reviewId'] not in existing_ids]
+
+            elapsed_seconds = (started_at - max(oldest_review_date_fetched, high_water_mark)).total_seconds()
+            yield SyncPage(
+                rows=[review_to_row(review, app_name, app_id, country, language) for review in unseen_reviews],
+                covered_from=oldest_review_date_fetched,
+                covered_to=started_at,
+                progress=min(max(elapsed_seconds / total_seconds, 0), 1)
+            )
+
+            if not unseen_reviews or new_reviews[-1]['at'] < high_water_mark:
+                return
+    finally:
+        pages.close()
+
+def sync_new_reviews(app_name, app_id, conn, progress_bar=None, progress_text=None, country='us', language='en', stats=None, source=None, writer=None):
+    """
+    Fetches only the reviews posted since the last download of an app.
+
+    The feed is paged newest first and paging stops at the first page whose reviews are all either already
+    stored or older than the high-water mark, so a daily refresh usually costs one or two pages.
+
+    Parameters:
+    app_name (str): The name of the application.
+    app_id (str): The Google Play ID of the application.
+    conn: Database connection object.
+    progress_bar: Optional Streamlit progress bar.
+    progress_text: Optional Streamlit placeholder for progress messages.
+    country (str): Country code used for scraping.
+    language (str): Language code used for scraping.
+    stats (FetchStats, optional): Collects request, retry and backoff counters.
+    source (ReviewSource, optional): Where pages are read from, Google Play by default.
+    writer (DatabaseWriter, optional): Writer thread running the writes; conn only reads when it is given.
+
+    Returns:
+    int: Number of new reviews stored.
+    """
+    stats = stats or FetchStats()
+    total_new_reviews = 0
+    caught_up = False
+    last_page = None
+
+    pages = iter_sync_pages(conn, app_name, app_id, country=country, language=language, stats=stats, source=source)
+    try:
+        while True:
+            if st.session_state.get('stop_download'):
+                st.warning("Download stopped by user.")
+                break
+
+            try:
+                last_page = next(pages)
+            except StopIteration:
+                caught_up = True
+                break
+            except Exception as e:
+                st.error(f"Error fetching reviews for {app_name}: {e}")
+                break
+
+            total_new_reviews += run_write(conn, writer, insert_review_rows, last_page.rows)
+
+            if progress_bar is not None and progress_text is not None:
+                progress_bar.progress(last_page.progress)
+                progress_text.write(f"**{app_name}: Synced {total_new_reviews} new reviews so far...**{_retry_summary(stats)}")
+    finally:
+        pages.close()
+
+    if caught_up and last_page is not None:
+        # Everything between the oldest review seen and the start of the sync has now been paged through
+        run_write(conn, writer, record_fetched_range, app_id, country, language, last_page.covered_from, last_page.covered_to)
+
+    if progress_bar is not None and progress_text is not None:
+        progress_bar.progress(1.0)
+        progress_text.write(f"**Finished syncing {app_name}. New reviews stored: {total_new_reviews}.**")
+
+    return total_new_reviews
@@ -0,0 +1,183 @@
+import logging
+import random
+import re
+import threading
+import time
+from collections import namedtuple
+from urllib.error import HTTPError
+
+from google_play_scraper.exceptions import NotFoundError
+
+logger = logging.getLogger(__name__)
+
+# Default number of requests per second sent to Google Play across all streams
+REQUESTS_PER_SECOND = 2.0
+# The rate is never slowed below this many requests per second
+MIN_REQUESTS_PER_SECOND = 0.05
+
+RetryPolicy = namedtuple(
+    'RetryPolicy',
+    ['max_retries', 'base_delay', 'max_delay', 'throttle_delay'],
+    defaults=[5, 1.0, 60.0, 10.0]
+)
+
+# Substrings of errors Google Play returns when it is rate limiting us
+THROTTLING_MARKERS = ('PlayGatewayError', 'Too Many Requests')
+# HTTP statuses of rate limiting responses
+THROTTLING_STATUS_CODES = (429, 503)
+# google_play_scraper reports HTTP errors other than 404 as "... Status code 429 returned."
+STATUS_CODE_PATTERN = re.compile(r'\bStatus code (\d{3})\b')
+
+
+class RequestCancelled(Exception):
+    """Raised by call_with_retry when the stop event is set before a request is sent."""
+
+
+def http_status(error):
+    """Returns the HTTP status of a failed request, or None if the error does not carry one."""
+    if isinstance(error, HTTPError):
+        return error.code
+    match = STATUS_CODE_PATTERN.search(str(error))
+    return int(match.group(1)) if match else None
+
+
+def is_throttling_error(error):
+    """Returns True if an exception looks like Google Play throttling the client."""
+    if http_status(error) in THROTTLING_STATUS_CODES:
+        return True
+    message = str(error)
+    return any(marker in message for marker in THROTTLING_MARKERS)
+
+
+def is_retryable_error(error):
+    """Returns False for errors that will not go away by retrying, such as an unknown app id."""
+    return not isinstance(error, NotFoundError)
+
+
+class RateLimiter:
+    """
+    Thread-safe limiter that spaces requests evenly at an adaptive rate.
+
+    Every call to acquire() reserves the next free time slot and sleeps until it arrives, so any number of
+    threads sharing one limiter never exceed the current rate in total. slow_down() is called when Google Play
+    throttles us and speed_up() after successful requests, which recovers the rate up to its initial value.
+    """
+
+    def __init__(self, requests_per_second=REQUESTS_PER_SECOND, min_requests_per_second=MIN_REQUESTS_PER_SECOND):
+        if requests_per_second <= 0:
+            raise ValueError("requests_per_second must be positive.")
+        self.max_requests_per_second = requests_per_second
+        self.min_requests_per_second = min(min_requests_per_second, requests_per_second)
+        self.requests_per_second = requests_per_second
+        self._next_slot = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Blocks until the caller may send its next request."""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + 1.0 / self.requests_per_second
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+    def slow_down(self, factor=0.5):
+        """Multiplies the rate by factor, not going below the minimum rate."""
+        with self._lock:
+            self.requests_per_second = max(self.requests_per_second * factor, self.min_requests_per_second)
+
+    def speed_up(self, factor=1.1):
+        """Multiplies the rate by factor, not going above the initial rate."""
+        with self._lock:
+            self.requests_per_second = min(self.requests_per_second * factor, self.max_requests_per_second)
+
+
+class FetchStats:
+    """Thread-safe counters of requests, retries, throttling responses and time spent backing off."""
+
+    def __init__(self):
+        self.requests = 0
+        self.retries = 0
+        self.throttled = 0
+        self.backoff_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def record_retry(self, delay, throttled):
+        with self._lock:
+            self.retries += 1
+            self.backoff_seconds += delay
+            if throttled:
+                self.throttled += 1
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'retries': self.retries,
+                'throttled': self.throttled,
+                'backoff_seconds': self.backoff_seconds
+            }
+
+
+def backoff_delay(attempt, policy, throttled):
+    """Exponential backoff with full jitter; throttling responses wait at least policy.throttle_delay."""
+    delay = random.uniform(0, min(policy.max_delay, policy.base_delay * 2 ** attempt))
+    if throttled:
+        delay = max(delay, min(policy.throttle_delay * 2 ** attempt, policy.max_delay))
+    return delay
+
+
+def call_with_retry(request, policy=None, stats=None, rate_limiter=None, stop_event=None):
+    """
+    Calls request() until it succeeds, retrying transient failures with exponential backoff and jitter.
+
+    Throttling responses also slow the shared rate limiter down, and successful calls speed it back up.
+    Waiting is interrupted as soon as stop_event is set, in which case the last error is raised. If the
+    event is already set when a request is due, RequestCancelled is raised without sending it.
+
+    Parameters:
+    request (callable): Function sending one request.
+    policy (RetryPolicy, optional): Retry limits and delays.
+    stats (FetchStats, optional): Counters updated with every request and retry.
+    rate_limiter (RateLimiter, optional): Limiter acquired before every attempt.
+    stop_event (threading.Event, optional): Event that aborts the retries.
+
+    Returns:
+    The return value of request().
+    """
+    policy = policy or RetryPolicy()
+    attempt = 0
+    while True:
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+        if stop_event is not None and stop_event.is_set():
+            raise RequestCancelled("Stopped before sending the request.")
+        if stats is not None:
+            stats.record_request()
+        try:
+            result = request()
+        except Exception as e:
+            if not is_retryable_error(e) or attempt >= policy.max_retries:
+                raise
+            throttled = is_throttling_error(e)
+            if throttled and rate_limiter is not None:
+                rate_limiter.slow_down()
+            delay = backoff_delay(attempt, policy, throttled)
+            if stats is not None:
+                stats.record_retry(delay, throttled)
+            logger.warning(f"Request failed ({e}); retry {attempt + 1}/{policy.max_retries} in {delay:.1f}s.")
+            if stop_event is not None:
+                if stop_event.wait(delay):
+                    raise
+            else:
+                time.sleep(delay)
+            attempt += 1
+            continue
+        if rate_limiter is not None:
+            rate_limiter.speed_up()
+        return result
@@ -0,0 +1,123 @@
+import argparse
+import json
+import time
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from src.models import distilbert_model, roberta_model
+from src.models.backends import BACKENDS
+
+BackendResult = namedtuple(
+    'BackendResult',
+    ['model', 'backend', 'texts', 'seconds', 'texts_per_second', 'label_agreement', 'max_probability_difference']
+)
+
+# Single-text and batch functions and result column prefix of every transformer model
+MODEL_FUNCTIONS = {
+    'DistilBERT': (distilbert_model.analyze_sentiment_distilbert, distilbert_model.analyze_sentiment_distilbert_batch, 'distilbert'),
+    'RoBERTa': (roberta_model.analyze_sentiment_roberta, roberta_model.analyze_sentiment_roberta_batch, 'roberta'),
+}
+
+
+def load_texts(path, limit=None):
+    """Reads the review contents of a JSONL or Parquet fixture, e.g. models_comparison/reviews.parquet."""
+    if str(path).endswith('.parquet'):
+        contents = pd.read_parquet(path, columns=['content'])['content']
+    else:
+        with open(path, encoding='utf-8') as file:
+            contents = pd.Series([json.loads(line).get('content') for line in file if line.strip()])
+    texts = [text for text in contents.dropna().tolist() if text]
+    return texts[:limit] if limit else texts
+
+def compare_results(reference, candidate, prefix):
+    """
+    Compares the sentiment results of two runs over the same texts.
+
+    Returns:
+    tuple: Share of texts with the same label, and the largest difference of any probability.
+    """
+    label_column = f'{prefix}_sentiment_label'
+    if reference.empty:
+        return 1.0, 0.0
+    label_agreement = float(np.mean(reference[label_column].to_numpy() == candidate[label_column].to_numpy()))
+    probability_columns = [column for column in reference.columns if column != label_column]
+    differences = np.abs(
+        reference[probability_columns].astype(float).to_numpy() - candidate[probability_columns].astype(float).to_numpy()
+    )
+    max_difference = float(np.nanmax(differences)) if not np.isnan(differences).all() else 0.0
+    return label_agreement, max_difference
+
+def _use_backend(model_name, backend):
+    # The module-level model names take precedence over the model registry
+    if model_name == 'DistilBERT':
+        distilbert_model.tokenizer, distilbert_model.model = distilbert_model.load_model(backend)
+    else:
+        roberta_model.classifier = roberta_model.load_classifier(backend)
+
+def _reset_models():
+    distilbert_model.tokenizer = distilbert_model.model = None
+    roberta_model.classifier = None
+
+def run_backend_benchmark(model_name, texts, backends=BACKENDS):
+    """
+    Times a model's backends on texts and checks their results against the current single-text function.
+
+    The reference is analyze_sentiment_<model> run one text at a time with the PyTorch model, as the app did
+    before batching; every backend then runs analyze_sentiment_<model>_batch over the same texts.
+
+    Parameters:
+    model_name (str): 'DistilBERT' or 'RoBERTa'.
+    texts (list of str): Review contents to analyze.
+    backends (tuple of str): Backends to compare.
+
+    Returns:
+    list of BackendResult: The reference run first, then one result per backend.
+    """
+    single_function, batch_function, prefix = MODEL_FUNCTIONS[model_name]
+
+    def timed(function):
+        start = time.perf_counter()
+        output = function()
+        seconds = time.perf_counter() - start
+        return output, seconds, len(texts) / seconds if seconds else 0.0
+
+    try:
+        _use_backend(model_name, 'torch')
+        reference, seconds, texts_per_second = timed(lambda: pd.DataFrame([single_function(text) for text in texts]))
+        results = [BackendResult(model_name, 'torch, one text per call', len(texts), seconds, texts_per_second, 1.0, 0.0)]
+        for backend in backends:
+            _use_backend(model_name, backend)
+            output, seconds, texts_per_second = timed(lambda: batch_function(texts))
+            label_agreement, max_difference = compare_results(reference, output, prefix)
+            results.append(BackendResult(
+                model_name, backend, len(texts), seconds, texts_per_second, label_agreement, max_difference
+            ))
+    finally:
+        _reset_models()
+    return results
+
+
+def main(argv=None):
+    """Command line entry point: python -m src.models.backend_benchmark models_comparison/reviews.parquet"""
+    parser = argparse.ArgumentParser(description="Compare the accuracy and throughput of the model backends.")
+    parser.add_argument('fixture', help="JSONL or Parquet file with review contents.")
+    parser.add_argument('--model', choices=list(MODEL_FUNCTIONS), action='append', help="Model to compare, all by default.")
+    parser.add_argument('--backend', choices=BACKENDS, action='append', help="Backend to compare, all by default.")
+    parser.add_argument('--limit', type=int, default=500, help="Reviews analyzed per model.")
+    args = parser.parse_args(argv)
+
+    texts = load_texts(args.fixture, args.limit)
+    for model_name in args.model or list(MODEL_FUNCTIONS):
+        for result in run_backend_benchmark(model_name, texts, tuple(args.backend or BACKENDS)):
+            print(
+                f"{result.model} [{result.backend}]: {result.texts} texts in {result.seconds:.2f}s "
+                f"({result.texts_per_second:.1f} texts/s), labels agree: {result.label_agreement:.1%}, "
+                f"max probability difference: {result.max_probability_difference:.4f}"
+            )
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,113 @@
+import logging
+import os
+import re
+
+import torch
+from transformers import AutoConfig
+from transformers.modeling_outputs import SequenceClassifierOutput
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Ways a transformer model can be run: eager PyTorch, PyTorch with int8 dynamic quantization of the linear
+# layers, or an exported ONNX graph run with onnxruntime (optional, pip install onnxruntime onnx onnxscript)
+BACKENDS = ('torch', 'int8', 'onnx')
+# Exported ONNX graphs are kept here, one per model id and revision, and reused by later processes
+ONNX_MODEL_DIR = os.getenv('ONNX_MODEL_DIR', 'onnx_models')
+
+
+def get_backend(model_name):
+    """Returns the backend of a model, set with the <MODEL_NAME>_BACKEND environment variable, 'torch' by default."""
+    backend = os.getenv(f'{model_name.upper()}_BACKEND', 'torch').lower()
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend {backend!r} for {model_name}, expected one of {BACKENDS}")
+    return backend
+
+def model_revision(model_name, backend, commit=None):
+    """
+    Revision under which results are stored: the Hub commit the weights were loaded from, and the backend,
+    since other backends give slightly different probabilities.
+    """
+    name = f'{model_name}@{commit}' if commit else model_name
+    return name if backend == 'torch' else f'{name}+{backend}'
+
+def resolve_commit(model_name, revision):
+    """Returns the Hub commit a revision of a model points to, reading only its config, cached after the first download."""
+    return AutoConfig.from_pretrained(model_name, revision=revision)._commit_hash
+
+def quantize_int8(model):
+    """Returns a copy of a PyTorch model with its linear layers quantized to int8; it runs on the CPU only."""
+    return torch.ao.quantization.quantize_dynamic(model.to('cpu'), {torch.nn.Linear}, dtype=torch.qint8)
+
+
+class OnnxSequenceClassifier:
+    """
+    Sequence classification model exported to ONNX and run with onnxruntime on the CPU.
+
+    Called like the PyTorch model it was exported from, with input_ids and attention_mask tensors, and
+    returns its logits in the same output type, so the model functions and pipelines use it unchanged.
+    """
+
+    def __init__(self, model, path):
+        try:
+            import onnxruntime
+        except ImportError as e:
+            raise ImportError("The onnx backend needs onnxruntime: pip install onnxruntime onnx onnxscript") from e
+
+        if not os.path.exists(path):
+            export_onnx(model, path)
+        self.config = model.config
+        self.device = torch.device('cpu')
+        self.session = onnxruntime.InferenceSession(path, providers=['CPUExecutionProvider'])
+
+    def __call__(self, *args, **kwargs):
+        return self.forward(*args, **kwargs)
+
+    def forward(self, input_ids, attention_mask=None, **kwargs):
+        if attention_mask is None:
+            attention_mask = torch.ones_like(input_ids)
+        logits = self.session.run(['logits'], {
+            'input_ids': input_ids.cpu().numpy(),
+            'attention_mask': attention_mask.cpu().numpy()
+        })[0]
+        return SequenceClassifierOutput(logits=torch.from_numpy(logits))
+
+    def to(self, device):
+        return self
+
+    def eval(self):
+        return self
+
+
+def export_onnx(model, path):
+    """Exports a sequence classification model to an ONNX graph with dynamic batch size and length."""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    model = model.to('cpu').eval()
+    # The example has more than one row, since an exporter may specialize a dimension of size 1 into a constant
+    input_ids = torch.arange(2 * 8).reshape(2, 8) % model.config.vocab_size
+    attention_mask = torch.ones_like(input_ids)
+    dynamic_axes = {name: {0: 'batch', 1: 'length'} for name in ('input_ids', 'attention_mask')}
+    dynamic_axes['logits'] = {0: 'batch'}
+    temporary_path = path + '.tmp'
+    torch.onnx.export(
+        model, (input_ids, attention_mask), temporary_path,
+        input_names=['input_ids', 'attention_mask'], output_names=['logits'], dynamic_axes=dynamic_axes
+    )
+    os.replace(temporary_path, path)
+    logger.info(f"Exported ONNX model to {path}.")
+
+def onnx_model_path(model, model_id):
+    """
+    Returns where the exported ONNX graph of a model is kept: under its model id, in a file named after the
+    commit of the Hub revision it was loaded from, or 'local' for a model not loaded from the Hub.
+    """
+    revision = getattr(model.config, '_commit_hash', None) or 'local'
+    return os.path.join(ONNX_MODEL_DIR, re.sub(r'[^\w.-]+', '--', model_id), f'{revision}.onnx')
+
+def apply_backend(model, backend, model_id):
+    """Returns model prepared to run with backend; model_id is its Hub id, e.g. MODEL_NAME."""
+    if backend == 'int8':
+        return quantize_int8(model)
+    if backend == 'onnx':
+        return OnnxSequenceClassifier(model, onnx_model_path(model, model_id))
+    return model
@@ -0,0 +1,162 @@
+import logging
+
+import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Tokens in a padded batch: texts in the batch times the length of its longest text
+MAX_BATCH_TOKENS = 4096
+# Longest text given to the models, in tokens
+MAX_LENGTH = 512
+
+
+class PaddingStats:
+    """Counts of the tokens of the texts and of the padded batches they were run in."""
+
+    def __init__(self):
+        self.batches = 0
+        self.texts = 0
+        self.tokens = 0
+        self.padded_tokens = 0
+
+    def record_batch(self, lengths):
+        self.batches += 1
+        self.texts += len(lengths)
+        self.tokens += sum(lengths)
+        self.padded_tokens += len(lengths) * max(lengths)
+
+    def update(self, other):
+        """Adds the counts of another PaddingStats, e.g. of one call, to these."""
+        self.batches += other.batches
+        self.texts += other.texts
+        self.tokens += other.tokens
+        self.padded_tokens += other.padded_tokens
+
+    @property
+    def efficiency(self):
+        """Share of the padded batch positions holding real tokens, 1.0 without padding."""
+        return self.tokens / self.padded_tokens if self.padded_tokens else 1.0
+
+    def as_dict(self):
+        return {
+            'batches': self.batches,
+            'texts': self.texts,
+            'tokens': self.tokens,
+            'padded_tokens': self.padded_tokens,
+            'efficiency': self.efficiency
+        }
+
+
+def plan_batches(lengths, max_batch_tokens=MAX_BATCH_TOKENS, max_batch_size=None):
+    """
+    Groups texts of similar length into batches under a token budget.
+
+    Texts are sorted by length, so a batch is padded only to the length of its own longest text, and a batch
+    is closed before its padded size would exceed max_batch_tokens or it would hold more than max_batch_size
+    texts. A text longer than the budget gets a batch of its own.
+
+    Parameters:
+    lengths (list of int): Token count of every text.
+    max_batch_tokens (int, optional): Budget of padded tokens per batch.
+    max_batch_size (int, optional): Most texts per batch, unlimited by default.
+
+    Returns:
+    list of list of int: Indices of the texts of every batch.
+    """
+    batches = []
+    batch = []
+    for index in sorted(range(len(lengths)), key=lambda index: lengths[index]):
+        # Sorted by length, so the new text is the longest of the batch
+        padded_size = (len(batch) + 1) * lengths[index]
+        if batch and (padded_size > max_batch_tokens or (max_batch_size and len(batch) >= max_batch_size)):
+            batches.append(batch)
+            batch = []
+        batch.append(index)
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def predict_in_batches(tokenizer, texts, predict, max_batch_tokens=MAX_BATCH_TOKENS, max_batch_size=None, stats=None):
+    """
+    Runs a model over texts in length-bucketed batches and returns its outputs in the order of texts.
+
+    The texts are tokenized in one call, without padding; batches are planned with plan_batches and padded with
+    tokenizer.pad. Errors are isolated per text: when tokenizing all of them fails, they are tokenized one at a
+    time and a text that cannot be tokenized gets no output, and when a batch fails its texts are run again one
+    at a time.
+
+    Parameters:
+    tokenizer: Hugging Face tokenizer of the model.
+    texts (list of str): Texts to run the model on.
+    predict (callable): Function taking the padded inputs of a batch and returning an array with one row per text.
+    max_batch_tokens (int, optional): Budget of padded tokens per batch.
+    max_batch_size (int, optional): Most texts per batch.
+    stats (PaddingStats, optional): Records the padding of every batch run.
+
+    Returns:
+    list: The output row of every text, None for texts that failed.
+    """
+    texts = list(texts)
+    outputs = [None] * len(texts)
+    encodings = _tokenize(tokenizer, texts)
+
+    lengths = {index: len(encoding['input_ids']) for index, encoding in encodings.items()}
+    indices = list(encodings)
+    for batch in plan_batches([lengths[index] for index in indices], max_batch_tokens, max_batch_size):
+        batch_indices = [indices[position] for position in batch]
+        try:
+            rows = _predict_batch(tokenizer, encodings, lengths, batch_indices, predict, stats)
+        except Exception as e:
+            if len(batch_indices) == 1:
+                logger.error(f"Error running the model for text: {texts[batch_indices[0]]}\nError: {e}")
+                continue
+            logger.error(f"Error running the model for a batch, running its texts one at a time\nError: {e}")
+            for index in batch_indices:
+                try:
+                    outputs[index] = _predict_batch(tokenizer, encodings, lengths, [index], predict, stats)[0]
+                except Exception as e:
+                    logger.error(f"Error running the model for text: {texts[index]}\nError: {e}")
+            continue
+        for index, row in zip(batch_indices, rows):
+            outputs[index] = row
+    return outputs
+
+
+def _tokenize(tokenizer, texts):
+    # Returns the encoding of every text that could be tokenized, by its index in texts
+    indices = []
+    for index, text in enumerate(texts):
+        if isinstance(text, str):
+            indices.append(index)
+        else:
+            logger.error(f"Error tokenizing text: {text}\nError: Expected a string, got {type(text).__name__}")
+    if not indices:
+        return {}
+    try:
+        tokenized = tokenizer([texts[index] for index in indices], truncation=True, max_length=MAX_LENGTH)
+        return {
+            index: {key: values[position] for key, values in tokenized.items()}
+            for position, index in enumerate(indices)
+        }
+    except Exception as e:
+        logger.error(f"Error tokenizing {len(indices)} texts together, tokenizing them one at a time\nError: {e}")
+
+    encodings = {}
+    for index in indices:
+        try:
+            encodings[index] = tokenizer(texts[index], truncation=True, max_length=MAX_LENGTH)
+        except Exception as e:
+            logger.error(f"Error tokenizing text: {texts[index]}\nError: {e}")
+    return encodings
+
+
+def _predict_batch(tokenizer, encodings, lengths, indices, predict, stats):
+    inputs = tokenizer.pad([encodings[index] for index in indices], padding=True, return_tensors="pt")
+    rows = np.asarray(predict(inputs))
+    if len(rows) != len(indices):
+        raise ValueError(f"Expected {len(indices)} outputs, got {len(rows)}")
+    if stats is not None:
+        stats.record_batch([lengths[index] for index in indices])
+    return rows
@@ -1,30 +1,70 @@
+import functools
+import os
+
+import numpy as np
+import pandas as pd
 import torch
 from transformers import DistilBertTokenizer, DistilBertForSequenceClassification
 import logging
 from tqdm.auto import tqdm
 
+from src.models.model_registry import registry, get_device
+from src.models.batching import MAX_BATCH_TOKENS, PaddingStats, predict_in_batches
+from src.models.backends import get_backend, model_revision, resolve_commit, apply_backend
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-if torch.backends.mps.is_available():
-    device = torch.device("mps")
-    logger.info("Using MPS device for GPU acceleration.")
-elif torch.cuda.is_available():
-    device = torch.device("cuda")
-    logger.info("Using CUDA device for GPU acceleration.")
-else:
-    device = torch.device("cpu")
-    logger.info("No GPU device found. Using CPU.")
-
-tokenizer = DistilBertTokenizer.from_pretrained("distilbert-base-uncased-finetuned-sst-2-english")
-model = DistilBertForSequenceClassification.from_pretrained("distilbert-base-uncased-finetuned-sst-2-english")
-model.to(device)
-model.eval()
+MODEL_NAME = "distilbert-base-uncased-finetuned-sst-2-english"
+# 'torch', 'int8' or 'onnx', set with the DISTILBERT_BACKEND environment variable
+BACKEND = get_backend('DistilBERT')
+# Hub revision the weights are loaded from, set with the DISTILBERT_HUB_REVISION environment variable; by
+# default the commit transformers pins for this model as its own sentiment-analysis default
+HUB_REVISION = os.getenv('DISTILBERT_HUB_REVISION', '714eb0f')
+# Most texts per forward pass of analyze_sentiment_distilbert_batch
+BATCH_SIZE = 32
+
+# Loaded by the model registry on first use; set them to use another tokenizer and model
+tokenizer = None
+model = None
+
+@functools.lru_cache(maxsize=None)
+def get_model_commit():
+    """Returns the Hub commit of HUB_REVISION, which the weights are loaded from."""
+    return resolve_commit(MODEL_NAME, HUB_REVISION)
+
+def get_model_revision():
+    """Returns the revision stored sentiment results are reused for, keyed on the commit of the weights."""
+    return model_revision(MODEL_NAME, BACKEND, get_model_commit())
+
+def load_model(backend=BACKEND):
+    """Loads the DistilBERT tokenizer and model, prepared to run with backend."""
+    commit = get_model_commit()
+    loaded_tokenizer = DistilBertTokenizer.from_pretrained(MODEL_NAME, revision=commit)
+    loaded_model = DistilBertForSequenceClassification.from_pretrained(MODEL_NAME, revision=commit)
+    loaded_model.eval()
+    if backend == 'torch':
+        loaded_model.to(get_device())
+    return loaded_tokenizer, apply_backend(loaded_model, backend, MODEL_NAME)
+
+registry.register('DistilBERT', load_model)
+
+def get_model():
+    """Returns the (tokenizer, model) pair, loading them on first use."""
+    if tokenizer is not None and model is not None:
+        return tokenizer, model
+    return registry.get('DistilBERT')
+
+def _device_of(model):
+    # Quantized and ONNX models run on the CPU; their inputs are moved to the device they report
+    device = getattr(model, 'device', None)
+    return device if isinstance(device, torch.device) else get_device()
 
 def analyze_sentiment_distilbert(text):
     try:
+        tokenizer, model = get_model()
         inputs = tokenizer(text, return_tensors="pt", truncation=True, padding=True, max_length=512)
-        inputs = {key: value.to(device) for key, value in inputs.items()}
+        inputs = {key: value.to(_device_of(model)) for key, value in inputs.items()}
 
         with torch.no_grad():
             outputs = model(**inputs)
@@ -45,4 +85,41 @@ def analyze_sentiment_distilbert(text):
             'distilbert_sentiment_label': 'Error',
             'distilbert_negative': None,
             'distilbert_positive': None
-        }
\ No newline at end of file
+        }
+
+def _predict_probabilities(inputs):
+    _, model = get_model()
+    inputs = {key: value.to(_device_of(model)) for key, value in inputs.items()}
+
+    with torch.inference_mode():
+        outputs = model(**inputs)
+
+    return torch.nn.functional.softmax(outputs.logits, dim=-1).cpu().numpy()
+
+def analyze_sentiment_distilbert_batch(texts, batch_size=BATCH_SIZE, max_batch_tokens=MAX_BATCH_TOKENS, stats=None):
+    """
+    Analyzes the sentiment of many texts in batches of texts of similar length.
+
+    Results are the same as from analyze_sentiment_distilbert, but as columns. Batches are planned by
+    predict_in_batches under a budget of max_batch_tokens padded tokens and at most batch_size texts; a text
+    that fails is labelled 'Error' without failing the others.
+
+    Returns:
+    pd.DataFrame: The columns of analyze_sentiment_distilbert, one row per text, in the order of texts.
+    """
+    tokenizer, _ = get_model()
+    # Padding of this call alone; a caller's stats add up every call
+    call_stats = PaddingStats()
+    outputs = predict_in_batches(tokenizer, texts, _predict_probabilities, max_batch_tokens, batch_size, call_stats)
+    logger.info(f"DistilBERT ran {call_stats.texts} texts in {call_stats.batches} batches, {call_stats.efficiency:.0%} of them tokens, not padding.")
+    if stats is not None:
+        stats.update(call_stats)
+
+    probs = np.array([row if row is not None else [np.nan, np.nan] for row in outputs], dtype=float).reshape(-1, 2)
+    labels = np.where(probs[:, 1] > probs[:, 0], "Positive", "Negative").astype(object)
+    labels[np.isnan(probs[:, 0])] = 'Error'
+    return pd.DataFrame({
+        'distilbert_sentiment_label': labels,
+        'distilbert_negative': probs[:, 0],
+        'distilbert_positive': probs[:, 1]
+    })
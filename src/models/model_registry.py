@@ -0,0 +1,140 @@
+import gc
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from functools import lru_cache
+
+import torch
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Models kept loaded at once; loading another one unloads the least recently used
+MAX_LOADED_MODELS = int(os.getenv('MAX_LOADED_MODELS', '2'))
+# Below this much available system memory, models other than the one requested are unloaded
+MIN_AVAILABLE_MEMORY_MB = int(os.getenv('MIN_AVAILABLE_MEMORY_MB', '1024'))
+
+
+@lru_cache(maxsize=None)
+def get_device():
+    """Returns the device models run on, chosen once per process."""
+    if torch.cuda.is_available():
+        logger.info("Using CUDA device for GPU acceleration.")
+        return torch.device("cuda")
+    if torch.backends.mps.is_available():
+        logger.info("Using MPS device for GPU acceleration.")
+        return torch.device("mps")
+    logger.info("No GPU device found. Using CPU.")
+    return torch.device("cpu")
+
+def available_memory():
+    """Returns the system memory in bytes available to new allocations, or None if psutil is not installed."""
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.virtual_memory().available
+
+
+class ModelRegistry:
+    """
+    Process-wide store of models loaded on first use.
+
+    Each backend registers a loader; get() runs it the first time the model is needed and returns the same
+    object to every later caller, from any thread. A load runs outside the registry lock, so it only blocks
+    callers waiting for the same model. At most max_loaded models are kept; loading one more unloads the least
+    recently used. While less than min_available_memory bytes of system memory are available, every get()
+    unloads the least recently used other models, and unload() frees a model explicitly.
+    """
+
+    def __init__(self, max_loaded=MAX_LOADED_MODELS, min_available_memory=MIN_AVAILABLE_MEMORY_MB * 2**20,
+                 memory_probe=available_memory):
+        self.max_loaded = max_loaded
+        self.min_available_memory = min_available_memory
+        self.memory_probe = memory_probe
+        self._loaders = {}
+        self._models = OrderedDict()
+        self._loading = {}
+        self._lock = threading.RLock()
+
+    def register(self, name, loader):
+        """Registers loader() as the function loading the model called name."""
+        with self._lock:
+            self._loaders[name] = loader
+
+    def get(self, name):
+        """Returns the model called name, loading it if it is not loaded."""
+        self._release_memory(keep=name)
+        with self._lock:
+            if name in self._models:
+                self._models.move_to_end(name)
+                return self._models[name]
+            pending = self._loading.get(name)
+            if pending is None:
+                loader = self._loaders[name]
+                pending = self._loading[name] = Future()
+                evicted = list(self._models)[:max(len(self._models) - self.max_loaded + 1, 0)]
+            else:
+                loader = None
+        if loader is None:
+            # Another thread is loading the model
+            return pending.result()
+
+        try:
+            for evicted_name in evicted:
+                self.unload(evicted_name)
+            started_at = time.perf_counter()
+            loaded = loader()
+        except BaseException as error:
+            with self._lock:
+                del self._loading[name]
+            pending.set_exception(error)
+            raise
+        logger.info(f"Loaded {name} model in {time.perf_counter() - started_at:.2f} s.")
+        with self._lock:
+            self._models[name] = loaded
+            del self._loading[name]
+        pending.set_result(loaded)
+        return loaded
+
+    def _release_memory(self, keep):
+        # Unloads the least recently used models other than keep while system memory runs low
+        while True:
+            available = self.memory_probe()
+            if available is None or available >= self.min_available_memory:
+                return
+            with self._lock:
+                candidates = [loaded_name for loaded_name in self._models if loaded_name != keep]
+            if not candidates:
+                return
+            logger.info(f"{available / 2**20:.0f} MB of memory available, unloading {candidates[0]} model.")
+            self.unload(candidates[0])
+
+    def is_loaded(self, name):
+        with self._lock:
+            return name in self._models
+
+    def unload(self, name):
+        """Drops the model called name, if it is loaded, and frees its memory."""
+        with self._lock:
+            if self._models.pop(name, None) is None:
+                return False
+        gc.collect()
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+        logger.info(f"Unloaded {name} model.")
+        return True
+
+    def unload_all(self):
+        """Drops every loaded model."""
+        with self._lock:
+            names = list(self._models)
+        for name in names:
+            self.unload(name)
+
+
+# Registry shared by every model module of the process
+registry = ModelRegistry()
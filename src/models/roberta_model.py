@@ -1,29 +1,60 @@
+import functools
+import os
+
+import numpy as np
+import pandas as pd
 import torch
 from transformers import pipeline
 import logging
 from tqdm.auto import tqdm
 
+from src.models.model_registry import registry, get_device
+from src.models.batching import MAX_BATCH_TOKENS, PaddingStats, predict_in_batches
+from src.models.backends import get_backend, model_revision, resolve_commit, apply_backend
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Determine the appropriate device
-if torch.cuda.is_available():
-    device = torch.device("cuda")
-    logger.info("Using CUDA device for GPU acceleration.")
-elif torch.backends.mps.is_available():
-    device = torch.device("mps")
-    logger.info("Using MPS device for GPU acceleration.")
-else:
-    device = torch.device("cpu")
-    logger.info("No GPU device found. Using CPU.")
-
-# Initialize the sentiment analysis pipeline
-classifier = pipeline(
-    'sentiment-analysis',
-    model='cardiffnlp/twitter-roberta-base-sentiment',
-    tokenizer='cardiffnlp/twitter-roberta-base-sentiment',
-    device=0 if device.type == 'cuda' else -1
-)
+MODEL_NAME = 'cardiffnlp/twitter-roberta-base-sentiment'
+# 'torch', 'int8' or 'onnx', set with the ROBERTA_BACKEND environment variable
+BACKEND = get_backend('RoBERTa')
+# Hub revision the weights are loaded from, set with the ROBERTA_HUB_REVISION environment variable; a branch
+# is resolved to its commit once per process, so stored results never mix commits
+HUB_REVISION = os.getenv('ROBERTA_HUB_REVISION', 'main')
+# Most texts per forward pass of analyze_sentiment_roberta_batch
+BATCH_SIZE = 32
+
+# Loaded by the model registry on first use; set it to use another pipeline
+classifier = None
+
+@functools.lru_cache(maxsize=None)
+def get_model_commit():
+    """Returns the Hub commit of HUB_REVISION, which the weights are loaded from."""
+    return resolve_commit(MODEL_NAME, HUB_REVISION)
+
+def get_model_revision():
+    """Returns the revision stored sentiment results are reused for, keyed on the commit of the weights."""
+    return model_revision(MODEL_NAME, BACKEND, get_model_commit())
+
+def load_classifier(backend=BACKEND):
+    """Initializes the sentiment analysis pipeline, with its model prepared to run with backend."""
+    loaded_classifier = pipeline(
+        'sentiment-analysis',
+        model=MODEL_NAME,
+        tokenizer=MODEL_NAME,
+        revision=get_model_commit(),
+        device=0 if backend == 'torch' and get_device().type == 'cuda' else -1
+    )
+    loaded_classifier.model = apply_backend(loaded_classifier.model, backend, MODEL_NAME)
+    return loaded_classifier
+
+registry.register('RoBERTa', load_classifier)
+
+def get_classifier():
+    """Returns the sentiment analysis pipeline, loading it on first use."""
+    if classifier is not None:
+        return classifier
+    return registry.get('RoBERTa')
 
 LABEL_MAPPING = {
     "LABEL_0": "Negative",
@@ -39,6 +70,7 @@ def analyze_sentiment_roberta(text):
     Analyzes the sentiment of the given text using the RoBERTa model.
     """
     try:
+        classifier = get_classifier()
         # Perform sentiment analysis using the pipeline
         result = classifier(text)[0]
         label = LABEL_MAPPING.get(result['label'], "Unknown")
@@ -70,4 +102,47 @@ def analyze_sentiment_roberta(text):
             'roberta_negative': None,
             'roberta_neutral': None,
             'roberta_positive': None
-        }
\ No newline at end of file
+        }
+
+def _predict_probabilities(model, inputs):
+    inputs = {k: v.to(model.device) for k, v in inputs.items()}
+
+    with torch.inference_mode():
+        outputs = model(**inputs)
+
+    return torch.nn.functional.softmax(outputs.logits, dim=-1).cpu().numpy()
+
+def analyze_sentiment_roberta_batch(texts, batch_size=BATCH_SIZE, max_batch_tokens=MAX_BATCH_TOKENS, stats=None):
+    """
+    Analyzes the sentiment of many texts with one forward pass per batch of texts of similar length.
+
+    The label and the three probabilities come from the same logits, instead of running the model once
+    through the pipeline and once more for the probabilities. Batches are planned by predict_in_batches under
+    a budget of max_batch_tokens padded tokens and at most batch_size texts; a text that fails is labelled
+    'Error' without failing the others.
+
+    Returns:
+    pd.DataFrame: The columns of analyze_sentiment_roberta, one row per text, in the order of texts.
+    """
+    classifier = get_classifier()
+    model = classifier.model
+    # Padding of this call alone; a caller's stats add up every call
+    call_stats = PaddingStats()
+    outputs = predict_in_batches(
+        classifier.tokenizer, texts, lambda inputs: _predict_probabilities(model, inputs), max_batch_tokens, batch_size, call_stats
+    )
+    logger.info(f"RoBERTa ran {call_stats.texts} texts in {call_stats.batches} batches, {call_stats.efficiency:.0%} of them tokens, not padding.")
+    if stats is not None:
+        stats.update(call_stats)
+
+    id2label = model.config.id2label
+    batch_labels = np.array([LABEL_MAPPING.get(id2label[index], "Unknown") for index in range(3)], dtype=object)
+    probabilities = np.array([row if row is not None else [np.nan] * 3 for row in outputs], dtype=float).reshape(-1, 3)
+    labels = batch_labels[np.nan_to_num(probabilities).argmax(axis=1)]
+    labels[np.isnan(probabilities[:, 0])] = 'Error'
+    return pd.DataFrame({
+        'roberta_sentiment_label': labels,
+        'roberta_negative': probabilities[:, 0],
+        'roberta_neutral': probabilities[:, 1],
+        'roberta_positive': probabilities[:, 2]
+    })
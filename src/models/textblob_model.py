@@ -1,5 +1,10 @@
+from importlib.metadata import version
+
 from textblob import TextBlob
 
+# Stored sentiment results are reused only for the same revision
+MODEL_REVISION = f"textblob-{version('textblob')}"
+
 def analyze_sentiment_textblob(text):
     try:
         analysis = TextBlob(text)
@@ -1,5 +1,10 @@
+from importlib.metadata import version
+
 from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
 
+# Stored sentiment results are reused only for the same revision
+MODEL_REVISION = f"vaderSentiment-{version('vaderSentiment')}"
+
 analyzer = SentimentIntensityAnalyzer()
 
 def analyze_sentiment_vader(text):
@@ -1,8 +1,8 @@
+import sqlite3
 import pandas as pd
 import plotly.express as px
 import streamlit as st
 from datetime import datetime, timedelta
-from collections import Counter
 from transformers import pipeline
 import tensorflow as tf
 from transformers import DistilBertTokenizer, DistilBertForSequenceClassification
@@ -13,22 +13,44 @@ import plotly.graph_objects as go
 
 from src.functions.app_analysis_functions import (
     get_db_connection,
+    get_db_writer,
     create_tables,
     search_and_select_app,
     check_and_fetch_reviews,
     display_reviews,
     preprocess_data,
-    plot_score_distribution,
-    generate_ngrams,
-    preprocess_text_simple,
+    load_app_reviews,
+    plot_score_distribution_from_stats,
+    daily_average_scores,
+    analyze_sentiment_with_store,
+    ANALYSIS_COLUMNS,
+    iter_cleaned_chunks,
+    count_ngrams,
+    find_reviews_with_ngram,
     plot_daily_average_rating
 )
-from src.database_connection.db_utils import get_app_data
-
-from src.models.textblob_model import analyze_sentiment_textblob
-from src.models.vader_model import analyze_sentiment_vader
-from src.models.roberta_model import analyze_sentiment_roberta
-from src.models.distilbert_model import analyze_sentiment_distilbert
+from src.database_connection.db_utils import (
+    get_review_date_bounds,
+    iter_app_data,
+    get_daily_app_stats,
+    search_reviews,
+    count_reviews,
+    to_fts_query
+)
+from src.functions.scraper import sync_new_reviews
+
+from src.models.textblob_model import analyze_sentiment_textblob, MODEL_REVISION as TEXTBLOB_MODEL_REVISION
+from src.models.vader_model import analyze_sentiment_vader, MODEL_REVISION as VADER_MODEL_REVISION
+from src.models.roberta_model import (
+    analyze_sentiment_roberta,
+    analyze_sentiment_roberta_batch,
+    get_model_revision as get_roberta_model_revision
+)
+from src.models.distilbert_model import (
+    analyze_sentiment_distilbert,
+    analyze_sentiment_distilbert_batch,
+    get_model_revision as get_distilbert_model_revision
+)
 from matplotlib.colors import LinearSegmentedColormap
 
 
@@ -45,10 +67,16 @@ def update_progress(progress_bar, status_text, current_step, total_steps, status
 def app_analysis_page():
     st.title("App Reviews Analysis")
 
-    # Connect to the database
+    # Reads use a pooled read-only connection and every write goes through the writer thread shared by all
+    # sessions, so concurrent downloads do not fail on the SQLite write lock
     conn = get_db_connection()
-    create_tables(conn)
+    try:
+        create_tables(conn)
+        render_app_analysis(conn, get_db_writer())
+    finally:
+        conn.close()
 
+def render_app_analysis(conn, writer):
     # Sidebar filters
     st.sidebar.title("Filters")
 
@@ -60,7 +88,7 @@ def app_analysis_page():
     selected_app_icon = None
 
     if search_query:
-        search_results = search_and_select_app(search_query)
+        search_results = search_and_select_app(search_query, writer=writer)
         if search_results:
             app_options = [f"{app['title']} (ID: {app['appId']})" for app in search_results]
             selected_app_option = st.sidebar.selectbox("Select an application from search results", app_options)
@@ -134,6 +162,7 @@ def app_analysis_page():
 
         # Buttons to download reviews and perform analysis
         perform_analysis_button = st.button("Download reviews")
+        sync_button = st.button("Sync new reviews")
         stop_download_button = st.button("Stop downloading")
 
         # Initialize session state variables
@@ -159,14 +188,13 @@ def app_analysis_page():
                     start_date,
                     end_date,
                     status_placeholder,
-                    missing_placeholder
+                    missing_placeholder,
+                    writer=writer
                 )
 
                 # Update raw data in session state
-                app_data = get_app_data(conn, selected_app)
+                app_data = load_app_reviews(conn, selected_app_id, start_date, end_date)
                 if not app_data.empty:
-                    app_data = preprocess_data(app_data)
-                    app_data['at'] = pd.to_datetime(app_data['at']).dt.date
                     st.session_state.app_data = app_data  
                     st.write(f"### Fetched Data for **{selected_app}**:")
                     st.dataframe(app_data)
@@ -174,15 +202,32 @@ def app_analysis_page():
                     st.session_state.app_data = None
                     st.warning(f"No data available for {selected_app}. Please try another app.")
 
+            elif sync_button:
+                st.session_state.stop_download = False
+
+                progress_bar = st.progress(0)
+                progress_text = st.empty()
+                new_reviews_count = sync_new_reviews(
+                    app_name=selected_app,
+                    app_id=selected_app_id,
+                    conn=conn,
+                    progress_bar=progress_bar,
+                    progress_text=progress_text,
+                    country="us",
+                    language="en",
+                    writer=writer,
+                )
+                progress_bar.empty()
+                progress_text.empty()
+                st.success(f"Synced {new_reviews_count} new reviews for **{selected_app}**.")
+
             elif stop_download_button:
                 st.session_state.stop_download = True
                 st.info("Stopping download and performing analysis with existing data...")
 
                 # Update raw data in session state
-                app_data = get_app_data(conn, selected_app)
+                app_data = load_app_reviews(conn, selected_app_id, start_date, end_date)
                 if not app_data.empty:
-                    app_data = preprocess_data(app_data)
-                    app_data['at'] = pd.to_datetime(app_data['at']).dt.date
                     st.session_state.app_data = app_data 
                     st.session_state['selected_app_icon'] = chosen_app.get('icon', None)
                     st.write(f"### Fetched Data for **{selected_app}**:")
@@ -191,7 +236,7 @@ def app_analysis_page():
                     st.session_state.app_data = None
                     st.warning(f"No data available for {selected_app}. Please try another app.")
 
-        elif perform_analysis_button or stop_download_button:
+        elif perform_analysis_button or sync_button or stop_download_button:
             st.warning("Please select an application before proceeding.")
 
         # Display analysis results
@@ -204,18 +249,14 @@ def app_analysis_page():
 
     with tabs[1]:
         if selected_app:
-            app_data = get_app_data(conn, selected_app)
-            if app_data.empty:
+            date_bounds = get_review_date_bounds(conn, selected_app_id)
+            if date_bounds is None:
                 st.sidebar.write("No date slider means that there is no app data available. Please download it first via the 'Data Downloading' tab.")
-            if not app_data.empty:
-                app_data = preprocess_data(app_data)
-                app_data['at'] = pd.to_datetime(app_data['at']).dt.date
-
+            if date_bounds is not None:
                 # Date slider in sidebar
                 st.sidebar.write("Filter by Date:")
                 st.sidebar.write("Date range is selectable. It indicates that data is available for that period and can be analyzed. You can download additional data using the 'Data Downloading' tab.")
-                min_date = app_data['at'].min()
-                max_date = app_data['at'].max()
+                min_date, max_date = date_bounds
 
                 if min_date < max_date:
                     st.session_state['selected_date_range'] = st.sidebar.slider(
@@ -285,16 +326,23 @@ def app_analysis_page():
                     progress_bar.progress(progress)
                     status_text.text(f"{status_message}: {current_step} / {total_steps}")
 
-                def run_sentiment_analysis(model_function, model_name):
-                    results = []
-                    total_records = len(final_filtered_data)
-                    progress_bar, status_text = initialize_progress(total_records)
-                    for i, text in enumerate(final_filtered_data['content']):
-                        res = model_function(text)
-                        results.append(res)
-                        update_progress(progress_bar, status_text, i+1, total_records, f"Processing {model_name}")
+                def run_sentiment_analysis(model_function, model_name, model_revision, batch_function=None):
+                    # Reviews analyzed earlier with the same model revision are read from the database
+                    progress_bar, status_text = initialize_progress(len(final_filtered_data))
+                    sentiment_df = analyze_sentiment_with_store(
+                        conn,
+                        final_filtered_data,
+                        model_name,
+                        model_function,
+                        model_revision,
+                        progress_callback=lambda current_step, total_steps: update_progress(
+                            progress_bar, status_text, current_step, total_steps, f"Processing {model_name}"
+                        ),
+                        writer=writer,
+                        batch_function=batch_function
+                    )
                     progress_bar.progress(1.0)
-                    return results
+                    return sentiment_df
 
                 if can_filter_existing:
                     final_filtered_data = analysis_data[
@@ -303,11 +351,15 @@ def app_analysis_page():
                         (analysis_data['score'].isin(st.session_state['selected_scores']))
                     ]
                 else:
-                    final_filtered_data = app_data[
-                        (app_data['at'] >= st.session_state['selected_date_range'][0]) &
-                        (app_data['at'] <= st.session_state['selected_date_range'][1]) &
-                        (app_data['score'].isin(st.session_state['selected_scores']))
-                    ]
+                    # Only the reviews and columns the analysis needs are read from the database
+                    final_filtered_data = load_app_reviews(
+                        conn,
+                        selected_app_id,
+                        st.session_state['selected_date_range'][0],
+                        st.session_state['selected_date_range'][1],
+                        st.session_state['selected_scores'],
+                        columns=ANALYSIS_COLUMNS
+                    )
 
                 if perform_analysis:
                     if not final_filtered_data.empty:
@@ -318,11 +370,29 @@ def app_analysis_page():
                             "DistilBERT": analyze_sentiment_distilbert,
                         }
 
+                        # The transformer revisions are the Hub commits of their weights, resolved on first use
+                        model_revisions = {
+                            "TextBlob": lambda: TEXTBLOB_MODEL_REVISION,
+                            "VADER": lambda: VADER_MODEL_REVISION,
+                            "RoBERTa": get_roberta_model_revision,
+                            "DistilBERT": get_distilbert_model_revision,
+                        }
+
+                        # Models that analyze many reviews per call
+                        model_batch_functions = {
+                            "RoBERTa": analyze_sentiment_roberta_batch,
+                            "DistilBERT": analyze_sentiment_distilbert_batch,
+                        }
+
                         if selected_model in model_functions:
                             model_function = model_functions[selected_model]
 
-                            sentiments = run_sentiment_analysis(model_function, selected_model)
-                            sentiment_df = pd.DataFrame(sentiments)
+                            sentiment_df = run_sentiment_analysis(
+                                model_function,
+                                selected_model,
+                                model_revisions[selected_model](),
+                                model_batch_functions.get(selected_model)
+                            )
 
                             # remove duplicate columns
                             for col in sentiment_df.columns:
@@ -515,41 +585,24 @@ def app_analysis_page():
 
         st.header("Score Analysis")
 
-        # Fetch data from the database
         if selected_app:
-            app_data = get_app_data(conn, selected_app)
-            if not app_data.empty:
-                app_data = preprocess_data(app_data)
-                app_data['at'] = pd.to_datetime(app_data['at']).dt.date
-                st.session_state['app_data'] = app_data
-            else:
-                st.write("No data available. Please select an application and download reviews.")
-                st.session_state['app_data'] = None
-
-        if 'app_data' in st.session_state and st.session_state['app_data'] is not None:
-            app_data = st.session_state['app_data']
-
-            # Apply filters based on date range and scores
-            displayed_data = app_data[
-                (app_data['at'] >= st.session_state['selected_date_range'][0]) &
-                (app_data['at'] <= st.session_state['selected_date_range'][1]) &
-                (app_data['score'].isin(st.session_state['selected_scores']))
-            ]
+            # Per-day review counts are maintained on ingest, so no individual reviews are loaded here
+            selected_scores = st.session_state.get('selected_scores', [1, 2, 3, 4, 5])
+            daily_stats = get_daily_app_stats(
+                conn,
+                selected_app_id,
+                st.session_state['selected_date_range'][0],
+                st.session_state['selected_date_range'][1]
+            )
+            metrics_over_time = daily_average_scores(daily_stats, selected_scores)
 
-            if not displayed_data.empty:
+            if not metrics_over_time.empty:
                 # Score Distribution Plot
                 st.write("### Score Distribution")
-                score_fig = plot_score_distribution(displayed_data)
+                score_fig = plot_score_distribution_from_stats(daily_stats, selected_scores)
                 st.plotly_chart(score_fig)
                 st.write("### Daily Average Rating Over Time")
 
-                # Group by date
-                metrics_over_time = (
-                    displayed_data
-                    .groupby('at', as_index=False)['score']
-                    .mean(numeric_only=True)
-                )
-
                 melted = metrics_over_time.melt(id_vars='at', value_vars=['score'], var_name='metric', value_name='value')
 
                 # Compute a 7-day moving average trend for the score
@@ -636,68 +689,67 @@ def app_analysis_page():
 
         st.header("Problems Identification")
 
-        # Fetch data from the database
         if selected_app:
-            app_data = get_app_data(conn, selected_app)
-            if not app_data.empty:
-                app_data = preprocess_data(app_data)
-                app_data['at'] = pd.to_datetime(app_data['at']).dt.date
-                st.session_state['app_data'] = app_data
-            else:
-                st.write("No data available. Please select an application and download reviews.")
-                st.session_state['app_data'] = None
-
-        if 'app_data' in st.session_state and st.session_state['app_data'] is not None:
-            app_data = st.session_state['app_data']
-
-            # Apply filters based on date range and scores
-            final_filtered_data = app_data[
-                (app_data['at'] >= st.session_state['selected_date_range'][0]) &
-                (app_data['at'] <= st.session_state['selected_date_range'][1]) &
-                (app_data['score'].isin(st.session_state['selected_scores']))
-            ]
+            # Reviews are streamed in chunks of the selected date range and scores, so memory stays bounded
+            def filtered_chunks():
+                return iter_app_data(
+                    conn,
+                    selected_app_id,
+                    st.session_state['selected_date_range'][0],
+                    st.session_state['selected_date_range'][1],
+                    st.session_state.get('selected_scores', [1, 2, 3, 4, 5]),
+                    columns=ANALYSIS_COLUMNS
+                )
 
-            if not final_filtered_data.empty:
-                final_filtered_data = final_filtered_data.drop_duplicates(subset=['content'])
-                final_filtered_data['cleaned_content'] = final_filtered_data['content'].apply(preprocess_text_simple)
+            total_comments = count_reviews(
+                conn,
+                selected_app_id,
+                st.session_state['selected_date_range'][0],
+                st.session_state['selected_date_range'][1],
+                st.session_state.get('selected_scores', [1, 2, 3, 4, 5])
+            )
 
+            if total_comments > 0:
                 # User input for problem identification
                 problem_keyword = st.text_input("Enter a keyword to identify problems (e.g., 'bug')")
 
+                st.caption('Supports phrases ("keeps crashing"), OR / NOT (e.g. crash OR freeze) and prefixes (e.g. crash*).')
+
                 if problem_keyword:
-                    # Filter comments containing the exact keyword from the cleaned content
-                    keyword_comments = final_filtered_data[
-                        final_filtered_data['cleaned_content'].str.contains(rf'\b{problem_keyword}\b', case=False, na=False)
-                    ]
+                    # The full-text index finds matching reviews without tokenizing them in Python
+                    try:
+                        keyword_comments = search_reviews(
+                            conn,
+                            selected_app_id,
+                            to_fts_query(problem_keyword),
+                            st.session_state['selected_date_range'][0],
+                            st.session_state['selected_date_range'][1],
+                            st.session_state['selected_scores']
+                        )
+                    except sqlite3.OperationalError:
+                        st.error(f"Invalid search query: {problem_keyword}")
+                        keyword_comments = None
 
-                    # Calculate the percentage of comments containing the keyword
-                    keyword_count = len(keyword_comments)
-                    total_comments = len(final_filtered_data)
-                    keyword_percentage = (keyword_count / total_comments) * 100 if total_comments > 0 else 0
+                    if keyword_comments is not None:
+                        # Calculate the percentage of comments containing the keyword
+                        keyword_count = len(keyword_comments)
+                        keyword_percentage = (keyword_count / total_comments) * 100 if total_comments > 0 else 0
 
-                    # Display results
-                    st.write(f"### Analysis for keyword: **{problem_keyword}**")
-                    st.write(f"Total comments: {total_comments}")
-                    st.write(f"Comments containing '{problem_keyword}': {keyword_count} ({keyword_percentage:.2f}%)")
+                        # Display results
+                        st.write(f"### Analysis for keyword: **{problem_keyword}**")
+                        st.write(f"Total comments: {total_comments}")
+                        st.write(f"Comments containing '{problem_keyword}': {keyword_count} ({keyword_percentage:.2f}%)")
 
-                    if keyword_count > 0:
-                        st.write(f"### Comments containing the keyword '{problem_keyword}':")
-                        st.dataframe(keyword_comments[['content']].reset_index(drop=True), use_container_width=True)
+                        if keyword_count > 0:
+                            st.write(f"### Comments containing the keyword '{problem_keyword}':")
+                            st.dataframe(keyword_comments[['content']].reset_index(drop=True), use_container_width=True)
 
                 # Generate n-grams for each row and store them
                 st.header("Most Frequent Words and Phrases")
                 ngram_length = st.selectbox("Select phrase length:", [1, 2, 3, 4], index=0)
 
-                all_ngrams = []
-                ngram_to_row_mapping = [] 
-
-                for index, text in final_filtered_data['cleaned_content'].dropna().items():
-                    ngrams = generate_ngrams(text, ngram_length)
-                    all_ngrams.extend(ngrams)
-                    ngram_to_row_mapping.extend([(index, ngram) for ngram in ngrams])
-
-                # Count n-gram frequencies
-                ngram_counts = Counter(all_ngrams)
+                # Count n-gram and word frequencies chunk by chunk
+                ngram_counts, word_counts, _ = count_ngrams(iter_cleaned_chunks(filtered_chunks()), ngram_length)
                 ngram_df = pd.DataFrame(ngram_counts.items(), columns=['Phrase', 'Count']).sort_values(by='Count', ascending=False)
 
                 if not ngram_df.empty:
@@ -724,11 +776,9 @@ def app_analysis_page():
                     if selected_phrase:
                         st.write(f"### Comments containing the phrase: **{selected_phrase}**")
 
-                        # Find the rows containing the selected phrase
-                        matching_rows = list(set(
-                            row_index for row_index, ngram in ngram_to_row_mapping if ngram == selected_phrase
-                        ))
-                        related_comments = final_filtered_data.loc[matching_rows, ['content', 'score', 'at', 'user_name']]
+                        # Find the reviews containing the selected phrase with a second pass over the chunks
+                        related_comments = find_reviews_with_ngram(filtered_chunks(), selected_phrase)
+                        related_comments['at'] = pd.to_datetime(related_comments['at']).dt.date
 
                         if not related_comments.empty:
                             st.dataframe(related_comments.reset_index(drop=True), use_container_width=True)
@@ -740,18 +790,15 @@ def app_analysis_page():
                 custom_cmap = LinearSegmentedColormap.from_list("custom_palette", colors)
 
                 st.header("Word Cloud")
-                all_cleaned_text = ' '.join(final_filtered_data['cleaned_content'])
-                wordcloud = WordCloud(width=800, height=400, background_color='white', colormap=custom_cmap).generate(all_cleaned_text)
+                if word_counts:
+                    wordcloud = WordCloud(width=800, height=400, background_color='white', colormap=custom_cmap).generate_from_frequencies(word_counts)
 
-                fig, ax = plt.subplots(figsize=(10, 5))
-                ax.imshow(wordcloud, interpolation='bilinear')
-                ax.axis('off')
-                st.pyplot(fig)
+                    fig, ax = plt.subplots(figsize=(10, 5))
+                    ax.imshow(wordcloud, interpolation='bilinear')
+                    ax.axis('off')
+                    st.pyplot(fig)
 
             else:
                 st.write("No data available after applying these filters.")
         else:
             st.write("No data available. Please download reviews first.")
-
-
-    conn.close()
\ No newline at end of file
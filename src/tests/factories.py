@@ -0,0 +1,26 @@
+from src.database_connection.db_utils import to_epoch_seconds
+
+
+def make_review(review_id, at, score=5):
+    """Returns a review as google_play_scraper returns it."""
+    return {
+        'reviewId': review_id,
+        'userName': f'User{review_id}',
+        'userImage': 'image.png',
+        'content': f'Review {review_id}',
+        'score': score,
+        'thumbsUpCount': 0,
+        'reviewCreatedVersion': '1.0',
+        'at': at,
+        'replyContent': None,
+        'repliedAt': None,
+        'appVersion': '1.0'
+    }
+
+
+def make_review_row(review_id, at='2023-11-01', score=4, app_name='TestApp'):
+    """Returns a review row tuple as insert_review_rows stores it, of the app '<app_name lowercased>.app'."""
+    return (
+        review_id, 'User', None, f'Review {review_id}', score, 0, '1.0', to_epoch_seconds(at), None, None, '1.0',
+        app_name, app_name.lower() + '.app', 'us', 'en'
+    )
@@ -16,8 +16,8 @@ def main():
     
     create_reviews_table(conn)
     
-    app_name = 'Netflix'
-    app_data = get_app_data(conn, app_name)
+    app_id = 'com.netflix.mediaclient'
+    app_data = get_app_data(conn, app_id)
     
     st.write("Data before preprocessing:")
     st.dataframe(app_data)
@@ -2,12 +2,23 @@ import unittest
 import pandas as pd
 import numpy as np
 import datetime
+import sqlite3
+from unittest.mock import MagicMock, patch
 
 from src.functions.app_analysis_functions import (
     preprocess_data,
     plot_score_distribution,
-    generate_ngrams
+    generate_ngrams,
+    get_missing_and_available_ranges,
+    daily_average_scores,
+    plot_score_distribution_from_stats,
+    analyze_sentiment_with_store,
+    iter_cleaned_chunks,
+    count_ngrams,
+    find_reviews_with_ngram,
+    search_and_select_app
 )
+from src.database_connection.db_utils import create_all_tables
 
 class TestAppAnalysisFunctions(unittest.TestCase):
     def setUp(self):
@@ -122,5 +133,171 @@ class TestAppAnalysisFunctions(unittest.TestCase):
         self.assertIsNotNone(fig, "Plot should not be None.")
         self.assertTrue(hasattr(fig, 'to_html'), "Plotly figure should have 'to_html' method.")
 
+    def test_get_missing_and_available_ranges(self):
+        """
+        Test computing gaps from the intervals that have already been fetched.
+        """
+        fetched_ranges = [
+            (datetime.datetime(2023, 1, 5), datetime.datetime(2023, 1, 10, 23, 59, 59, 999999)),
+            (datetime.datetime(2023, 1, 20), datetime.datetime(2023, 1, 25, 23, 59, 59, 999999)),
+        ]
+        start_date = datetime.datetime(2023, 1, 1)
+        end_date = datetime.datetime(2023, 1, 22, 23, 59, 59, 999999)
+
+        ranges = get_missing_and_available_ranges(fetched_ranges, start_date, end_date)
+
+        self.assertEqual(ranges['missing'], [
+            (datetime.datetime(2023, 1, 1), datetime.datetime(2023, 1, 4, 23, 59, 59, 999999)),
+            (datetime.datetime(2023, 1, 11), datetime.datetime(2023, 1, 19, 23, 59, 59, 999999)),
+        ])
+        self.assertEqual(ranges['available'], [
+            (datetime.datetime(2023, 1, 5), datetime.datetime(2023, 1, 10, 23, 59, 59, 999999)),
+            (datetime.datetime(2023, 1, 20), datetime.datetime(2023, 1, 22, 23, 59, 59, 999999)),
+        ])
+
+    def test_get_missing_and_available_ranges_fully_fetched(self):
+        """
+        Test that a range inside an already fetched interval has nothing missing.
+        """
+        fetched_ranges = [(datetime.datetime(2023, 1, 1), datetime.datetime(2023, 2, 1))]
+        ranges = get_missing_and_available_ranges(
+            fetched_ranges, datetime.datetime(2023, 1, 10), datetime.datetime(2023, 1, 20)
+        )
+        self.assertEqual(ranges['missing'], [])
+
+    def test_daily_average_scores(self):
+        """Test averaging per-day counts over the selected scores."""
+        daily_stats = pd.DataFrame({
+            'date': [datetime.date(2023, 1, 1), datetime.date(2023, 1, 2)],
+            'score_1': [1, 0], 'score_2': [0, 0], 'score_3': [0, 0], 'score_4': [0, 2], 'score_5': [1, 0]
+        })
+        metrics = daily_average_scores(daily_stats)
+        self.assertEqual(metrics['score'].tolist(), [3.0, 4.0])
+
+        metrics = daily_average_scores(daily_stats, [5])
+        self.assertEqual(metrics['at'].tolist(), [datetime.date(2023, 1, 1)])
+        self.assertEqual(metrics['score'].tolist(), [5.0])
+
+        fig = plot_score_distribution_from_stats(daily_stats)
+        self.assertEqual(list(fig.data[0].y), [0.25, 0.0, 0.0, 0.5, 0.25])
+
+    def test_preprocess_data_keeps_review_id(self):
+        """Test that review ids are kept and do not prevent removing duplicate reviews."""
+        data = pd.concat([self.sample_data, self.sample_data.iloc[[0]]], ignore_index=True)
+        data['review_id'] = [str(i) for i in range(len(data))]
+        processed_data = preprocess_data(data)
+        self.assertIn('review_id', processed_data.columns)
+        self.assertEqual(len(processed_data), len(self.sample_data))
+
+    def test_analyze_sentiment_with_store(self):
+        """Test that stored sentiment results are reused and only new reviews are analyzed."""
+        conn = sqlite3.connect(':memory:')
+        create_all_tables(conn)
+        model_function = MagicMock(side_effect=lambda text: {
+            'vader_sentiment_label': 'Error' if text == 'broken' else 'Positive',
+            'vader_positive': 0.5, 'vader_neutral': 0.5, 'vader_negative': 0.0, 'vader_compound': 0.4
+        })
+        reviews = pd.DataFrame({'review_id': ['1', '2', 'x'], 'content': ['good', 'great', 'broken']})
+
+        first = analyze_sentiment_with_store(conn, reviews, 'VADER', model_function, 'v1')
+        self.assertEqual(model_function.call_count, 3)
+        self.assertEqual(first['vader_sentiment_label'].tolist(), ['Positive', 'Positive', 'Error'])
+
+        progress = MagicMock()
+        reviews = pd.DataFrame({'review_id': ['3', '2', '1', 'x'], 'content': ['nice', 'great', 'good', 'broken']})
+        second = analyze_sentiment_with_store(conn, reviews, 'VADER', model_function, 'v1', progress_callback=progress)
+        # Only the new review and the one that failed are analyzed again
+        self.assertEqual(model_function.call_count, 5)
+        self.assertEqual(progress.call_args_list[-1].args, (2, 2))
+        self.assertEqual(second['vader_compound'].tolist(), [0.4, 0.4, 0.4, 0.4])
+        self.assertEqual(list(second.columns), list(first.columns))
+
+        # A new model revision does not reuse the stored results
+        analyze_sentiment_with_store(conn, reviews, 'VADER', model_function, 'v2')
+        self.assertEqual(model_function.call_count, 9)
+        conn.close()
+
+    def test_analyze_sentiment_with_store_in_batches(self):
+        """Test that a batch function analyzes the missing reviews together and its results are stored."""
+        conn = sqlite3.connect(':memory:')
+        create_all_tables(conn)
+        batch_function = MagicMock(side_effect=lambda texts: pd.DataFrame({
+            'distilbert_sentiment_label': ['Error' if text == 'broken' else 'Positive' for text in texts],
+            'distilbert_negative': [0.1] * len(texts),
+            'distilbert_positive': [0.9] * len(texts)
+        }))
+        model_function = MagicMock()
+        reviews = pd.DataFrame({'review_id': ['1', '2', 'x'], 'content': ['good', 'great', 'broken']})
+
+        first = analyze_sentiment_with_store(conn, reviews, 'DistilBERT', model_function, 'v1', batch_function=batch_function)
+        batch_function.assert_called_once_with(['good', 'great', 'broken'])
+        model_function.assert_not_called()
+        self.assertEqual(first['distilbert_sentiment_label'].tolist(), ['Positive', 'Positive', 'Error'])
+
+        analyze_sentiment_with_store(conn, reviews, 'DistilBERT', model_function, 'v1', batch_function=batch_function)
+        self.assertEqual(batch_function.call_args.args, (['broken'],), "Only the failed review should be analyzed again.")
+        conn.close()
+
+    def test_count_ngrams_in_chunks(self):
+        """Test counting n-grams over chunks without counting repeated content twice."""
+        chunks = [self.sample_data.iloc[:3], self.sample_data.iloc[2:]]
+        ngram_counts, word_counts, review_count = count_ngrams(iter_cleaned_chunks(chunks), 2)
+
+        self.assertEqual(review_count, 5)
+        self.assertEqual(word_counts['app'], 3)
+        self.assertEqual(ngram_counts['crashes frequently'], 1)
+        self.assertEqual(ngram_counts['could better'], 1, "Content repeated in a later chunk should be skipped.")
+
+    def test_iter_cleaned_chunks_skips_repeated_content(self):
+        """Test that each distinct stored content is kept once across chunks, whatever its case."""
+        reviews = pd.DataFrame({
+            'content': ['Great app', 'Great app', 'great app', 'Crashes', 'Great app'],
+            'score': [5, 5, 4, 1, 5],
+            'at': pd.date_range(start='2023-01-01', periods=5, freq='D'),
+            'app_version': ['1.0'] * 5
+        })
+        with patch('src.functions.app_analysis_functions.preprocess_text_simple', new=lambda text: text):
+            chunks = list(iter_cleaned_chunks([reviews.iloc[:3], reviews.iloc[3:]]))
+        self.assertEqual([chunk['content'].tolist() for chunk in chunks], [['great app', 'great app'], ['crashes']])
+
+        # The reviews of a phrase are deduplicated the same way as the counted reviews
+        with patch('src.functions.app_analysis_functions.preprocess_text_simple', new=lambda text: text):
+            related = find_reviews_with_ngram([reviews.iloc[:3], reviews.iloc[3:]], 'great app', columns=('content', 'score'))
+        self.assertEqual(related['score'].tolist(), [5, 4])
+
+    def test_search_and_select_app_stores_changed_apps_only(self):
+        """Test that repeated searches only write app metadata that changed."""
+        writer = MagicMock(db_path='search_and_select_app_test.db')
+        results = [{'appId': 'com.a', 'title': 'A', 'icon': 'a.png'}, {'appId': 'com.b', 'title': 'B', 'icon': 'b.png'}]
+        with patch('src.functions.scraper.select_app', side_effect=lambda query: [dict(app) for app in results]):
+            search_and_select_app('a', writer=writer)
+            search_and_select_app('a', writer=writer)
+            self.assertEqual(writer.write.call_count, 1, "Unchanged results should not be written again.")
+
+            results[1]['icon'] = 'new.png'
+            search_and_select_app('a', writer=writer)
+        self.assertEqual(writer.write.call_count, 2)
+        self.assertEqual(writer.write.call_args.args[1], [{'appId': 'com.b', 'title': 'B', 'icon': 'new.png'}])
+
+    def test_search_and_select_app_stores_searches_again_after_a_while(self):
+        """Test that what was stored is remembered per search and only as long as a cached search."""
+        writer = MagicMock(db_path='search_and_select_app_ttl_test.db')
+        results = [{'appId': 'com.a', 'title': 'A', 'icon': 'a.png'}]
+        with patch('src.functions.scraper.select_app', side_effect=lambda query: [dict(app) for app in results]):
+            search_and_select_app('a', writer=writer)
+            search_and_select_app('another', writer=writer)
+            self.assertEqual(writer.write.call_count, 2, "Another search should be stored on its own.")
+
+            with patch('src.functions.scraper.SEARCH_CACHE_TTL', 0):
+                search_and_select_app('a', writer=writer)
+            self.assertEqual(writer.write.call_count, 3, "An expired search should be stored again.")
+
+    def test_find_reviews_with_ngram(self):
+        """Test collecting the reviews containing a phrase from chunks."""
+        chunks = [self.sample_data.iloc[:3], self.sample_data.iloc[3:]]
+        related = find_reviews_with_ngram(chunks, 'app fantastic', columns=('content', 'score'))
+        self.assertEqual(related['content'].tolist(), ['this app is fantastic!'])
+        self.assertTrue(find_reviews_with_ngram(chunks, 'missing phrase').empty)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -2,10 +2,11 @@ import unittest
 from unittest.mock import patch, MagicMock
 import pandas as pd
 import datetime
+import sqlite3
 
+from src.functions.app_analysis_functions import create_tables
 from src.pages.app_analysis_page import (
     app_analysis_page,
-    display_reviews,
     preprocess_data
 )
 
@@ -33,8 +34,10 @@ class TestAppAnalysisPage(unittest.TestCase):
             'language': ['en', 'en', 'en']
         })
 
+    @patch('src.pages.app_analysis_page.sync_new_reviews')
+    @patch('src.pages.app_analysis_page.check_and_fetch_reviews')
+    @patch('src.pages.app_analysis_page.get_db_writer')
     @patch('src.pages.app_analysis_page.search_and_select_app')
-    @patch('src.pages.app_analysis_page.display_reviews')
     @patch('src.pages.app_analysis_page.create_tables')
     @patch('src.pages.app_analysis_page.get_db_connection')
     @patch('src.pages.app_analysis_page.st')
@@ -43,16 +46,19 @@ class TestAppAnalysisPage(unittest.TestCase):
         mock_st,                    
         mock_get_db_connection,       
         mock_create_tables,            
-        mock_display_reviews,       
-        mock_search_and_select_app    
+        mock_search_and_select_app,
+        mock_get_db_writer,
+        mock_check_and_fetch_reviews,
+        mock_sync_new_reviews
     ):
         """
         Test that app_analysis_page function can be called without errors.
         """
-        mock_conn = MagicMock()
-        mock_get_db_connection.return_value = mock_conn
-
-        mock_display_reviews.return_value = self.sample_reviews
+        # The page reads through the real queries, from an empty database; only the network and the
+        # process-wide connection manager are replaced
+        conn = sqlite3.connect(':memory:')
+        create_tables(conn)
+        mock_get_db_connection.return_value = conn
 
         mock_search_and_select_app.return_value = [
             {'title': 'TestApp', 'appId': 'test123', 'icon': 'testapp_icon.png'}
@@ -85,14 +91,12 @@ class TestAppAnalysisPage(unittest.TestCase):
         mock_st.session_state.__setitem__.side_effect = session_state_setitem
         mock_st.session_state.get.side_effect = session_state_get
 
-        try:
-            app_analysis_page()
-            success = True
-        except Exception as e:
-            success = False
-            print(f"Error running app_analysis_page: {e}")
+        app_analysis_page()
 
-        self.assertTrue(success, "app_analysis_page should run without errors")
+        mock_search_and_select_app.assert_called_once_with('TestApp', writer=mock_get_db_writer.return_value)
+        fetch_args = mock_check_and_fetch_reviews.call_args.args
+        self.assertEqual(fetch_args[:3], (conn, 'TestApp', 'test123'))
+        mock_sync_new_reviews.assert_not_called()
 
     @patch('src.pages.app_analysis_page.st')
     def test_preprocess_data(self, mock_st):
@@ -0,0 +1,157 @@
+import unittest
+import os
+import shutil
+import tempfile
+from importlib.util import find_spec
+from unittest.mock import patch
+
+import pandas as pd
+import torch
+from tokenizers import Tokenizer, models, pre_tokenizers
+from transformers import (
+    DistilBertConfig,
+    DistilBertForSequenceClassification,
+    PreTrainedTokenizerFast,
+    RobertaConfig,
+    RobertaForSequenceClassification,
+    pipeline
+)
+
+from src.models import roberta_model
+from src.models.backends import (
+    get_backend, model_revision, resolve_commit, quantize_int8, apply_backend, onnx_model_path
+)
+from src.models.backend_benchmark import compare_results
+
+# The onnx backend is optional; torch versions exporting with torch.export also need onnxscript
+HAS_ONNX = all(find_spec(module) is not None for module in ('onnx', 'onnxruntime', 'onnxscript'))
+
+
+class TestBackends(unittest.TestCase):
+    def test_get_backend(self):
+        """Test that the backend of a model is read from its environment variable."""
+        with patch.dict(os.environ, {'DISTILBERT_BACKEND': 'INT8'}):
+            self.assertEqual(get_backend('DistilBERT'), 'int8')
+            self.assertEqual(get_backend('RoBERTa'), 'torch')
+        with patch.dict(os.environ, {'ROBERTA_BACKEND': 'gpu'}):
+            with self.assertRaises(ValueError):
+                get_backend('RoBERTa')
+        self.assertEqual(model_revision('model', 'torch'), 'model')
+        self.assertEqual(model_revision('model', 'onnx'), 'model+onnx')
+
+    def test_model_revision_is_keyed_on_the_commit(self):
+        """Test that stored results are keyed on the Hub commit a revision resolves to."""
+        config = DistilBertConfig()
+        config._commit_hash = 'abc123'
+        with patch('src.models.backends.AutoConfig.from_pretrained', return_value=config) as from_pretrained:
+            commit = resolve_commit('org/model', 'main')
+        from_pretrained.assert_called_once_with('org/model', revision='main')
+        self.assertEqual(commit, 'abc123')
+        self.assertEqual(model_revision('org/model', 'torch', commit), 'org/model@abc123')
+        self.assertEqual(model_revision('org/model', 'int8', commit), 'org/model@abc123+int8')
+
+    def test_weights_are_loaded_from_the_resolved_commit(self):
+        """Test that the pipeline loads the commit its results are keyed on."""
+        roberta_model.get_model_commit.cache_clear()
+        self.addCleanup(roberta_model.get_model_commit.cache_clear)
+        with patch('src.models.roberta_model.resolve_commit', return_value='abc123') as resolve, \
+                patch('src.models.roberta_model.pipeline') as pipeline_factory:
+            roberta_model.load_classifier('torch')
+            self.assertEqual(roberta_model.get_model_revision(), f'{roberta_model.MODEL_NAME}@abc123')
+        resolve.assert_called_once_with(roberta_model.MODEL_NAME, roberta_model.HUB_REVISION)
+        self.assertEqual(pipeline_factory.call_args.kwargs['revision'], 'abc123')
+
+    def test_quantize_int8(self):
+        """Test that an int8 quantized model gives nearly the same logits as the original."""
+        config = DistilBertConfig(vocab_size=100, dim=32, hidden_dim=64, n_layers=2, n_heads=2)
+        model = DistilBertForSequenceClassification(config).eval()
+        quantized = quantize_int8(model)
+        input_ids = torch.randint(0, 100, (3, 7))
+
+        with torch.inference_mode():
+            expected = model(input_ids=input_ids).logits
+            result = quantized(input_ids=input_ids).logits
+        self.assertEqual(quantized.device, torch.device('cpu'))
+        self.assertTrue(torch.allclose(expected, result, atol=0.05))
+
+    def test_onnx_model_path(self):
+        """Test that exported graphs are kept per model id and Hub revision."""
+        config = DistilBertConfig(vocab_size=100, dim=32, hidden_dim=64, n_layers=2, n_heads=2)
+        model = DistilBertForSequenceClassification(config)
+        with patch('src.models.backends.ONNX_MODEL_DIR', 'exported'):
+            self.assertEqual(onnx_model_path(model, 'org/model'), os.path.join('exported', 'org--model', 'local.onnx'))
+            model.config._commit_hash = 'abc123'
+            self.assertEqual(onnx_model_path(model, 'org/model'), os.path.join('exported', 'org--model', 'abc123.onnx'))
+
+    @unittest.skipUnless(HAS_ONNX, "onnx, onnxruntime and onnxscript are not installed")
+    def test_onnx_export_and_load(self):
+        """Test that a model exported to ONNX and loaded back gives the logits of the PyTorch model."""
+        config = DistilBertConfig(vocab_size=100, dim=32, hidden_dim=64, n_layers=2, n_heads=2)
+        model = DistilBertForSequenceClassification(config).eval()
+        input_ids = torch.randint(0, 100, (3, 11))
+        attention_mask = torch.ones_like(input_ids)
+        attention_mask[0, 5:] = 0
+
+        directory = tempfile.mkdtemp()
+        try:
+            with patch('src.models.backends.ONNX_MODEL_DIR', directory):
+                exported = apply_backend(model, 'onnx', 'test/distilbert')
+                self.assertTrue(os.path.exists(os.path.join(directory, 'test--distilbert', 'local.onnx')))
+                # A second load reuses the exported graph
+                loaded = apply_backend(model, 'onnx', 'test/distilbert')
+            with torch.inference_mode():
+                expected = model(input_ids=input_ids, attention_mask=attention_mask).logits
+            for onnx_model in (exported, loaded):
+                result = onnx_model(input_ids=input_ids, attention_mask=attention_mask).logits
+                self.assertTrue(torch.allclose(expected, result, atol=1e-4))
+        finally:
+            shutil.rmtree(directory)
+
+    @unittest.skipUnless(HAS_ONNX, "onnx, onnxruntime and onnxscript are not installed")
+    def test_onnx_model_in_pipeline(self):
+        """Test that analyze_sentiment_roberta runs with the pipeline's model replaced by its ONNX export."""
+        vocab = {'<s>': 0, '<pad>': 1, '</s>': 2, '<unk>': 3, 'good': 4, 'bad': 5, 'app': 6}
+        word_tokenizer = Tokenizer(models.WordLevel(vocab, unk_token='<unk>'))
+        word_tokenizer.pre_tokenizer = pre_tokenizers.Whitespace()
+        tokenizer = PreTrainedTokenizerFast(
+            tokenizer_object=word_tokenizer, pad_token='<pad>', unk_token='<unk>', model_max_length=16,
+            model_input_names=['input_ids', 'attention_mask']
+        )
+        config = RobertaConfig(
+            vocab_size=len(vocab), hidden_size=32, intermediate_size=64, num_hidden_layers=2, num_attention_heads=2,
+            max_position_embeddings=20, num_labels=3
+        )
+        model = RobertaForSequenceClassification(config).eval()
+        classifier = pipeline('sentiment-analysis', model=model, tokenizer=tokenizer, device=-1)
+
+        directory = tempfile.mkdtemp()
+        try:
+            with patch.object(roberta_model, 'classifier', classifier):
+                reference = roberta_model.analyze_sentiment_roberta('good app')
+                with patch('src.models.backends.ONNX_MODEL_DIR', directory):
+                    classifier.model = apply_backend(model, 'onnx', 'test/roberta')
+                result = roberta_model.analyze_sentiment_roberta('good app')
+        finally:
+            shutil.rmtree(directory)
+        self.assertNotEqual(result['roberta_sentiment_label'], 'Error')
+        self.assertEqual(result['roberta_sentiment_label'], reference['roberta_sentiment_label'])
+        self.assertAlmostEqual(result['roberta_positive'], reference['roberta_positive'], places=4)
+
+    def test_compare_results(self):
+        """Test the label agreement and largest probability difference of two runs."""
+        reference = pd.DataFrame({
+            'distilbert_sentiment_label': ['Positive', 'Negative', 'Positive'],
+            'distilbert_negative': [0.1, 0.9, 0.4],
+            'distilbert_positive': [0.9, 0.1, 0.6]
+        })
+        candidate = reference.assign(
+            distilbert_sentiment_label=['Positive', 'Negative', 'Negative'],
+            distilbert_negative=[0.1, 0.9, 0.55],
+            distilbert_positive=[0.9, 0.1, 0.45]
+        )
+        label_agreement, max_difference = compare_results(reference, candidate, 'distilbert')
+        self.assertAlmostEqual(label_agreement, 2 / 3)
+        self.assertAlmostEqual(max_difference, 0.15)
+
+if __name__ == '__main__':
+    unittest.main()
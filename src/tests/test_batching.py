@@ -0,0 +1,77 @@
+import unittest
+
+import numpy as np
+
+from src.models.batching import PaddingStats, plan_batches, predict_in_batches
+
+
+class FakeTokenizer:
+    """One token per word; pad returns the word counts of the batch and its padded width."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, text, **kwargs):
+        self.calls.append(text)
+        texts = text if isinstance(text, list) else [text]
+        if any('bad' in item for item in texts):
+            raise ValueError("Cannot tokenize.")
+        input_ids = [item.split() for item in texts]
+        return {'input_ids': input_ids if isinstance(text, list) else input_ids[0]}
+
+    def pad(self, encodings, **kwargs):
+        return [len(encoding['input_ids']) for encoding in encodings]
+
+
+class TestBatching(unittest.TestCase):
+    def test_plan_batches(self):
+        """Test that texts are sorted by length and batched under the token budget and row limit."""
+        lengths = [10, 2, 8, 3, 2, 40]
+        self.assertEqual(plan_batches(lengths, max_batch_tokens=20), [[1, 4, 3], [2, 0], [5]])
+        self.assertEqual(plan_batches(lengths, max_batch_tokens=20, max_batch_size=2), [[1, 4], [3, 2], [0], [5]])
+        self.assertEqual(plan_batches([]), [])
+
+    def test_padding_stats(self):
+        """Test the share of padded positions holding real tokens."""
+        stats = PaddingStats()
+        self.assertEqual(stats.efficiency, 1.0)
+        stats.record_batch([2, 2, 4])
+        self.assertEqual(stats.as_dict(), {
+            'batches': 1, 'texts': 3, 'tokens': 8, 'padded_tokens': 12, 'efficiency': 8 / 12
+        })
+        total = PaddingStats()
+        total.update(stats)
+        total.update(stats)
+        self.assertEqual((total.batches, total.texts, total.padded_tokens), (2, 6, 24))
+
+    def test_predict_in_batches(self):
+        """Test that outputs are returned in the order of the texts and failures only affect their text."""
+        def predict(word_counts):
+            if 4 in word_counts:
+                raise RuntimeError("Batch failed.")
+            return np.array([[count] for count in word_counts])
+
+        texts = ['a b c', 'a', None, 'a b', 'a b c d', 'a b c d e']
+        stats = PaddingStats()
+        outputs = predict_in_batches(FakeTokenizer(), texts, predict, max_batch_tokens=10, stats=stats)
+
+        self.assertEqual([output[0] if output is not None else None for output in outputs], [3, 1, None, 2, None, 5])
+        self.assertEqual(stats.texts, 4, "Only the texts of the batches that ran should be recorded.")
+
+    def test_texts_are_tokenized_in_one_call(self):
+        """Test that the texts are tokenized together, and one at a time only when that fails."""
+        def predict(word_counts):
+            return np.array([[count] for count in word_counts])
+
+        tokenizer = FakeTokenizer()
+        outputs = predict_in_batches(tokenizer, ['a b', 'a', None], predict)
+        self.assertEqual([output[0] if output is not None else None for output in outputs], [2, 1, None])
+        self.assertEqual(tokenizer.calls, [['a b', 'a']])
+
+        tokenizer = FakeTokenizer()
+        outputs = predict_in_batches(tokenizer, ['a b', 'bad text', 'a'], predict)
+        self.assertEqual([output[0] if output is not None else None for output in outputs], [2, None, 1])
+        self.assertEqual(tokenizer.calls, [['a b', 'bad text', 'a'], 'a b', 'bad text', 'a'])
+
+if __name__ == '__main__':
+    unittest.main()
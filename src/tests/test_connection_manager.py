@@ -0,0 +1,67 @@
+import unittest
+import os
+import sqlite3
+import tempfile
+import threading
+
+from src.database_connection.connection_manager import ConnectionManager, run_write
+from src.database_connection.db_utils import get_app_data, insert_review_rows, get_schema_version, MIGRATIONS
+from src.tests.factories import make_review_row
+
+
+class TestConnectionManager(unittest.TestCase):
+    def setUp(self):
+        handle, self.db_path = tempfile.mkstemp(suffix='.db')
+        os.close(handle)
+        self.manager = ConnectionManager(self.db_path, read_pool_size=2)
+
+    def tearDown(self):
+        self.manager.close()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.db_path + suffix):
+                os.remove(self.db_path + suffix)
+
+    def test_readers_are_pooled_and_read_only(self):
+        """Test that the schema is migrated once and closed readers are reused without being able to write."""
+        with self.manager.reader() as conn:
+            self.assertEqual(get_schema_version(conn), len(MIGRATIONS))
+            with self.assertRaises(sqlite3.OperationalError):
+                insert_review_rows(conn, [make_review_row('1')])
+        with self.manager.reader() as second_conn:
+            self.assertIs(second_conn, conn, "A closed reader should be handed out again.")
+            with self.manager.reader() as third_conn:
+                self.assertIsNot(third_conn, second_conn, "Readers in use should not be shared.")
+
+        stats = self.manager.stats.as_dict()
+        self.assertEqual((stats['reads'], stats['connections_opened']), (3, 2))
+
+    def test_concurrent_writes_are_serialized(self):
+        """Test that writes from many threads go through the writer without lock errors and are visible to readers."""
+        def write_reviews(thread_index):
+            for review_index in range(10):
+                self.manager.write(insert_review_rows, [make_review_row(f'{thread_index}-{review_index}')])
+
+        threads = [threading.Thread(target=write_reviews, args=(index,)) for index in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        with self.manager.reader() as conn:
+            self.assertEqual(len(get_app_data(conn, 'testapp.app')), 80)
+        stats = self.manager.stats.as_dict()
+        self.assertEqual(stats['writes'], 81, "The migration and every insert should be counted.")
+        self.assertEqual(stats['lock_errors'], 0)
+        self.assertGreaterEqual(stats['max_write_wait_seconds'], 0)
+
+    def test_run_write(self):
+        """Test that writes run on the writer when one is given and on the connection otherwise."""
+        self.assertEqual(run_write(None, self.manager.writer, insert_review_rows, [make_review_row('1')]), 1)
+        conn = sqlite3.connect(self.db_path)
+        self.assertEqual(run_write(conn, None, insert_review_rows, [make_review_row('2')]), 1)
+        conn.close()
+        with self.manager.reader() as conn:
+            self.assertEqual(len(get_app_data(conn, 'testapp.app')), 2)
+
+if __name__ == '__main__':
+    unittest.main()
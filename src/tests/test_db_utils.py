@@ -2,13 +2,41 @@ import unittest
 import sqlite3
 import pandas as pd
 import datetime
+import os
+import tempfile
+from unittest.mock import patch
 
 from src.database_connection.db_utils import (
     create_reviews_table,
     get_app_data,
     get_reviews_for_app,
     insert_reviews,
-    get_reviews_date_ranges
+    insert_review_rows,
+    get_reviews_date_ranges,
+    create_coverage_table,
+    get_fetched_ranges,
+    record_fetched_range,
+    create_apps_table,
+    save_apps,
+    get_app,
+    get_db_connection,
+    create_all_tables,
+    migrate,
+    get_schema_version,
+    explain_query_plan,
+    get_daily_app_stats,
+    search_reviews,
+    count_reviews,
+    to_fts_query,
+    get_review_date_bounds,
+    iter_app_data,
+    to_epoch_seconds,
+    APP_KEY_BY_ID,
+    cached_app_query,
+    clear_query_cache,
+    get_ingest_generation,
+    MIGRATIONS,
+    REVIEWS_TABLE_DEFINITION
 )
 
 class TestDBUtils(unittest.TestCase):
@@ -34,6 +62,7 @@ class TestDBUtils(unittest.TestCase):
             'replied_at': [None, datetime.datetime(2023, 11, 16), None],
             'app_version': ['1.0', '1.1', '1.2'],
             'app_name': ['TestApp', 'TestApp', 'TestApp'],
+            'app_id': ['test.app', 'test.app', 'test.app'],
             'country': ['us', 'us', 'us'],
             'language': ['en', 'en', 'en']
         })
@@ -54,7 +83,7 @@ class TestDBUtils(unittest.TestCase):
 
     def test_get_app_data(self):
         """Test fetching all data for a specific app."""
-        retrieved_data = get_app_data(self.conn, 'TestApp')
+        retrieved_data = get_app_data(self.conn, 'test.app')
         self.assertEqual(len(retrieved_data), 3)
         
         expected_contents = [
@@ -77,7 +106,7 @@ class TestDBUtils(unittest.TestCase):
         """Test fetching reviews within a date range."""
         start_date = '2023-11-01'
         end_date = '2023-11-30'
-        retrieved_data = get_reviews_for_app(self.conn, 'TestApp', start_date, end_date)
+        retrieved_data = get_reviews_for_app(self.conn, 'test.app', start_date, end_date)
         self.assertEqual(len(retrieved_data), 2)
         expected_contents = ['Not bad', 'Great app!']
         self.assertListEqual(
@@ -88,7 +117,7 @@ class TestDBUtils(unittest.TestCase):
 
     def test_get_reviews_date_ranges(self):
         """Test fetching distinct review dates for an app."""
-        retrieved_dates = get_reviews_date_ranges(self.conn, 'TestApp')
+        retrieved_dates = get_reviews_date_ranges(self.conn, 'test.app')
         expected_dates = {'2023-11-01', '2023-11-15', '2023-12-01'}
         self.assertSetEqual(
             set(retrieved_dates),
@@ -99,7 +128,7 @@ class TestDBUtils(unittest.TestCase):
     def test_insert_reviews_duplicate(self):
         """Test that inserting duplicate reviews does not cause errors and duplicates are not added."""
         insert_reviews(self.conn, self.sample_reviews)
-        retrieved_data = get_app_data(self.conn, 'TestApp')
+        retrieved_data = get_app_data(self.conn, 'test.app')
         self.assertEqual(len(retrieved_data), 3, "Should still have 3 reviews, no duplicates added.")
 
     def test_insert_reviews_new(self):
@@ -117,13 +146,400 @@ class TestDBUtils(unittest.TestCase):
             'replied_at': [datetime.datetime(2023, 12, 6)],
             'app_version': ['1.3'],
             'app_name': ['TestApp'],
+            'app_id': ['test.app'],
             'country': ['us'],
             'language': ['en']
         })
         insert_reviews(self.conn, new_reviews)
-        retrieved_data = get_app_data(self.conn, 'TestApp')
+        retrieved_data = get_app_data(self.conn, 'test.app')
         self.assertEqual(len(retrieved_data), 4, "Should have 4 reviews after inserting a new one.")
         self.assertIn('Excellent!', retrieved_data['content'].tolist(), "New review content should be present.")
 
+    def test_insert_review_rows(self):
+        """Test bulk-inserting row tuples and counting only new rows."""
+        rows = [
+            ('3', 'User3', 'image3.png', 'Needs improvement', 2, 1, '1.2', to_epoch_seconds('2023-12-01'), None, None, '1.2', 'TestApp', 'test.app', 'us', 'en'),
+            ('5', 'User5', 'image5.png', 'Works fine', 4, 0, '1.4', to_epoch_seconds('2023-12-10'), None, None, '1.4', 'TestApp', 'test.app', 'us', 'en'),
+        ]
+        inserted = insert_review_rows(self.conn, rows)
+        self.assertEqual(inserted, 1, "Only the review that is not stored yet should be inserted.")
+        retrieved_data = get_app_data(self.conn, 'test.app')
+        self.assertEqual(len(retrieved_data), 4)
+
+    def test_record_fetched_range_merges_intervals(self):
+        """Test that overlapping and adjacent fetched intervals are merged into one."""
+        create_coverage_table(self.conn)
+        end_of_day = datetime.time(23, 59, 59, 999999)
+        record_fetched_range(self.conn, 'test.app', 'us', 'en',
+                             datetime.datetime(2023, 11, 1), datetime.datetime.combine(datetime.date(2023, 11, 5), end_of_day))
+        record_fetched_range(self.conn, 'test.app', 'us', 'en',
+                             datetime.datetime(2023, 11, 10), datetime.datetime.combine(datetime.date(2023, 11, 12), end_of_day))
+        self.assertEqual(len(get_fetched_ranges(self.conn, 'test.app', 'us', 'en')), 2)
+
+        record_fetched_range(self.conn, 'test.app', 'us', 'en',
+                             datetime.datetime(2023, 11, 6), datetime.datetime.combine(datetime.date(2023, 11, 9), end_of_day))
+        self.assertEqual(
+            get_fetched_ranges(self.conn, 'test.app', 'us', 'en'),
+            [(datetime.datetime(2023, 11, 1), datetime.datetime.combine(datetime.date(2023, 11, 12), end_of_day))]
+        )
+        self.assertEqual(get_fetched_ranges(self.conn, 'test.app', 'us', 'de'), [])
+
+    def test_save_apps(self):
+        """Test that search results are stored and updated in the apps table."""
+        create_apps_table(self.conn)
+        save_apps(self.conn, [{'appId': 'test.app', 'title': 'Test App', 'icon': 'old.png'}, {'title': 'No id'}])
+        save_apps(self.conn, [{'appId': 'test.app', 'title': 'Test App', 'icon': 'new.png'}])
+
+        self.assertEqual(get_app(self.conn, 'test.app'), {'appId': 'test.app', 'title': 'Test App', 'icon': 'new.png'})
+        self.assertIsNone(get_app(self.conn, 'missing.app'))
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM apps")
+        self.assertEqual(cursor.fetchone()[0], 1)
+        cursor.close()
+
+    def test_migrate(self):
+        """Test that migrations bring an existing database up to date once."""
+        self.assertEqual(get_schema_version(self.conn), 0)
+        self.assertEqual(migrate(self.conn), len(MIGRATIONS))
+        self.assertEqual(migrate(self.conn), len(MIGRATIONS), "Migrating again should change nothing.")
+
+        # Existing reviews are kept
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM app_reviews")
+        self.assertEqual(cursor.fetchone()[0], 3)
+        cursor.close()
+
+    def make_legacy_database(self):
+        conn = sqlite3.connect(':memory:')
+        conn.execute('''
+            CREATE TABLE app_reviews (
+                review_id TEXT PRIMARY KEY, user_name TEXT, user_image TEXT, content TEXT, score INTEGER,
+                thumbs_up_count INTEGER, review_created_version TEXT, at TIMESTAMP, reply_content TEXT,
+                replied_at TIMESTAMP, app_version TEXT, app_name TEXT, country TEXT, language TEXT
+            )
+        ''')
+        conn.executemany(
+            "INSERT INTO app_reviews (review_id, content, score, at, replied_at, app_name, country, language) VALUES (?, ?, ?, ?, ?, ?, 'us', 'en')",
+            [('1', 'Crashes on start', 1, '2023-11-01', None, 'TestApp'),
+             ('2', 'Works well', 5, '2023-11-02T10:30:00', '2023-11-03T08:00:00', 'TestApp'),
+             ('3', 'Crashes too', 2, '2023-11-02', None, 'OtherApp')]
+        )
+        # Version 5 had the indexes, aggregates and full-text index of the legacy layout
+        conn.execute("CREATE INDEX idx_app_reviews_app_name_at ON app_reviews (app_name, at)")
+        conn.execute("CREATE TABLE daily_app_stats (app_name TEXT, country TEXT, language TEXT, date TEXT)")
+        conn.execute("PRAGMA user_version = 5")
+        conn.commit()
+        return conn
+
+    def test_migrate_converts_legacy_reviews(self):
+        """Test that reviews stored with app names and ISO times are converted to app keys and epoch seconds."""
+        conn = self.make_legacy_database()
+        self.assertEqual(migrate(conn), len(MIGRATIONS))
+        self.assertEqual(conn.execute("SELECT DISTINCT typeof(at) FROM app_reviews").fetchall(), [('integer',)])
+        # Until an app is scraped again, its converted reviews are stored under its name as id
+        reviews = get_app_data(conn, 'TestApp')
+        self.assertEqual(reviews['review_id'].tolist(), ['2', '1'])
+        self.assertEqual(reviews['at'].iloc[0], pd.Timestamp(2023, 11, 2, 10, 30))
+        self.assertEqual(reviews['replied_at'].iloc[0], pd.Timestamp(2023, 11, 3, 8, 0))
+        self.assertEqual(reviews['app_name'].tolist(), ['TestApp', 'TestApp'])
+        self.assertEqual(search_reviews(conn, 'OtherApp', 'crashes')['review_id'].tolist(), ['3'])
+        self.assertEqual(get_daily_app_stats(conn, 'TestApp')['review_count'].tolist(), [1, 1])
+
+        # The app takes over its store id when it is scraped again
+        insert_review_rows(conn, [
+            ('4', None, None, 'New review', 4, 0, None, to_epoch_seconds('2023-12-01'), None, None, None, 'TestApp', 'test.app', 'us', 'en')
+        ])
+        self.assertEqual(get_app(conn, 'test.app')['title'], 'TestApp')
+        self.assertEqual(get_app_data(conn, 'test.app')['review_id'].tolist(), ['4', '2', '1'])
+        conn.close()
+
+    def test_legacy_app_searched_before_scraped(self):
+        """Test that converted reviews are merged into an app searched under its store id before it is scraped."""
+        conn = self.make_legacy_database()
+        migrate(conn)
+        save_apps(conn, [
+            {'appId': 'test.app', 'title': 'TestApp', 'icon': 'icon.png'},
+            {'appId': 'other.app', 'title': 'OtherApp'},
+            {'appId': 'another.other.app', 'title': 'OtherApp'}
+        ])
+        self.assertEqual(get_app_data(conn, 'test.app')['review_id'].tolist(), ['2', '1'])
+        self.assertIsNone(get_app(conn, 'TestApp'))
+        self.assertIsNotNone(get_app(conn, 'OtherApp'), "An ambiguous title should not be merged.")
+        conn.close()
+
+        # When the search could not tell which result the converted app is, the store id already has a row by the
+        # time the app is scraped, and the converted reviews are moved to it
+        conn = self.make_legacy_database()
+        migrate(conn)
+        save_apps(conn, [
+            {'appId': 'test.app', 'title': 'TestApp', 'icon': 'icon.png'},
+            {'appId': 'copy.of.test.app', 'title': 'TestApp'}
+        ])
+        self.assertEqual(get_app_data(conn, 'TestApp')['review_id'].tolist(), ['2', '1'])
+        generation = get_ingest_generation(conn, 'test.app')
+        insert_review_rows(conn, [
+            ('4', None, None, 'New review', 4, 0, None, to_epoch_seconds('2023-12-01'), None, None, None, 'TestApp', 'test.app', 'us', 'en')
+        ])
+        self.assertEqual(get_app_data(conn, 'test.app')['review_id'].tolist(), ['4', '2', '1'])
+        self.assertEqual(search_reviews(conn, 'test.app', 'crashes')['review_id'].tolist(), ['1'])
+        self.assertEqual(get_daily_app_stats(conn, 'test.app')['review_count'].tolist(), [1, 1, 1])
+        self.assertGreater(get_ingest_generation(conn, 'test.app'), generation)
+        self.assertIsNone(get_app(conn, 'TestApp'))
+        self.assertEqual(get_app(conn, 'test.app')['icon'], 'icon.png')
+        conn.close()
+
+    def test_apps_with_the_same_name_are_stored_apart(self):
+        """Test that reviews of two store apps sharing a name keep their own app keys."""
+        create_all_tables(self.conn)
+        insert_review_rows(self.conn, [
+            ('4', None, None, 'First notes app', 4, 0, None, to_epoch_seconds('2023-12-01'), None, None, None, 'Notes', 'com.first.notes', 'us', 'en'),
+        ])
+        insert_review_rows(self.conn, [
+            ('5', None, None, 'Second notes app', 2, 0, None, to_epoch_seconds('2023-12-02'), None, None, None, 'Notes', 'com.second.notes', 'us', 'en'),
+        ])
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT COUNT(DISTINCT app_key) FROM app_reviews WHERE review_id IN ('4', '5')")
+        self.assertEqual(cursor.fetchone()[0], 2)
+        cursor.close()
+        self.assertEqual(get_app_data(self.conn, 'com.first.notes')['review_id'].tolist(), ['4'])
+        self.assertEqual(get_app_data(self.conn, 'com.second.notes')['review_id'].tolist(), ['5'])
+
+    def test_readers_are_keyed_by_app_id(self):
+        """Test that reading an app is not affected by searches for other apps with the same title."""
+        create_all_tables(self.conn)
+        search_results = [{'appId': 'com.a', 'title': 'Netflix'}, {'appId': 'com.b', 'title': 'Netflix'}]
+        save_apps(self.conn, search_results)
+        insert_review_rows(self.conn, [
+            ('4', None, None, 'Good', 5, 0, None, to_epoch_seconds('2023-12-01'), None, None, None, 'Netflix', 'com.a', 'us', 'en'),
+        ])
+        self.assertEqual(len(get_app_data(self.conn, 'com.a')), 1)
+        save_apps(self.conn, search_results)
+        self.assertEqual(len(get_app_data(self.conn, 'com.a')), 1)
+        self.assertTrue(get_app_data(self.conn, 'com.b').empty)
+        self.assertEqual(count_reviews(self.conn, 'com.a'), 1)
+        self.assertIsNotNone(get_review_date_bounds(self.conn, 'com.a'))
+        self.assertIsNone(get_review_date_bounds(self.conn, 'com.b'))
+
+    def test_app_queries_use_indexes(self):
+        """Test that reading an app's reviews for a date range does not scan the whole table."""
+        create_all_tables(self.conn)
+        plan = explain_query_plan(
+            self.conn,
+            f"SELECT * FROM app_reviews WHERE app_key = {APP_KEY_BY_ID} AND at >= ? AND at < ? ORDER BY at DESC",
+            ('test.app', to_epoch_seconds('2023-11-01'), to_epoch_seconds('2023-12-01'))
+        )
+        self.assertTrue(any('USING INDEX idx_app_reviews_app_key_at' in line for line in plan), plan)
+        self.assertTrue(any('USING COVERING INDEX sqlite_autoindex_apps_1' in line for line in plan), plan)
+        self.assertFalse(any('TEMP B-TREE' in line for line in plan), plan)
+
+        plan = explain_query_plan(
+            self.conn,
+            f"SELECT COUNT(*) FROM app_reviews WHERE app_key = {APP_KEY_BY_ID} AND score = ? AND at >= ?",
+            ('test.app', 5, to_epoch_seconds('2023-11-01'))
+        )
+        self.assertTrue(any('idx_app_reviews_app_key_score_at' in line for line in plan), plan)
+
+    def test_get_db_connection_uses_wal(self):
+        """Test that file databases are opened in WAL mode."""
+        handle, db_path = tempfile.mkstemp(suffix='.db')
+        os.close(handle)
+        try:
+            conn = get_db_connection(db_path)
+            self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], 'wal')
+            conn.close()
+        finally:
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(db_path + suffix):
+                    os.remove(db_path + suffix)
+
+    def test_daily_app_stats(self):
+        """Test that per-day counts are backfilled on migration and updated by inserts."""
+        create_all_tables(self.conn)
+        insert_review_rows(self.conn, [
+            ('4', 'User4', None, 'Meh', 3, 0, '1.2', to_epoch_seconds('2023-12-01'), None, None, '1.2', 'TestApp', 'test.app', 'us', 'en'),
+            # Duplicates are ignored and must not be counted twice
+            ('3', 'User3', None, 'Needs improvement', 2, 1, '1.2', to_epoch_seconds('2023-12-01'), None, None, '1.2', 'TestApp', 'test.app', 'us', 'en'),
+        ])
+
+        daily_stats = get_daily_app_stats(self.conn, 'test.app')
+        self.assertEqual(daily_stats['date'].tolist(), [
+            datetime.date(2023, 11, 1), datetime.date(2023, 11, 15), datetime.date(2023, 12, 1)
+        ])
+        last_day = daily_stats.iloc[-1]
+        self.assertEqual(last_day['review_count'], 2)
+        self.assertEqual(last_day['score_sum'], 5)
+        self.assertEqual((last_day['score_2'], last_day['score_3'], last_day['score_5']), (1, 1, 0))
+
+        daily_stats = get_daily_app_stats(self.conn, 'test.app', datetime.date(2023, 11, 10), datetime.datetime(2023, 11, 30, 23, 59))
+        self.assertEqual(daily_stats['review_count'].tolist(), [1])
+
+    def test_search_reviews(self):
+        """Test full-text search of reviews kept in sync with inserts."""
+        create_all_tables(self.conn)
+        insert_review_rows(self.conn, [
+            ('4', 'User4', None, "App keeps crashing, can't log in", 1, 0, '1.2', to_epoch_seconds('2023-12-01'), None, None, '1.2', 'TestApp', 'test.app', 'us', 'en'),
+            ('5', 'User5', None, 'Crashing all the time', 2, 0, '1.2', to_epoch_seconds('2023-12-02'), None, None, '1.2', 'TestApp', 'test.app', 'us', 'en'),
+            ('6', 'User6', None, 'Crashing for me too', 1, 0, '1.2', to_epoch_seconds('2023-12-02'), None, None, '1.2', 'OtherApp', 'other.app', 'us', 'en'),
+        ])
+
+        results = search_reviews(self.conn, 'test.app', to_fts_query('crashing'))
+        self.assertEqual(results['review_id'].tolist(), ['5', '4'])
+        self.assertEqual(search_reviews(self.conn, 'test.app', to_fts_query('keeps crashing'))['review_id'].tolist(), ['4'])
+        self.assertEqual(search_reviews(self.conn, 'test.app', to_fts_query("can't"))['review_id'].tolist(), ['4'])
+        self.assertEqual(search_reviews(self.conn, 'test.app', 'crashing NOT log')['review_id'].tolist(), ['5'])
+        self.assertEqual(search_reviews(self.conn, 'test.app', 'improvement OR great')['review_id'].tolist(), ['3', '1'])
+        self.assertEqual(
+            search_reviews(self.conn, 'test.app', 'crash*', start_date=datetime.date(2023, 12, 2), scores=[1, 2])['review_id'].tolist(),
+            ['5']
+        )
+        self.assertEqual(count_reviews(self.conn, 'test.app', end_date=datetime.date(2023, 12, 1)), 4)
+        self.assertEqual(count_reviews(self.conn, 'test.app', scores=[1]), 1)
+
+    def test_count_and_search_analyzed_reviews(self):
+        """Test that reviews dropped by preprocessing are neither counted nor found, and contents count once."""
+        create_all_tables(self.conn)
+        insert_review_rows(self.conn, [
+            ('4', None, None, 'Great app!', 5, 0, None, to_epoch_seconds('2023-12-02'), None, None, None, 'TestApp', 'test.app', 'us', 'en'),
+            ('5', None, None, 'Great app! ' * 50, 5, 0, None, to_epoch_seconds('2023-12-02'), None, None, None, 'TestApp', 'test.app', 'us', 'en'),
+            ('6', None, None, 'Great app, no score', None, 0, None, to_epoch_seconds('2023-12-02'), None, None, None, 'TestApp', 'test.app', 'us', 'en'),
+        ])
+        self.assertEqual(count_reviews(self.conn, 'test.app'), 3)
+        self.assertEqual(search_reviews(self.conn, 'test.app', to_fts_query('great'))['content'].tolist(), ['Great app!'])
+
+    def test_search_reviews_after_vacuum(self):
+        """Test that the full-text index still finds the right reviews after deletes and VACUUM."""
+        create_all_tables(self.conn)
+        with self.conn:
+            self.conn.execute("DELETE FROM app_reviews WHERE review_id = '1'")
+        self.conn.execute("VACUUM")
+        insert_review_rows(self.conn, [
+            ('4', None, None, 'Great again', 5, 0, None, to_epoch_seconds('2023-12-02'), None, None, None, 'TestApp', 'test.app', 'us', 'en'),
+        ])
+        self.assertEqual(search_reviews(self.conn, 'test.app', 'improvement')['review_id'].tolist(), ['3'])
+        self.assertEqual(search_reviews(self.conn, 'test.app', 'great')['review_id'].tolist(), ['4'])
+        self.assertEqual(self.conn.execute("SELECT MIN(id) FROM app_reviews").fetchone()[0], 2)
+
+    def test_migrate_adds_review_key(self):
+        """Test that reviews keyed only by review_id get an integer id and a full-text index built on it."""
+        conn = sqlite3.connect(':memory:')
+        create_apps_table(conn)
+        unkeyed_definition = REVIEWS_TABLE_DEFINITION.replace('id INTEGER PRIMARY KEY AUTOINCREMENT,', '')
+        conn.execute(f"CREATE TABLE app_reviews ({unkeyed_definition.replace('NOT NULL UNIQUE', 'PRIMARY KEY')})")
+        for migration in MIGRATIONS[:4] + MIGRATIONS[6:7]:
+            migration(conn)
+        # Version 7 indexed the implicit rowid
+        conn.execute("CREATE VIRTUAL TABLE app_reviews_fts USING fts5(content, content='app_reviews', content_rowid='rowid')")
+        conn.execute("PRAGMA user_version = 7")
+        insert_review_rows(conn, [
+            ('b', None, None, 'Crashes on start', 1, 0, None, to_epoch_seconds('2023-11-01'), None, None, None, 'TestApp', 'test.app', 'us', 'en'),
+            ('a', None, None, 'Works well', 5, 0, None, to_epoch_seconds('2023-11-02'), None, None, None, 'TestApp', 'test.app', 'us', 'en'),
+        ])
+
+        self.assertEqual(migrate(conn), len(MIGRATIONS))
+        self.assertEqual(conn.execute("SELECT review_id FROM app_reviews ORDER BY id").fetchall(), [('b',), ('a',)])
+        self.assertEqual(search_reviews(conn, 'test.app', 'crashes')['review_id'].tolist(), ['b'])
+        self.assertEqual(get_daily_app_stats(conn, 'test.app')['review_count'].tolist(), [1, 1])
+        conn.close()
+
+    def test_to_fts_query(self):
+        """Test that plain text becomes a phrase and query syntax is kept."""
+        self.assertEqual(to_fts_query(' bug '), '"bug"')
+        self.assertEqual(to_fts_query('say "hi"'), 'say "hi"')
+        self.assertEqual(to_fts_query('crash OR freeze'), 'crash OR freeze')
+        self.assertEqual(to_fts_query('crash*'), 'crash*')
+
+    def test_get_app_data_pushes_filters_into_sql(self):
+        """Test filtering by days and scores, selecting columns and limiting rows in SQL."""
+        retrieved_data = get_app_data(
+            self.conn, 'test.app', datetime.date(2023, 11, 1), datetime.date(2023, 11, 15), scores=[4, 5],
+            columns=['review_id', 'score']
+        )
+        self.assertEqual(list(retrieved_data.columns), ['review_id', 'score'])
+        self.assertEqual(retrieved_data['review_id'].tolist(), ['2', '1'], "Both end days should be included.")
+
+        self.assertEqual(get_app_data(self.conn, 'test.app', limit=1)['review_id'].tolist(), ['3'])
+        self.assertTrue(get_app_data(self.conn, 'test.app', scores=[]).empty)
+        with self.assertRaises(ValueError):
+            get_app_data(self.conn, 'test.app', columns=['content; DROP TABLE app_reviews'])
+
+    def test_get_review_date_bounds(self):
+        """Test reading the first and last review day of an app."""
+        self.assertEqual(
+            get_review_date_bounds(self.conn, 'test.app'),
+            (datetime.date(2023, 11, 1), datetime.date(2023, 12, 1))
+        )
+        self.assertIsNone(get_review_date_bounds(self.conn, 'NonExistentApp'))
+
+    def test_iter_app_data(self):
+        """Test that chunks cover every matching review once, newest first, including reviews sharing a day."""
+        insert_review_rows(self.conn, [
+            (str(i), f'User{i}', None, f'Review {i}', 3, 0, '1.0', to_epoch_seconds('2023-11-15'), None, None, '1.0', 'TestApp', 'test.app', 'us', 'en')
+            for i in range(4, 9)
+        ])
+        chunks = list(iter_app_data(self.conn, 'test.app', columns=['content', 'score'], chunk_size=3))
+
+        self.assertEqual([len(chunk) for chunk in chunks], [3, 3, 2])
+        self.assertEqual(list(chunks[0].columns), ['content', 'score'])
+        self.assertEqual(str(chunks[0]['score'].dtype), 'Int64')
+        contents = pd.concat(chunks)['content'].tolist()
+        self.assertEqual(len(set(contents)), 8)
+        self.assertEqual(contents[0], 'Needs improvement')
+        self.assertEqual(contents[-1], 'Great app!')
+
+        chunks = list(iter_app_data(self.conn, 'test.app', scores=[3], chunk_size=5))
+        self.assertEqual([len(chunk) for chunk in chunks], [5])
+
+    def test_cached_app_query(self):
+        """Test that cached results are reused until new reviews of the app are stored."""
+        handle, db_path = tempfile.mkstemp(suffix='.db')
+        os.close(handle)
+        clear_query_cache()
+        try:
+            conn = get_db_connection(db_path)
+            create_all_tables(conn)
+            insert_reviews(conn, self.sample_reviews)
+            generation = get_ingest_generation(conn, 'test.app')
+            reads = []
+
+            def read():
+                reads.append(1)
+                return get_app_data(conn, 'test.app')
+
+            first = cached_app_query(conn, 'test.app', 'all', read)
+            first.loc[:, 'content'] = 'changed'
+            second = cached_app_query(conn, 'test.app', 'all', read)
+            self.assertEqual(len(reads), 1)
+            self.assertIn('Great app!', second['content'].tolist(), "Callers should get their own copy.")
+
+            # Storing only known reviews changes nothing
+            insert_reviews(conn, self.sample_reviews)
+            self.assertEqual(get_ingest_generation(conn, 'test.app'), generation)
+            cached_app_query(conn, 'test.app', 'all', read)
+            self.assertEqual(len(reads), 1)
+
+            insert_review_rows(conn, [
+                ('4', 'User4', None, 'New', 3, 0, '1.2', to_epoch_seconds('2023-12-05'), None, None, '1.2', 'TestApp', 'test.app', 'us', 'en')
+            ])
+            self.assertEqual(len(cached_app_query(conn, 'test.app', 'all', read)), 4)
+            self.assertEqual(len(reads), 2)
+
+            # The cache is bounded by the memory of its results: room for one result only keeps the last one
+            size = get_app_data(conn, 'test.app').memory_usage(index=True, deep=True).sum()
+            with patch('src.database_connection.db_utils.QUERY_CACHE_MB', 1.5 * size / 1024 / 1024):
+                cached_app_query(conn, 'test.app', 'other', read)
+                cached_app_query(conn, 'test.app', 'other', read)
+                cached_app_query(conn, 'test.app', 'all', read)
+                self.assertEqual(len(reads), 4)
+            with patch('src.database_connection.db_utils.QUERY_CACHE_MB', 0.5 * size / 1024 / 1024):
+                cached_app_query(conn, 'test.app', 'large', read)
+                cached_app_query(conn, 'test.app', 'large', read)
+                self.assertEqual(len(reads), 6, "A result larger than the cache should not be cached.")
+            conn.close()
+        finally:
+            clear_query_cache()
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(db_path + suffix):
+                    os.remove(db_path + suffix)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -2,7 +2,7 @@ import unittest
 from unittest.mock import patch, MagicMock
 import torch
 
-from src.models.distilbert_model import analyze_sentiment_distilbert
+from src.models.distilbert_model import analyze_sentiment_distilbert, analyze_sentiment_distilbert_batch
 
 
 class TestDistilBERTModel(unittest.TestCase):
@@ -94,6 +94,51 @@ class TestDistilBERTModel(unittest.TestCase):
             "Sentiment label should be 'Negative'."
         )
 
+    @patch('src.models.distilbert_model.model')
+    @patch('src.models.distilbert_model.tokenizer')
+    def test_analyze_sentiment_distilbert_batch(self, mock_tokenizer, mock_model):
+        """
+        Test that texts are analyzed in batches, in their order, and that errors only mark the texts causing them.
+        """
+        def tokenize(text, **kwargs):
+            if text == "Broken":
+                raise ValueError("Text cannot be tokenized.")
+            # One token per word, -1 for negative texts
+            return {'input_ids': [-1 if 'bad' in text.lower() else 1] * len(text.split())}
+
+        def pad(encodings, **kwargs):
+            width = max(len(encoding['input_ids']) for encoding in encodings)
+            return {'input_ids': torch.tensor([
+                encoding['input_ids'] + [0] * (width - len(encoding['input_ids'])) for encoding in encodings
+            ])}
+
+        def forward(input_ids):
+            if len(input_ids) == 3:
+                raise RuntimeError("Batch failed.")
+            outputs = MagicMock()
+            outputs.logits = torch.stack([-input_ids[:, 0], input_ids[:, 0]], dim=1).float()
+            return outputs
+
+        mock_tokenizer.side_effect = tokenize
+        mock_tokenizer.pad.side_effect = pad
+        mock_model.side_effect = forward
+
+        texts = ["Great app, love it!", None, "Bad.", "Broken", "Really bad app.", "Fine."]
+        result = analyze_sentiment_distilbert_batch(texts, batch_size=2)
+
+        self.assertEqual(
+            result['distilbert_sentiment_label'].tolist(),
+            ['Positive', 'Error', 'Negative', 'Error', 'Negative', 'Positive'],
+            "Results should be in the order of the texts, with only the failed texts labelled 'Error'."
+        )
+        self.assertAlmostEqual(result['distilbert_positive'][0], 0.8808, places=4)
+        self.assertEqual(mock_model.call_count, 2, "Four texts should need two forward passes of two.")
+
+        result = analyze_sentiment_distilbert_batch(["Good.", "Bad.", "Fine."], batch_size=3)
+        self.assertEqual(
+            result['distilbert_sentiment_label'].tolist(), ['Positive', 'Negative', 'Positive'],
+            "A failed batch should be analyzed one text at a time."
+        )
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,99 @@
+import unittest
+import threading
+from unittest.mock import MagicMock
+
+from src.models.model_registry import ModelRegistry
+
+
+class TestModelRegistry(unittest.TestCase):
+    def test_models_are_loaded_once_on_first_use(self):
+        """Test that a model is loaded only when it is first needed and shared afterwards."""
+        registry = ModelRegistry(max_loaded=2)
+        loader = MagicMock(return_value='model')
+        registry.register('Model', loader)
+        loader.assert_not_called()
+
+        self.assertEqual(registry.get('Model'), 'model')
+        self.assertEqual(registry.get('Model'), 'model')
+        loader.assert_called_once()
+        self.assertTrue(registry.is_loaded('Model'))
+
+        self.assertTrue(registry.unload('Model'))
+        self.assertFalse(registry.unload('Model'))
+        registry.get('Model')
+        self.assertEqual(loader.call_count, 2, "An unloaded model should be loaded again when needed.")
+
+    def test_least_recently_used_model_is_unloaded(self):
+        """Test that loading more than max_loaded models unloads the least recently used one."""
+        registry = ModelRegistry(max_loaded=2)
+        for name in ('A', 'B', 'C'):
+            registry.register(name, MagicMock(return_value=name))
+
+        registry.get('A')
+        registry.get('B')
+        registry.get('A')
+        registry.get('C')
+        self.assertEqual([registry.is_loaded(name) for name in ('A', 'B', 'C')], [True, False, True])
+
+        registry.unload_all()
+        self.assertFalse(registry.is_loaded('A') or registry.is_loaded('C'))
+
+        with self.assertRaises(KeyError):
+            registry.get('Unknown')
+
+    def test_loading_does_not_block_other_models(self):
+        """Test that a slow first load blocks only the callers of that model and runs once."""
+        registry = ModelRegistry(max_loaded=2)
+        started, release = threading.Event(), threading.Event()
+
+        def load_slowly():
+            started.set()
+            release.wait(5)
+            return 'slow'
+
+        slow_loader = MagicMock(side_effect=load_slowly)
+        registry.register('Slow', slow_loader)
+        registry.register('Fast', MagicMock(return_value='fast'))
+        registry.get('Fast')
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(registry.get('Slow'))) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        started.wait(5)
+        self.assertEqual(registry.get('Fast'), 'fast')
+        self.assertFalse(registry.is_loaded('Slow'))
+
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ['slow', 'slow'])
+        slow_loader.assert_called_once()
+
+    def test_failed_load_is_retried(self):
+        """Test that a load that raised is run again by the next caller."""
+        registry = ModelRegistry()
+        registry.register('Model', MagicMock(side_effect=[OSError("download failed"), 'model']))
+        with self.assertRaises(OSError):
+            registry.get('Model')
+        self.assertEqual(registry.get('Model'), 'model')
+
+    def test_models_are_unloaded_under_memory_pressure(self):
+        """Test that other models are unloaded, least recently used first, while available memory is low."""
+        available = [8 * 2**30]
+        registry = ModelRegistry(max_loaded=3, min_available_memory=2**30, memory_probe=lambda: available[0])
+        for name in ('A', 'B', 'C'):
+            registry.register(name, MagicMock(return_value=name))
+        for name in ('A', 'B', 'C'):
+            registry.get(name)
+
+        available[0] = 2**29
+        registry.get('C')
+        self.assertEqual([registry.is_loaded(name) for name in ('A', 'B', 'C')], [False, False, True])
+
+        registry = ModelRegistry(memory_probe=lambda: None)
+        registry.register('A', MagicMock(return_value='A'))
+        self.assertEqual(registry.get('A'), 'A', "Memory that cannot be measured should not unload models.")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+import datetime
+import os
+import sqlite3
+import tempfile
+
+from src.database_connection.db_utils import create_all_tables
+from src.functions.ingestion_benchmark import run_ingestion_benchmark
+from src.functions.review_sources import ReplaySource, normalize_review, write_jsonl_fixture
+from src.functions.scraper import scrape_and_store_reviews
+
+
+def make_record(day):
+    """A review as stored in app_reviews, like the rows of models_comparison/reviews.parquet."""
+    return {
+        'review_id': f'review-{day}',
+        'at': datetime.date(2023, 11, day).isoformat(),
+        'content': f'Review from day {day}',
+        'score': day % 5 + 1,
+        'app_name': 'TestApp'
+    }
+
+
+class TestReviewSources(unittest.TestCase):
+    def setUp(self):
+        self.records = [make_record(day) for day in range(1, 31)]
+
+    def test_normalize_review(self):
+        """Test that app_reviews columns are mapped to scraper review keys."""
+        review = normalize_review(self.records[0])
+        self.assertEqual(review['reviewId'], 'review-1')
+        self.assertEqual(review['at'], datetime.datetime(2023, 11, 1))
+        self.assertIsNone(review['repliedAt'])
+        self.assertNotIn('app_name', review)
+
+    def test_replay_source_pages_newest_first(self):
+        """Test that recorded reviews are served newest first, page by page."""
+        source = ReplaySource(self.records)
+        page, token = source.fetch_page('test.app', count=20)
+        self.assertEqual([review['reviewId'] for review in page[:2]], ['review-30', 'review-29'])
+        self.assertEqual(token.token, '20')
+
+        page, token = source.fetch_page('test.app', count=20, continuation_token=token)
+        self.assertEqual(len(page), 10)
+        self.assertIsNone(token.token)
+        self.assertEqual(source.fetch_page('test.app', continuation_token=token)[0], [])
+        self.assertEqual(source.requests, 2)
+
+    def test_replay_source_from_jsonl(self):
+        """Test loading a JSONL fixture filtered by app name."""
+        records = self.records + [dict(make_record(1), review_id='other', app_name='OtherApp')]
+        handle, path = tempfile.mkstemp(suffix='.jsonl')
+        os.close(handle)
+        try:
+            write_jsonl_fixture(records, path)
+            source = ReplaySource.from_file(path, app_name='TestApp')
+        finally:
+            os.remove(path)
+        self.assertEqual(len(source.reviews), 30)
+
+    def test_scrape_and_store_reviews_from_replay_source(self):
+        """Test that the scraper stores reviews read from a replay source."""
+        conn = sqlite3.connect(':memory:')
+        create_all_tables(conn)
+        fetched = scrape_and_store_reviews(
+            'TestApp', 'test.app', conn,
+            start_date=datetime.date(2023, 11, 11), end_date=datetime.date(2023, 11, 20),
+            source=ReplaySource(self.records)
+        )
+        self.assertEqual(fetched, 10)
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM app_reviews").fetchone()[0], 10)
+        conn.close()
+
+    def test_run_ingestion_benchmark(self):
+        """Test that the benchmark ingests every replayed review and reports its stages."""
+        result = run_ingestion_benchmark(ReplaySource(self.records), pages_per_transaction=1)
+        self.assertEqual(result.rows, 30)
+        self.assertEqual(result.pages, 1)
+        self.assertGreater(result.rows_per_second, 0)
+        self.assertGreaterEqual(result.total_seconds, result.write_seconds)
+
+if __name__ == '__main__':
+    unittest.main()
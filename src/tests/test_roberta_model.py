@@ -1,8 +1,8 @@
 import unittest
-from unittest.mock import patch
+from unittest.mock import patch, MagicMock
 import torch
 
-from src.models.roberta_model import analyze_sentiment_roberta
+from src.models.roberta_model import analyze_sentiment_roberta, analyze_sentiment_roberta_batch
 
 class TestRoBERTaModel(unittest.TestCase):
     
@@ -68,5 +68,27 @@ class TestRoBERTaModel(unittest.TestCase):
 
         self.assertEqual(result, expected_result)
 
+    @patch('src.models.roberta_model.classifier')
+    def test_analyze_sentiment_roberta_batch(self, mock_classifier):
+        """
+        Test that the label and probabilities of a batch come from one forward pass.
+        """
+        mock_classifier.model.config.id2label = {0: 'LABEL_0', 1: 'LABEL_1', 2: 'LABEL_2'}
+        mock_classifier.model.device = torch.device('cpu')
+        mock_classifier.tokenizer.side_effect = lambda texts, **kwargs: {'input_ids': [[1] * len(text) for text in texts]}
+        mock_classifier.tokenizer.pad.side_effect = lambda encodings, **kwargs: {
+            'input_ids': torch.ones((len(encodings), 3), dtype=torch.long)
+        }
+        outputs = MagicMock()
+        outputs.logits = torch.tensor([[2.0, 0.0, 0.0], [0.0, 0.0, 2.0]])
+        mock_classifier.model.return_value = outputs
+
+        result = analyze_sentiment_roberta_batch(["Terrible.", None, "Wonderful!!"])
+
+        self.assertEqual(result['roberta_sentiment_label'].tolist(), ['Negative', 'Error', 'Positive'])
+        self.assertAlmostEqual(result['roberta_positive'][2], 0.7870, places=4)
+        self.assertEqual(mock_classifier.model.call_count, 1)
+        mock_classifier.assert_not_called()
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
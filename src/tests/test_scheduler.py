@@ -0,0 +1,120 @@
+import unittest
+from unittest.mock import patch
+import datetime
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from google_play_scraper.features.reviews import _ContinuationToken
+
+from src.functions.scheduler import (
+    RateLimiter,
+    DatabaseWriter,
+    ScrapeJob,
+    run_scrape_jobs,
+    main
+)
+from src.tests.factories import make_review
+
+
+def fake_reviews(app_id, **kwargs):
+    """One page of three reviews posted in the last hours for every app."""
+    now = datetime.datetime.now()
+    page = [make_review(f'{app_id}-{i}', now - datetime.timedelta(hours=i + 1)) for i in range(3)]
+    if kwargs.get('continuation_token') is not None:
+        return [], kwargs['continuation_token']
+    return page, _ContinuationToken(None, 'en', 'us', 2, 200, None, None)
+
+
+class TestScheduler(unittest.TestCase):
+    def setUp(self):
+        handle, self.db_path = tempfile.mkstemp(suffix='.db')
+        os.close(handle)
+
+    def tearDown(self):
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.db_path + suffix):
+                os.remove(self.db_path + suffix)
+
+    def test_rate_limiter_spaces_requests(self):
+        """Test that threads sharing a limiter do not exceed its rate."""
+        rate_limiter = RateLimiter(requests_per_second=50)
+        start = time.monotonic()
+        threads = [threading.Thread(target=rate_limiter.acquire) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertGreaterEqual(time.monotonic() - start, 9 / 50 - 0.01)
+
+    def test_rate_limiter_rejects_invalid_rate(self):
+        """Test that a non-positive rate is rejected."""
+        with self.assertRaises(ValueError):
+            RateLimiter(requests_per_second=0)
+
+    def test_database_writer_runs_writes_in_order(self):
+        """Test that submitted writes run on one connection in submission order."""
+        writer = DatabaseWriter(self.db_path)
+        writer.submit(lambda conn: conn.execute("CREATE TABLE log (value INTEGER)"))
+        for value in range(5):
+            writer.submit(lambda conn, value: conn.execute("INSERT INTO log VALUES (?)", (value,)), value)
+        writer.submit(lambda conn: conn.commit())
+        failing = writer.submit(lambda conn: conn.execute("SELECT * FROM missing_table"))
+        writer.close()
+
+        with self.assertRaises(sqlite3.OperationalError):
+            failing.result()
+        conn = sqlite3.connect(self.db_path)
+        values = [row[0] for row in conn.execute("SELECT value FROM log")]
+        conn.close()
+        self.assertEqual(values, [0, 1, 2, 3, 4])
+
+    @patch('src.functions.scraper.fetch_review_page', side_effect=fake_reviews)
+    def test_run_scrape_jobs(self, mock_reviews):
+        """Test syncing several streams concurrently into one database."""
+        jobs = [ScrapeJob(f'App{i}', f'app.{i}') for i in range(4)]
+        results = run_scrape_jobs(jobs, db_path=self.db_path, max_workers=2, requests_per_second=100)
+
+        self.assertEqual([result.job for result in results], jobs)
+        self.assertTrue(all(result.completed and result.error is None for result in results))
+        self.assertEqual([result.new_reviews for result in results], [3, 3, 3, 3])
+
+        conn = sqlite3.connect(self.db_path)
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM app_reviews").fetchone()[0], 12)
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM fetch_coverage").fetchone()[0], 4)
+        conn.close()
+
+        # A second refresh finds nothing new
+        results = run_scrape_jobs(jobs, db_path=self.db_path, max_workers=2, requests_per_second=100)
+        self.assertEqual([result.new_reviews for result in results], [0, 0, 0, 0])
+
+    @patch('src.functions.scraper.fetch_review_page', side_effect=fake_reviews)
+    def test_run_scrape_jobs_date_range(self, mock_reviews):
+        """Test that a job with a date range scrapes that range and records it as fetched."""
+        today = datetime.date.today()
+        jobs = [ScrapeJob('App0', 'app.0', start_date=today - datetime.timedelta(days=1), end_date=today)]
+        results = run_scrape_jobs(jobs, db_path=self.db_path, requests_per_second=100)
+
+        self.assertTrue(results[0].completed)
+        self.assertEqual(results[0].new_reviews, 3)
+        conn = sqlite3.connect(self.db_path)
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM fetch_coverage").fetchone()[0], 1)
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM scrape_checkpoints").fetchone()[0], 0)
+        conn.close()
+
+    @patch('src.functions.scraper.fetch_review_page', side_effect=fake_reviews)
+    def test_main(self, mock_reviews):
+        """Test running jobs from the command line."""
+        exit_code = main(['App0=app.0', 'App1=app.1', '--db-path', self.db_path, '--requests-per-second', '100'])
+        self.assertEqual(exit_code, 0)
+        conn = sqlite3.connect(self.db_path)
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM app_reviews").fetchone()[0], 6)
+        conn.close()
+
+        with self.assertRaises(SystemExit):
+            main(['missing-app-id', '--db-path', self.db_path])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,295 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import sqlite3
+import datetime
+
+from google_play_scraper.features.reviews import _ContinuationToken
+
+from src.database_connection.db_utils import (
+    create_reviews_table,
+    create_checkpoints_table,
+    create_coverage_table,
+    get_scrape_checkpoint,
+    get_fetched_ranges,
+    to_epoch_seconds
+)
+from src.functions.app_analysis_functions import get_missing_and_available_ranges
+from src.functions.throttling import RetryPolicy
+from src.functions.scraper import (
+    split_reviews_by_range,
+    scrape_missing_ranges,
+    review_to_row,
+    iter_review_pages,
+    iter_range_batches,
+    sync_new_reviews,
+    select_app,
+    clear_search_cache
+)
+from src.tests.factories import make_review
+
+
+class TestScraper(unittest.TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(':memory:')
+        create_reviews_table(self.conn)
+        create_checkpoints_table(self.conn)
+        create_coverage_table(self.conn)
+
+        # Three pages of the review feed, newest first, one review per day
+        self.pages = [
+            [make_review(str(day), datetime.datetime(2023, 11, day, 12)) for day in range(30, 20, -1)],
+            [make_review(str(day), datetime.datetime(2023, 11, day, 12)) for day in range(20, 10, -1)],
+            [make_review(str(day), datetime.datetime(2023, 11, day, 12)) for day in range(10, 0, -1)],
+        ]
+
+    def tearDown(self):
+        self.conn.close()
+
+    def fake_reviews(self, *args, **kwargs):
+        token = kwargs.get('continuation_token')
+        page_index = 0 if token is None else int(token.token)
+        next_token = _ContinuationToken(str(page_index + 1), 'en', 'us', 2, 200, None, None)
+        if page_index >= len(self.pages):
+            return [], next_token
+        return self.pages[page_index], next_token
+
+    def test_split_reviews_by_range(self):
+        """Test that reviews are assigned to every range they overlap."""
+        page = self.pages[0]
+        ranges = [
+            (datetime.datetime(2023, 11, 28), datetime.datetime(2023, 11, 30, 23, 59)),
+            (datetime.datetime(2023, 11, 29), datetime.datetime(2023, 11, 29, 23, 59)),
+            (datetime.datetime(2023, 10, 1), datetime.datetime(2023, 10, 2)),
+        ]
+        reviews_per_range = split_reviews_by_range(page, ranges)
+        self.assertEqual([r['reviewId'] for r in reviews_per_range[0]], ['30', '29', '28'])
+        self.assertEqual([r['reviewId'] for r in reviews_per_range[1]], ['29'])
+        self.assertEqual(reviews_per_range[2], [])
+
+    @patch('src.functions.scraper.st')
+    @patch('src.functions.scraper.fetch_review_page')
+    def test_scrape_missing_ranges_single_pass(self, mock_reviews, mock_st):
+        """Test that several gaps are fetched with one pass over the feed."""
+        mock_st.session_state = {}
+        mock_reviews.side_effect = self.fake_reviews
+
+        ranges = [
+            (datetime.date(2023, 11, 25), datetime.date(2023, 11, 26)),
+            (datetime.date(2023, 11, 15), datetime.date(2023, 11, 16)),
+        ]
+        fetched = scrape_missing_ranges('TestApp', 'test.app', self.conn, ranges)
+
+        self.assertEqual(fetched, [2, 2])
+        # The feed is only paged once, starting from the newest review
+        first_page_requests = [
+            call for call in mock_reviews.call_args_list
+            if call.kwargs.get('continuation_token') is None
+        ]
+        self.assertEqual(len(first_page_requests), 1)
+
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT review_id FROM app_reviews ORDER BY review_id")
+        stored_ids = [row[0] for row in cursor.fetchall()]
+        cursor.close()
+        self.assertEqual(stored_ids, ['15', '16', '25', '26'])
+
+    @patch('src.functions.scraper.st')
+    @patch('src.functions.scraper.fetch_review_page')
+    def test_scrape_missing_ranges_overlapping(self, mock_reviews, mock_st):
+        """Test that a review in overlapping ranges is stored once."""
+        mock_st.session_state = {}
+        mock_reviews.side_effect = self.fake_reviews
+
+        ranges = [
+            (datetime.date(2023, 11, 27), datetime.date(2023, 11, 28)),
+            (datetime.date(2023, 11, 28), datetime.date(2023, 11, 29)),
+        ]
+        fetched = scrape_missing_ranges('TestApp', 'test.app', self.conn, ranges)
+
+        self.assertEqual(fetched, [2, 2])
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM app_reviews")
+        self.assertEqual(cursor.fetchone()[0], 3)
+        cursor.close()
+
+    @patch('src.functions.scraper.st')
+    @patch('src.functions.scraper.fetch_review_page')
+    def test_scrape_missing_ranges_resumes_from_checkpoint(self, mock_reviews, mock_st):
+        """Test that a stopped download resumes from its saved continuation token."""
+        session_state = {}
+        mock_st.session_state = session_state
+        mock_reviews.side_effect = self.fake_reviews
+
+        # Stop the download as soon as the first page has been processed
+        progress_bar = MagicMock()
+        progress_bar.progress.side_effect = lambda value: session_state.update(stop_download=value < 1.0)
+
+        ranges = [(datetime.date(2023, 11, 5), datetime.date(2023, 11, 30))]
+        scrape_missing_ranges('TestApp', 'test.app', self.conn, ranges, progress_bar=progress_bar, progress_text=MagicMock())
+
+        range_start = datetime.datetime(2023, 11, 5)
+        range_end = datetime.datetime.combine(datetime.date(2023, 11, 30), datetime.datetime.max.time())
+        checkpoint = get_scrape_checkpoint(self.conn, 'test.app', 'us', 'en', range_start, range_end)
+        self.assertIsNotNone(checkpoint, "A checkpoint should be saved when the download is stopped.")
+        self.assertEqual(checkpoint[0], '1')
+        self.assertEqual(checkpoint[1], datetime.datetime(2023, 11, 21, 12))
+        self.assertEqual(
+            get_fetched_ranges(self.conn, 'test.app', 'us', 'en'),
+            [],
+            "A stopped download should not be recorded as fetched."
+        )
+
+        session_state.clear()
+        mock_reviews.reset_mock()
+        scrape_missing_ranges('TestApp', 'test.app', self.conn, ranges)
+
+        first_call = mock_reviews.call_args_list[0]
+        self.assertEqual(first_call.kwargs['continuation_token'].token, '1', "Paging should resume from the checkpoint.")
+        self.assertIsNone(
+            get_scrape_checkpoint(self.conn, 'test.app', 'us', 'en', range_start, range_end),
+            "The checkpoint should be removed once the range is fully fetched."
+        )
+
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM app_reviews")
+        self.assertEqual(cursor.fetchone()[0], 26)
+        cursor.close()
+
+    @patch('src.functions.scraper.st')
+    @patch('src.functions.scraper.fetch_review_page')
+    def test_scrape_missing_ranges_records_coverage(self, mock_reviews, mock_st):
+        """Test that a completed pass is recorded so the same range is not missing afterwards."""
+        mock_st.session_state = {}
+        mock_reviews.side_effect = self.fake_reviews
+
+        start_date = datetime.datetime(2023, 11, 15)
+        end_date = datetime.datetime(2023, 11, 26, 23, 59, 59, 999999)
+        scrape_missing_ranges('TestApp', 'test.app', self.conn, [(start_date, end_date)])
+
+        fetched_ranges = get_fetched_ranges(self.conn, 'test.app', 'us', 'en')
+        self.assertEqual(fetched_ranges, [(start_date, end_date)])
+        ranges = get_missing_and_available_ranges(fetched_ranges, start_date, end_date)
+        self.assertEqual(ranges['missing'], [], "An already fetched range should not be missing.")
+
+    @patch('src.functions.scraper.st')
+    @patch('src.functions.scraper.fetch_review_page')
+    def test_sync_new_reviews_stops_at_stored_reviews(self, mock_reviews, mock_st):
+        """Test that an incremental sync only stores reviews newer than what is already stored."""
+        mock_st.session_state = {}
+        mock_reviews.side_effect = self.fake_reviews
+        scrape_missing_ranges('TestApp', 'test.app', self.conn, [(datetime.date(2023, 11, 21), datetime.date(2023, 11, 30))])
+
+        # Two new reviews are posted on top of the feed
+        self.pages[0] = [
+            make_review('new2', datetime.datetime(2023, 12, 2, 9)),
+            make_review('new1', datetime.datetime(2023, 12, 1, 9)),
+        ] + self.pages[0][:8]
+
+        new_reviews_count = sync_new_reviews('TestApp', 'test.app', self.conn)
+        self.assertEqual(new_reviews_count, 2)
+
+        new_reviews_count = sync_new_reviews('TestApp', 'test.app', self.conn)
+        self.assertEqual(new_reviews_count, 0, "A second sync should find nothing new.")
+
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM app_reviews")
+        self.assertEqual(cursor.fetchone()[0], 12)
+        cursor.close()
+
+    @patch('src.functions.scraper.st')
+    @patch('src.functions.scraper.fetch_review_page')
+    def test_iter_range_batches_without_streamlit(self, mock_reviews, mock_st):
+        """Test that range batches are produced without touching Streamlit."""
+        mock_reviews.side_effect = self.fake_reviews
+        ranges = [(datetime.date(2023, 11, 15), datetime.date(2023, 11, 26))]
+        batches = list(iter_range_batches('TestApp', 'test.app', ranges))
+
+        self.assertEqual(len(batches), 2)
+        self.assertEqual([len(batch.rows) for batch in batches], [6, 6])
+        self.assertEqual(batches[-1].reviews_fetched, 12)
+        self.assertEqual(batches[-1].progress, 1)
+        self.assertEqual(batches[0].continuation_token, '1')
+        self.assertEqual(mock_st.mock_calls, [], "The generator should not use Streamlit.")
+
+    @patch('src.functions.scraper.fetch_review_page')
+    def test_iter_range_batches_resumes(self, mock_reviews):
+        """Test that a batch stream resumes from a saved continuation token."""
+        mock_reviews.side_effect = self.fake_reviews
+        ranges = [(datetime.date(2023, 11, 5), datetime.date(2023, 11, 30))]
+        started_at = datetime.datetime(2023, 12, 1)
+        resume_from = ('1', datetime.datetime(2023, 11, 21, 12), started_at)
+        batches = list(iter_range_batches('TestApp', 'test.app', ranges, resume_from=resume_from))
+
+        self.assertEqual(mock_reviews.call_args_list[0].kwargs['continuation_token'].token, '1')
+        self.assertEqual(batches[0].rows[0][0], '20')
+        self.assertTrue(all(batch.started_at == started_at for batch in batches))
+
+    @patch('src.functions.scraper.fetch_review_page')
+    def test_iter_range_batches_restarts_when_the_token_is_rejected(self, mock_reviews):
+        """Test that a saved token rejected with an error starts a fresh pass instead of failing the resume."""
+        def reject_saved_token(*args, **kwargs):
+            token = kwargs.get('continuation_token')
+            if token is not None and token.token == 'expired':
+                raise ValueError("Invalid pagination token")
+            return self.fake_reviews(*args, **kwargs)
+
+        mock_reviews.side_effect = reject_saved_token
+        ranges = [(datetime.date(2023, 11, 25), datetime.date(2023, 11, 30))]
+        resume_from = ('expired', datetime.datetime(2023, 11, 28, 12), datetime.datetime(2023, 12, 1))
+        batches = list(iter_range_batches(
+            'TestApp', 'test.app', ranges, resume_from=resume_from, retry_policy=RetryPolicy(max_retries=0)
+        ))
+
+        self.assertIsNone(mock_reviews.call_args_list[1].kwargs['continuation_token'])
+        self.assertEqual(batches[0].rows[0][0], '30')
+        self.assertEqual(batches[-1].progress, 1)
+
+        # Errors after the first resumed page are not mistaken for a rejected token
+        next_token = _ContinuationToken('2', 'en', 'us', 2, 200, None, None)
+        mock_reviews.side_effect = [(self.pages[1], next_token), RuntimeError("Network error")]
+        with self.assertRaises(RuntimeError):
+            list(iter_range_batches(
+                'TestApp', 'test.app', [(datetime.date(2023, 11, 1), datetime.date(2023, 11, 30))],
+                resume_from=('1', datetime.datetime(2023, 11, 21, 12), None), retry_policy=RetryPolicy(max_retries=0)
+            ))
+
+    @patch('src.functions.scraper.st')
+    @patch('src.functions.scraper.search')
+    def test_select_app_caches_search_results(self, mock_search, mock_st):
+        """Test that repeating a search is served from the cache."""
+        clear_search_cache()
+        mock_search.return_value = [{'appId': 'test.app', 'title': 'Test App', 'icon': 'icon.png'}, None]
+
+        first_results = select_app('Test App')
+        first_results[0]['title'] = 'Changed by the caller'
+        second_results = select_app(' test app ')
+        select_app('Test App 2')
+
+        self.assertEqual(second_results, [{'appId': 'test.app', 'title': 'Test App', 'icon': 'icon.png'}])
+        self.assertEqual(mock_search.call_count, 2, "Only a new query should search the store.")
+
+        with patch('src.functions.scraper.time.monotonic', return_value=float('inf')):
+            select_app('Test App')
+        self.assertEqual(mock_search.call_count, 3, "An expired result should be searched again.")
+        clear_search_cache()
+
+    def test_review_to_row(self):
+        """Test that a raw review is converted to a row tuple without pandas."""
+        review = make_review('1', datetime.datetime(2023, 11, 1, 8, 30))
+        review['repliedAt'] = datetime.datetime(2023, 11, 2, 9, 0)
+        row = review_to_row(review, 'TestApp', 'test.app', 'us', 'en')
+        self.assertEqual(len(row), 15)
+        self.assertEqual(row[0], '1')
+        self.assertEqual(row[7], to_epoch_seconds(datetime.date(2023, 11, 1)))
+        self.assertEqual(row[9], to_epoch_seconds(datetime.datetime(2023, 11, 2, 9, 0)))
+        self.assertEqual(row[11:], ('TestApp', 'test.app', 'us', 'en'))
+
+    @patch('src.functions.scraper.fetch_review_page')
+    def test_iter_review_pages_reraises_fetch_errors(self, mock_reviews):
+        """Test that an error in the fetcher thread surfaces in the consumer."""
+        mock_reviews.side_effect = RuntimeError("Network error")
+        with self.assertRaises(RuntimeError):
+            list(iter_review_pages('test.app', retry_policy=RetryPolicy(max_retries=0)))
+
+if __name__ == '__main__':
+    unittest.main()
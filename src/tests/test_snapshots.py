@@ -0,0 +1,145 @@
+import unittest
+import os
+import shutil
+import sqlite3
+import tempfile
+from datetime import date
+from unittest.mock import patch
+
+import pandas as pd
+
+from src.database_connection.db_utils import create_all_tables, insert_review_rows, get_app_data
+from src.database_connection.snapshots import (
+    get_snapshot_dir,
+    load_manifest,
+    refresh_app_snapshot,
+    refresh_snapshots,
+    read_app_data,
+    main
+)
+from src.tests.factories import make_review_row
+
+
+class TestSnapshots(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.directory, 'reviews.db')
+        self.conn = sqlite3.connect(self.db_path)
+        create_all_tables(self.conn)
+        insert_review_rows(self.conn, [
+            make_review_row('1', '2023-10-15', score=1),
+            make_review_row('2', '2023-10-31', score=5),
+            make_review_row('3', '2023-11-01', score=3),
+            make_review_row('4', None, score=2),
+            make_review_row('5', '2023-11-02', app_name='OtherApp')
+        ])
+        self.app_key = self.conn.execute("SELECT id FROM apps WHERE title = 'TestApp'").fetchone()[0]
+
+    def tearDown(self):
+        self.conn.close()
+        shutil.rmtree(self.directory)
+
+    def assert_same_reviews(self, *args, **kwargs):
+        expected = get_app_data(self.conn, 'testapp.app', *args, **kwargs)
+        result = read_app_data(self.conn, 'testapp.app', *args, **kwargs)
+        self.assertEqual(list(result.columns), list(expected.columns))
+        self.assertEqual(list(result['review_id']), list(expected['review_id']))
+        if 'at' in expected:
+            pd.testing.assert_series_equal(result['at'], expected['at'])
+
+    def test_refresh_writes_month_partitions(self):
+        """Test that reviews are exported per app and month and that unchanged apps are not rewritten."""
+        snapshot_dir = get_snapshot_dir(self.conn)
+        self.assertEqual(snapshot_dir, os.path.join(self.directory, 'reviews_snapshots'))
+        written = refresh_snapshots(self.conn)
+        self.assertEqual(written[self.app_key], 3)
+        self.assertEqual(load_manifest(snapshot_dir, self.app_key)['months'], ['2023-10', '2023-11', 'none'])
+        self.assertTrue(os.path.exists(
+            os.path.join(snapshot_dir, f'app_key={self.app_key}', 'month=2023-10', 'part.parquet')
+        ))
+        self.assertEqual(refresh_app_snapshot(self.conn, self.app_key), 0)
+
+        insert_review_rows(self.conn, [make_review_row('6', '2023-11-20')])
+        self.assertEqual(refresh_app_snapshot(self.conn, self.app_key), 1, "Only the changed month should be rewritten.")
+        self.assertEqual(len(read_app_data(self.conn, 'testapp.app', date(2023, 11, 1), date(2023, 11, 30))), 2)
+
+    def test_read_app_data_matches_sqlite(self):
+        """Test that snapshot reads with filters and columns, plus the tail stored since, match get_app_data."""
+        refresh_snapshots(self.conn)
+        insert_review_rows(self.conn, [make_review_row('6', '2023-10-20', score=5), make_review_row('7', '2023-12-01')])
+
+        self.assert_same_reviews()
+        self.assert_same_reviews(date(2023, 10, 31), date(2023, 11, 1))
+        self.assert_same_reviews(scores=[5], columns=['review_id', 'score', 'app_name'])
+        self.assert_same_reviews(date(2023, 10, 1), scores=[])
+        with self.assertRaises(ValueError):
+            read_app_data(self.conn, 'testapp.app', columns=['secret'])
+
+    def test_reviews_of_the_same_day_are_in_the_same_order(self):
+        """Test that both readers order reviews of the same time by review_id, so duplicates resolve alike."""
+        insert_review_rows(self.conn, [make_review_row(str(review_id), '2023-10-20') for review_id in range(10, 30)])
+        refresh_snapshots(self.conn)
+        insert_review_rows(self.conn, [make_review_row(str(review_id), '2023-10-20') for review_id in range(30, 50)])
+
+        expected = get_app_data(self.conn, 'testapp.app', date(2023, 10, 20), date(2023, 10, 20))
+        self.assertEqual(expected['review_id'].tolist(), sorted(expected['review_id'], reverse=True))
+        self.assert_same_reviews()
+        self.assertEqual(
+            read_app_data(self.conn, 'testapp.app', columns=['content'])['content'].tolist(),
+            get_app_data(self.conn, 'testapp.app', columns=['content'])['content'].tolist()
+        )
+
+    def test_reads_check_a_single_apps_row(self):
+        """Test that reading a current snapshot does not scan the app's reviews to validate it."""
+        refresh_snapshots(self.conn)
+        with patch('src.database_connection.snapshots._snapshot_signature') as signature, \
+                patch('src.database_connection.snapshots._snapshot_checksum') as checksum:
+            self.assert_same_reviews()
+        signature.assert_not_called()
+        checksum.assert_not_called()
+
+    def test_deleted_and_renumbered_reviews(self):
+        """Test that snapshots of deleted or renumbered reviews are not read and are rebuilt on refresh."""
+        snapshot_dir = get_snapshot_dir(self.conn)
+        refresh_snapshots(self.conn)
+        max_rowid = load_manifest(snapshot_dir, self.app_key)['max_rowid']
+        with self.conn:
+            self.conn.execute("DELETE FROM app_reviews WHERE id = ?", (max_rowid,))
+        insert_review_rows(self.conn, [make_review_row('6', '2023-11-20')])
+        self.assert_same_reviews()
+
+        self.assertEqual(refresh_app_snapshot(self.conn, self.app_key), 2, "A stale snapshot should be rebuilt.")
+        self.assertEqual(load_manifest(snapshot_dir, self.app_key)['months'], ['2023-10', '2023-11'])
+        self.assertFalse(os.path.exists(os.path.join(snapshot_dir, f'app_key={self.app_key}', 'month=none')))
+        self.assert_same_reviews()
+
+        # A rebuild of the table that renumbers the ids
+        with self.conn:
+            self.conn.execute("UPDATE app_reviews SET id = id + 1000")
+        self.assert_same_reviews()
+        self.assertEqual(refresh_app_snapshot(self.conn, self.app_key), 2)
+        self.assert_same_reviews()
+
+        # Reviews replaced under the same ids are caught by the checksum on refresh
+        with self.conn:
+            self.conn.execute("UPDATE app_reviews SET review_id = 'replaced' WHERE review_id = '2'")
+        self.assertEqual(refresh_app_snapshot(self.conn, self.app_key), 2)
+        self.assert_same_reviews()
+
+    def test_read_app_data_without_snapshot(self):
+        """Test that apps without a snapshot and in-memory databases are read from SQLite."""
+        self.assert_same_reviews()
+        conn = sqlite3.connect(':memory:')
+        create_all_tables(conn)
+        self.assertIsNone(get_snapshot_dir(conn))
+        self.assertTrue(read_app_data(conn, 'testapp.app').empty)
+        conn.close()
+
+    def test_main(self):
+        """Test the command line refresh."""
+        snapshot_dir = os.path.join(self.directory, 'exported')
+        self.assertEqual(main(['--db-path', self.db_path, '--snapshot-dir', snapshot_dir]), 0)
+        self.assertIsNotNone(load_manifest(snapshot_dir, self.app_key))
+
+if __name__ == '__main__':
+    unittest.main()
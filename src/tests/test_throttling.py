@@ -0,0 +1,90 @@
+import unittest
+from unittest.mock import MagicMock
+import threading
+from urllib.error import HTTPError
+
+from google_play_scraper.exceptions import ExtraHTTPError, NotFoundError
+
+from src.functions.throttling import (
+    RateLimiter,
+    RetryPolicy,
+    FetchStats,
+    call_with_retry,
+    is_throttling_error,
+    RequestCancelled
+)
+
+# Retry quickly in tests
+FAST_POLICY = RetryPolicy(max_retries=3, base_delay=0.001, max_delay=0.01, throttle_delay=0.001)
+
+
+class TestThrottling(unittest.TestCase):
+    def test_is_throttling_error(self):
+        """Test recognising Google Play throttling responses."""
+        self.assertTrue(is_throttling_error(Exception("com.google.play.gateway.proto.PlayGatewayError")))
+        self.assertTrue(is_throttling_error(ExtraHTTPError("App not found. Status code 429 returned.")))
+        self.assertFalse(is_throttling_error(ValueError("Unexpected response")))
+        self.assertTrue(is_throttling_error(HTTPError('https://play.google.com', 503, 'Service Unavailable', {}, None)))
+        self.assertFalse(is_throttling_error(ExtraHTTPError("App not found. Status code 500 returned.")))
+        self.assertFalse(is_throttling_error(ValueError("Expected 4290 reviews, got 1503")))
+
+    def test_call_with_retry_recovers_from_transient_errors(self):
+        """Test that transient failures are retried and counted."""
+        request = MagicMock(side_effect=[ConnectionError("reset"), ConnectionError("reset"), 'page'])
+        stats = FetchStats()
+        result = call_with_retry(request, policy=FAST_POLICY, stats=stats)
+
+        self.assertEqual(result, 'page')
+        counters = stats.as_dict()
+        self.assertEqual(counters['requests'], 3)
+        self.assertEqual(counters['retries'], 2)
+        self.assertEqual(counters['throttled'], 0)
+        self.assertGreaterEqual(counters['backoff_seconds'], 0)
+
+    def test_call_with_retry_gives_up(self):
+        """Test that the last error is raised once retries are exhausted."""
+        request = MagicMock(side_effect=ConnectionError("reset"))
+        with self.assertRaises(ConnectionError):
+            call_with_retry(request, policy=FAST_POLICY)
+        self.assertEqual(request.call_count, FAST_POLICY.max_retries + 1)
+
+    def test_call_with_retry_does_not_retry_not_found(self):
+        """Test that an unknown app is not retried."""
+        request = MagicMock(side_effect=NotFoundError("App not found(404)."))
+        with self.assertRaises(NotFoundError):
+            call_with_retry(request, policy=FAST_POLICY)
+        self.assertEqual(request.call_count, 1)
+
+    def test_call_with_retry_stops_waiting_on_stop_event(self):
+        """Test that a set stop event aborts the backoff."""
+        stop_event = threading.Event()
+        request = MagicMock(side_effect=lambda: stop_event.set() or (_ for _ in ()).throw(ConnectionError("reset")))
+        with self.assertRaises(ConnectionError):
+            call_with_retry(request, policy=RetryPolicy(base_delay=30, max_delay=30), stop_event=stop_event)
+        self.assertEqual(request.call_count, 1)
+
+    def test_call_with_retry_cancelled_before_request(self):
+        """Test that no request is sent once the stop event is set."""
+        stop_event = threading.Event()
+        stop_event.set()
+        request = MagicMock(return_value='page')
+        with self.assertRaises(RequestCancelled):
+            call_with_retry(request, stop_event=stop_event)
+        request.assert_not_called()
+
+    def test_throttling_slows_rate_limiter(self):
+        """Test that throttling slows the shared limiter down and success speeds it back up."""
+        rate_limiter = RateLimiter(requests_per_second=1000)
+        stats = FetchStats()
+        request = MagicMock(side_effect=[Exception("PlayGatewayError"), Exception("PlayGatewayError"), 'page'])
+        call_with_retry(request, policy=FAST_POLICY, stats=stats, rate_limiter=rate_limiter)
+
+        self.assertEqual(stats.as_dict()['throttled'], 2)
+        self.assertAlmostEqual(rate_limiter.requests_per_second, 1000 * 0.25 * 1.1)
+
+        for _ in range(50):
+            rate_limiter.speed_up()
+        self.assertEqual(rate_limiter.requests_per_second, 1000, "The rate should not exceed its initial value.")
+
+if __name__ == '__main__':
+    unittest.main()